@@ -0,0 +1,70 @@
+"""Measure ingest throughput of offline training from game records.
+
+A dataset of greedy-vs-random games is generated once into a record file
+(untrained agents break every tie at random, so the games are varied). Fresh
+agents of each backend are then trained from it, reporting games/s and the
+peak resident memory, which should not grow with the dataset size.
+
+Usage: poetry run python benchmarks/bench_offline_training.py [games] [path]
+"""
+
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from rl_tic_tac_toe.evaluator import Evaluator
+from rl_tic_tac_toe.game_record import GameRecords, GameRecordWriter
+from rl_tic_tac_toe.offline_training import train_from_records
+from rl_tic_tac_toe.player import Player
+from rl_tic_tac_toe.q_learning_agent import QLearningAgent
+from rl_tic_tac_toe.q_table import QTableBackend
+
+DEFAULT_GAMES = 1000000
+GENERATION_BLOCK = 100000
+
+
+def generate(path: Path, games: int) -> None:
+    agent_x = QLearningAgent(Player.PLAYER_X)
+    agent_o = QLearningAgent(Player.PLAYER_O)
+    start = time.perf_counter()
+    with GameRecordWriter(path, with_metadata=True) as writer:
+        for block, block_start in enumerate(range(0, games, GENERATION_BLOCK)):
+            num_games = min(GENERATION_BLOCK, games - block_start)
+            agent, letter = (
+                (agent_x, Player.PLAYER_X)
+                if block % 2 == 0
+                else (agent_o, Player.PLAYER_O)
+            )
+            Evaluator.evaluate_vs_random_batched(
+                agent, letter, num_games, block, writer
+            )
+    print(f"generated {games:,} games in {time.perf_counter() - start:.1f}s")
+
+
+def main() -> None:
+    games = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_GAMES
+    path = (
+        Path(sys.argv[2])
+        if len(sys.argv) > 2  # noqa: PLR2004
+        else Path(tempfile.gettempdir()) / f"bench_offline_{games}.ttt"
+    )
+    if not path.exists() or len(GameRecords(path)) != games:
+        path.unlink(missing_ok=True)
+        generate(path, games)
+    print(f"dataset: {path} ({path.stat().st_size:,} bytes)")
+    for backend in QTableBackend:
+        agent_x = QLearningAgent(Player.PLAYER_X, backend=backend)
+        agent_o = QLearningAgent(Player.PLAYER_O, backend=backend)
+        stats = train_from_records([path], agent_x, agent_o)
+        peak_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        print(
+            f"[{backend.name}] {stats.games:,} games, {stats.transitions:,} transitions"
+            f" in {stats.seconds:.2f}s: {stats.games_per_second:,.0f} games/s,"
+            f" peak RSS {peak_kib / 1024:.0f} MiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
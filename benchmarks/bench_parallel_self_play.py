@@ -0,0 +1,58 @@
+"""Measure self-play episodes/s against the number of worker processes.
+
+Each configuration trains fresh dense-backend agents for the same number of
+episodes with SelfPlayWorkers the way TrainingLoop does: rounds of
+POLICY_REFRESH_EPISODES games split into one task per worker. It reports
+the speedup over a single worker; worker start-up is excluded.
+
+Usage: poetry run python benchmarks/bench_parallel_self_play.py [episodes] [workers...]
+"""
+
+import os
+import sys
+import time
+
+from rl_tic_tac_toe.parallel_self_play import SelfPlayWorkers
+from rl_tic_tac_toe.player import Player
+from rl_tic_tac_toe.q_learning_agent import QLearningAgent
+from rl_tic_tac_toe.q_table import QTableBackend
+from rl_tic_tac_toe.training_loop import POLICY_REFRESH_EPISODES
+
+DEFAULT_EPISODES = 200000
+
+
+def bench(num_workers: int, episodes: int) -> float:
+    agent_x = QLearningAgent(Player.PLAYER_X, backend=QTableBackend.DENSE)
+    agent_o = QLearningAgent(Player.PLAYER_O, backend=QTableBackend.DENSE)
+    with SelfPlayWorkers(num_workers, seed=0) as workers:
+        # 预热：启动子进程并完成导入
+        workers.play(agent_x, agent_o, [(agent_x, agent_o)] * num_workers, num_workers)
+        start = time.perf_counter()
+        for round_start in range(0, episodes, POLICY_REFRESH_EPISODES):
+            workers.play(
+                agent_x,
+                agent_o,
+                [(agent_x, agent_o)] * num_workers,
+                min(POLICY_REFRESH_EPISODES, episodes - round_start),
+            )
+        return episodes / (time.perf_counter() - start)
+
+
+def main() -> None:
+    episodes = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_EPISODES
+    cpus = os.cpu_count() or 1
+    worker_counts = [int(arg) for arg in sys.argv[2:]] or sorted(
+        {1, 2, 4, 8, cpus} & set(range(1, cpus + 1))
+    )
+    baseline = None
+    for num_workers in worker_counts:
+        rate = bench(num_workers, episodes)
+        baseline = baseline or rate
+        print(
+            f"workers={num_workers:<3} episodes/s: {rate:>10,.0f}"
+            f"  speedup: {rate / baseline:.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
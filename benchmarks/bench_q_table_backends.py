@@ -0,0 +1,76 @@
+"""Compare memory and decisions/sec of the dict and dense Q-table backends.
+
+Usage: poetry run python benchmarks/bench_q_table_backends.py [episodes]
+"""
+
+import sys
+import time
+import tracemalloc
+from random import Random
+
+from rl_tic_tac_toe.action_policy import ActionPolicy
+from rl_tic_tac_toe.player import Player
+from rl_tic_tac_toe.q_learning_agent import QLearningAgent
+from rl_tic_tac_toe.q_table import QTableBackend
+from rl_tic_tac_toe.tic_tac_toe import TicTacToe
+from rl_tic_tac_toe.training_episode import TrainingEpisode
+
+DEFAULT_EPISODES = 20000
+DECISION_POSITIONS = 2000
+DECISION_REPEATS = 20
+
+
+def sample_positions(count: int, rng: Random) -> list[TicTacToe]:
+    """Random non-terminal positions to choose actions on."""
+    positions: list[TicTacToe] = []
+    while len(positions) < count:
+        game = TicTacToe()
+        player = Player.PLAYER_X
+        for _ in range(rng.randrange(8)):
+            game.make_move(rng.choice(game.empty_cells()), player)
+            player = player.opponent()
+            if game.is_ended():
+                break
+        if not game.is_ended():
+            positions.append(game)
+    return positions
+
+
+def bench_backend(
+    backend: QTableBackend, episodes: int, positions: list[TicTacToe]
+) -> None:
+    tracemalloc.start()
+    agent_x = QLearningAgent(Player.PLAYER_X, rng=Random(0), backend=backend)
+    agent_o = QLearningAgent(Player.PLAYER_O, rng=Random(1), backend=backend)
+    start = time.perf_counter()
+    for _ in range(episodes):
+        TrainingEpisode.run(agent_x, agent_o)
+    train_seconds = time.perf_counter() - start
+    traced, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    agent_x.epsilon = 0.0
+    start = time.perf_counter()
+    for _ in range(DECISION_REPEATS):
+        for game in positions:
+            agent_x.choose_action(game, ActionPolicy.GREEDY)
+    decide_seconds = time.perf_counter() - start
+    decisions = DECISION_REPEATS * len(positions)
+
+    print(f"[{backend.name}]")
+    print(f"  states stored     : {len(agent_x.q_table) + len(agent_o.q_table)}")
+    print(f"  table bytes       : {agent_x.q_table.nbytes + agent_o.q_table.nbytes:,}")
+    print(f"  traced bytes      : {traced:,}")
+    print(f"  training episodes/s: {episodes / train_seconds:,.0f}")
+    print(f"  greedy decisions/s: {decisions / decide_seconds:,.0f}")
+
+
+def main() -> None:
+    episodes = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_EPISODES
+    positions = sample_positions(DECISION_POSITIONS, Random(42))
+    for backend in QTableBackend:
+        bench_backend(backend, episodes, positions)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Measure episodes-to-target with and without experience replay.
+
+The target is reached when greedy self-play is drawn with probability at
+least TARGET_DRAW_RATE and neither agent loses more than MAX_LOSS_RATE of
+its games against a random player, both computed exactly. Memory is that of
+the replay buffer, scaled to one million transitions.
+
+Usage: poetry run python benchmarks/bench_replay.py [max_episodes]
+"""
+
+import sys
+import time
+from random import Random
+
+import numpy as np
+
+from rl_tic_tac_toe.evaluator import Evaluator
+from rl_tic_tac_toe.player import Player
+from rl_tic_tac_toe.q_learning_agent import QLearningAgent
+from rl_tic_tac_toe.replay_buffer import ReplayBuffer
+from rl_tic_tac_toe.training_episode import TrainingEpisode
+from rl_tic_tac_toe.training_loop import TrainingLoop, TrainingLoopParams
+
+DEFAULT_MAX_EPISODES = 100000
+CHECK_EVERY = 500
+TARGET_DRAW_RATE = 0.99
+MAX_LOSS_RATE = 0.01
+REPLAY_CAPACITY = 5000
+REPLAY_UPDATES = (0, 1, 4)
+
+
+def reached_target(agent_x: QLearningAgent, agent_o: QLearningAgent) -> bool:
+    if Evaluator.evaluate_agents_exact(agent_x, agent_o)["draws"] < TARGET_DRAW_RATE:
+        return False
+    return all(
+        Evaluator.evaluate_vs_random_exact(agent, agent.player)["losses"]
+        <= MAX_LOSS_RATE
+        for agent in (agent_x, agent_o)
+    )
+
+
+def make_agent(player: Player, seed: int, replay_updates: int) -> QLearningAgent:
+    buffer = (
+        ReplayBuffer(REPLAY_CAPACITY, np.random.default_rng(seed))
+        if replay_updates
+        else None
+    )
+    return QLearningAgent(
+        player, rng=Random(seed), replay_buffer=buffer, replay_updates=replay_updates
+    )
+
+
+def bench(replay_updates: int, max_episodes: int) -> None:
+    agent_x = make_agent(Player.PLAYER_X, 0, replay_updates)
+    agent_o = make_agent(Player.PLAYER_O, 1, replay_updates)
+    loop = TrainingLoop(TrainingLoopParams(max_episodes, agent_x, agent_o), Random(0))
+    episodes_to_target = None
+    start = time.perf_counter()
+    for episode_idx in range(max_episodes):
+        playing_x, playing_o = loop.pick_opponents(episode_idx, loop.rng)
+        TrainingEpisode.run(playing_x, playing_o)
+        loop.update_learning_params(episode_idx)
+        if (episode_idx + 1) % CHECK_EVERY == 0 and reached_target(agent_x, agent_o):
+            episodes_to_target = episode_idx + 1
+            break
+    seconds = time.perf_counter() - start
+
+    print(f"[replay_updates={replay_updates}]")
+    print(f"  episodes to target: {episodes_to_target or f'> {max_episodes}'}")
+    print(f"  wall time         : {seconds:.1f}s")
+    buffer = agent_x.replay_buffer
+    if buffer is not None:
+        per_million = buffer.nbytes / buffer.capacity * 1e6
+        print(f"  buffer fill       : {len(buffer):,} / {buffer.capacity:,}")
+        print(f"  bytes per 1M      : {per_million / 2**20:.1f} MiB")
+
+
+def main() -> None:
+    max_episodes = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_MAX_EPISODES
+    for replay_updates in REPLAY_UPDATES:
+        bench(replay_updates, max_episodes)
+
+
+if __name__ == "__main__":
+    main()
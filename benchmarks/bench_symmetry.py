@@ -0,0 +1,67 @@
+"""Measure episodes-to-target and Q-table size with and without symmetry.
+
+The target is reached when, over one evaluation round, greedy self-play is
+drawn in at least TARGET_DRAW_RATE of the games and neither agent loses more
+than MAX_LOSS_RATE of its games against a random player.
+
+Usage: poetry run python benchmarks/bench_symmetry.py [max_episodes]
+"""
+
+import sys
+import time
+from random import Random
+
+from rl_tic_tac_toe.evaluator import Evaluator
+from rl_tic_tac_toe.player import Player
+from rl_tic_tac_toe.q_learning_agent import QLearningAgent
+from rl_tic_tac_toe.training_episode import TrainingEpisode
+from rl_tic_tac_toe.training_loop import TrainingLoop, TrainingLoopParams
+
+DEFAULT_MAX_EPISODES = 100000
+CHECK_EVERY = 2000
+EVALUATION_GAMES = 500
+TARGET_DRAW_RATE = 0.99
+MAX_LOSS_RATE = 0.01
+
+
+def reached_target(agent_x: QLearningAgent, agent_o: QLearningAgent) -> bool:
+    self_play = Evaluator.evaluate_agents(agent_x, agent_o, EVALUATION_GAMES)
+    if self_play["draws"] < TARGET_DRAW_RATE * EVALUATION_GAMES:
+        return False
+    for agent in (agent_x, agent_o):
+        results = Evaluator.evaluate_vs_random(agent, agent.player, EVALUATION_GAMES)
+        if results["losses"] > MAX_LOSS_RATE * EVALUATION_GAMES:
+            return False
+    return True
+
+
+def bench(use_symmetry: bool, max_episodes: int) -> None:
+    agent_x = QLearningAgent(Player.PLAYER_X, rng=Random(0), use_symmetry=use_symmetry)
+    agent_o = QLearningAgent(Player.PLAYER_O, rng=Random(1), use_symmetry=use_symmetry)
+    loop = TrainingLoop(TrainingLoopParams(max_episodes, agent_x, agent_o), Random(0))
+    episodes_to_target = None
+    start = time.perf_counter()
+    for episode_idx in range(max_episodes):
+        playing_x, playing_o = loop.pick_opponents(episode_idx, loop.rng)
+        TrainingEpisode.run(playing_x, playing_o)
+        loop.update_learning_params(episode_idx)
+        if (episode_idx + 1) % CHECK_EVERY == 0 and reached_target(agent_x, agent_o):
+            episodes_to_target = episode_idx + 1
+            break
+    seconds = time.perf_counter() - start
+
+    print(f"[use_symmetry={use_symmetry}]")
+    print(f"  episodes to target: {episodes_to_target or f'> {max_episodes}'}")
+    print(f"  wall time         : {seconds:.1f}s")
+    print(f"  states stored     : {len(agent_x.q_table) + len(agent_o.q_table)}")
+    print(f"  table bytes       : {agent_x.q_table.nbytes + agent_o.q_table.nbytes:,}")
+
+
+def main() -> None:
+    max_episodes = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_MAX_EPISODES
+    for use_symmetry in (False, True):
+        bench(use_symmetry, max_episodes)
+
+
+if __name__ == "__main__":
+    main()
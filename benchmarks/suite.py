@@ -0,0 +1,332 @@
+"""Benchmark suite of the hot paths, with a tracked JSON baseline.
+
+Microbenchmarks time the board, the agent, a training episode, evaluation
+and snapshots; end-to-end benchmarks run ``TrainingLoop.run`` in a fresh
+process per run and record episodes/s and peak RSS. Every timing is the best
+of several repeats, each end-to-end run included.
+
+Usage:
+    poetry run python benchmarks/suite.py run [--quick] [--output PATH]
+    poetry run python benchmarks/suite.py compare [--baseline PATH]
+        [--current PATH] [--threshold FRACTION] [--quick]
+
+``run`` writes the results to the baseline file by default. ``compare``
+runs the suite (or reads ``--current``) and exits with status 1 if any
+result is worse than the baseline by more than the threshold. Timings only
+compare on one machine, so the baseline file is not tracked: record it with
+``run`` where ``compare`` will run.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import resource
+import sys
+import time
+import timeit
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from multiprocessing import get_context
+from pathlib import Path
+from random import Random
+from typing import Callable
+
+from rl_tic_tac_toe.action_policy import ActionPolicy
+from rl_tic_tac_toe.evaluator import Evaluator
+from rl_tic_tac_toe.player import Player
+from rl_tic_tac_toe.q_learning_agent import QLearningAgent
+from rl_tic_tac_toe.q_table import QTableBackend
+from rl_tic_tac_toe.tic_tac_toe import TicTacToe
+from rl_tic_tac_toe.training_episode import TrainingEpisode
+from rl_tic_tac_toe.training_loop import TrainingLoop, TrainingLoopParams
+
+SUITE_VERSION = 1
+DEFAULT_BASELINE = Path(__file__).with_name("baseline.json")
+DEFAULT_THRESHOLD = 0.15
+PRETRAIN_EPISODES = 5000
+NUM_POSITIONS = 1000
+REPEATS = 5
+TRAINING_LOOP_EPISODES = (10000, 50000)
+QUICK_TRAINING_LOOP_EPISODES = (10000,)
+
+
+@dataclass(slots=True)
+class Measurement:
+    value: float
+    unit: str
+    higher_is_better: bool
+
+
+Results = dict[str, Measurement]
+
+
+def rate(func: Callable[[], object], ops_per_call: int, repeats: int) -> float:
+    """Best operations/s of ``func`` over ``repeats`` timed runs of >= 0.2 s."""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    best = min(timer.repeat(repeats, number))
+    return number * ops_per_call / best
+
+
+def random_games(count: int, rng: Random) -> list[list[int]]:
+    """Move sequences of random games, each played to the end."""
+    games = []
+    for _ in range(count):
+        game = TicTacToe()
+        player = Player.PLAYER_X
+        moves: list[int] = []
+        while not game.is_ended():
+            move = rng.choice(game.empty_cells())
+            game.make_move(move, player)
+            moves.append(move)
+            player = player.opponent()
+        games.append(moves)
+    return games
+
+
+def positions_of(games: list[list[int]]) -> list[TicTacToe]:
+    """A non-terminal position from the middle of each game."""
+    positions = []
+    for moves in games:
+        game = TicTacToe()
+        player = Player.PLAYER_X
+        for move in moves[: len(moves) // 2]:
+            game.make_move(move, player)
+            player = player.opponent()
+        positions.append(game)
+    return positions
+
+
+def trained_agents(backend: QTableBackend) -> tuple[QLearningAgent, QLearningAgent]:
+    agent_x = QLearningAgent(Player.PLAYER_X, rng=Random(0), backend=backend)
+    agent_o = QLearningAgent(Player.PLAYER_O, rng=Random(1), backend=backend)
+    for _ in range(PRETRAIN_EPISODES):
+        TrainingEpisode.run(agent_x, agent_o)
+    agent_x.epsilon = agent_o.epsilon = 0.1
+    return agent_x, agent_o
+
+
+def bench_board(results: Results, games: list[list[int]], repeats: int) -> None:
+    num_moves = sum(map(len, games))
+
+    def play_all() -> None:
+        for moves in games:
+            game = TicTacToe()
+            player = Player.PLAYER_X
+            for move in moves:
+                game.make_move(move, player)
+                player = player.opponent()
+
+    results["tic_tac_toe.make_move"] = Measurement(
+        rate(play_all, num_moves, repeats), "moves/s", True
+    )
+
+    positions = positions_of(games)
+    checks = [(game, game.empty_cells()[0]) for game in positions]
+
+    def check_all() -> None:
+        for game, square in checks:
+            game.winner(square, Player.PLAYER_X)
+
+    results["tic_tac_toe.winner"] = Measurement(
+        rate(check_all, len(checks), repeats), "calls/s", True
+    )
+
+
+def bench_agent(
+    results: Results,
+    backend: QTableBackend,
+    agents: tuple[QLearningAgent, QLearningAgent],
+    games: list[list[int]],
+    repeats: int,
+) -> None:
+    prefix = f"agent.{backend.name.lower()}"
+    agent_x, agent_o = agents
+    positions = positions_of(games)
+
+    def choose_all() -> None:
+        for game in positions:
+            agent_x.choose_action(game, ActionPolicy.GREEDY)
+
+    results[f"{prefix}.choose_action"] = Measurement(
+        rate(choose_all, len(positions), repeats), "calls/s", True
+    )
+
+    updates = [
+        (game.state_id, game.empty_cells()[0], 0.0, game.state_id, game.empty_cells())
+        for game in positions
+    ]
+
+    def update_all() -> None:
+        for update in updates:
+            agent_x.update_q_table(*update)
+
+    results[f"{prefix}.update_q_table"] = Measurement(
+        rate(update_all, len(updates), repeats), "calls/s", True
+    )
+
+    def run_episodes() -> None:
+        for _ in range(100):
+            TrainingEpisode.run(agent_x, agent_o)
+
+    results[f"{prefix}.training_episode"] = Measurement(
+        rate(run_episodes, 100, repeats), "episodes/s", True
+    )
+
+    def take_snapshot() -> None:
+        agent_x.update_q_table(*updates[0])  # 让快照之间有写入，和训练中一样
+        agent_x.snapshot()
+
+    calls_per_second = rate(take_snapshot, 1, repeats)
+    results[f"{prefix}.snapshot"] = Measurement(1e3 / calls_per_second, "ms", False)
+
+
+def bench_evaluator(
+    results: Results, agents: tuple[QLearningAgent, QLearningAgent], repeats: int
+) -> None:
+    agent_x, agent_o = agents
+    results["evaluator.scalar"] = Measurement(
+        rate(lambda: Evaluator.evaluate_agents(agent_x, agent_o, 200), 200, repeats),
+        "games/s",
+        True,
+    )
+    results["evaluator.batched"] = Measurement(
+        rate(
+            lambda: Evaluator.evaluate_agents_batched(agent_x, agent_o, 5000, seed=0),
+            5000,
+            repeats,
+        ),
+        "games/s",
+        True,
+    )
+
+
+def run_training_loop(episodes: int) -> tuple[float, float]:
+    """Episodes/s and peak RSS in MiB of one TrainingLoop.run in this process."""
+    agent_x = QLearningAgent(Player.PLAYER_X, rng=Random(0))
+    agent_o = QLearningAgent(Player.PLAYER_O, rng=Random(1))
+    loop = TrainingLoop(TrainingLoopParams(episodes, agent_x, agent_o), Random(0))
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        loop.run()
+    seconds = time.perf_counter() - start
+    # Linux 上 ru_maxrss 的单位是 KiB
+    return episodes / seconds, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def bench_training_loop(
+    results: Results, episode_counts: tuple[int, ...], repeats: int
+) -> None:
+    for episodes in episode_counts:
+        runs = []
+        for _ in range(repeats):
+            # 每次运行用一个新进程，峰值内存互不影响
+            with ProcessPoolExecutor(1, mp_context=get_context("spawn")) as executor:
+                runs.append(executor.submit(run_training_loop, episodes).result())
+        results[f"training_loop.{episodes}.throughput"] = Measurement(
+            max(episodes_per_second for episodes_per_second, _ in runs),
+            "episodes/s",
+            True,
+        )
+        results[f"training_loop.{episodes}.peak_rss"] = Measurement(
+            min(peak_mib for _, peak_mib in runs), "MiB", False
+        )
+
+
+def run_suite(quick: bool) -> Results:
+    repeats = 3 if quick else REPEATS
+    games = random_games(NUM_POSITIONS, Random(0))
+    results: Results = {}
+    bench_board(results, games, repeats)
+    for backend in QTableBackend:
+        agents = trained_agents(backend)
+        bench_agent(results, backend, agents, games, repeats)
+        if backend == QTableBackend.DICT:
+            bench_evaluator(results, agents, repeats)
+    bench_training_loop(
+        results,
+        QUICK_TRAINING_LOOP_EPISODES if quick else TRAINING_LOOP_EPISODES,
+        repeats,
+    )
+    return results
+
+
+def save_results(results: Results, path: Path) -> None:
+    document = {
+        "version": SUITE_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.platform(),
+        "results": {name: asdict(result) for name, result in results.items()},
+    }
+    path.write_text(json.dumps(document, indent=2) + "\n")
+
+
+def load_results(path: Path) -> Results:
+    document = json.loads(path.read_text())
+    if document.get("version") != SUITE_VERSION:
+        raise ValueError(f"{path}: unsupported suite version {document.get('version')}")
+    return {name: Measurement(**result) for name, result in document["results"].items()}
+
+
+def print_results(results: Results) -> None:
+    for name, result in results.items():
+        print(f"{name:40} {result.value:>14,.2f} {result.unit}")
+
+
+def compare(baseline: Results, current: Results, threshold: float) -> list[str]:
+    """Print the change of every result and return the names that regressed."""
+    regressions = []
+    for name, before in baseline.items():
+        after = current.get(name)
+        if after is None:
+            continue
+        change = after.value / before.value - 1.0
+        worse = -change if before.higher_is_better else change
+        flag = "REGRESSION" if worse > threshold else ""
+        if flag:
+            regressions.append(name)
+        print(
+            f"{name:40} {before.value:>14,.2f} -> {after.value:>14,.2f}"
+            f" {before.unit:11} {change:+7.1%} {flag}"
+        )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="run the suite and save the results")
+    run_parser.add_argument("--output", type=Path, default=DEFAULT_BASELINE)
+    run_parser.add_argument("--quick", action="store_true")
+    compare_parser = commands.add_parser("compare", help="compare with a baseline")
+    compare_parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    compare_parser.add_argument("--current", type=Path)
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    compare_parser.add_argument("--quick", action="store_true")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        results = run_suite(args.quick)
+        print_results(results)
+        save_results(results, args.output)
+        print(f"saved to {args.output}")
+        return
+    if not args.baseline.exists():
+        parser.error(f"{args.baseline} not found, record a baseline with `run` first")
+    baseline = load_results(args.baseline)
+    current = load_results(args.current) if args.current else run_suite(args.quick)
+    regressions = compare(baseline, current, args.threshold)
+    if regressions:
+        print(
+            f"{len(regressions)} result(s) worse than baseline by > {args.threshold:.0%}"
+        )
+        sys.exit(1)
+    print("no regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+"""Actor-learner training: parallel game generation, a single learner.
+
+Actor processes play epsilon-greedy self-play against Q-tables kept in
+``multiprocessing.shared_memory``, reading them in place without copies or
+locks, and push the transitions of every chunk of games through a bounded
+queue. The learner, i.e. the training process itself, applies them straight
+into the shared tables and publishes the scheduled epsilons back to the
+actors. A full queue blocks the actors, so generation never runs ahead of
+learning by more than the queue size.
+"""
+
+import queue
+import time
+from dataclasses import dataclass
+from multiprocessing import get_context
+from multiprocessing.process import BaseProcess
+from multiprocessing.queues import Queue
+from multiprocessing.shared_memory import SharedMemory
+from multiprocessing.synchronize import Event
+from types import TracebackType
+from typing import Any, Optional
+
+import numpy as np
+import numpy.typing as npt
+
+from .batched_training_episode import apply_transition_batch
+from .parallel_self_play import FrozenPolicy, SelfPlayResult, generate_self_play
+from .player import Player
+from .q_learning_agent import QLearningAgent
+from .q_table import DenseQTable, QTableBackend
+from .tic_tac_toe import BOARD_SIZE, NUM_STATE_IDS
+
+ACTOR_CHUNK_GAMES = 256
+TRANSITION_QUEUE_SIZE = 16
+POLL_SECONDS = 0.1
+# 队列中的一项：(actor 编号, 对局数, 各方的转移)
+QueueItem = tuple[int, int, SelfPlayResult]
+
+
+class SharedQTable:
+    """A DenseQTable whose arrays live in one shared memory block."""
+
+    def __init__(self, shm: SharedMemory) -> None:
+        self._shm = shm
+        values: npt.NDArray[np.float32] = np.ndarray(
+            (NUM_STATE_IDS, BOARD_SIZE), dtype=np.float32, buffer=shm.buf
+        )
+        visited: npt.NDArray[np.bool_] = np.ndarray(
+            (NUM_STATE_IDS,), dtype=np.bool_, buffer=shm.buf, offset=values.nbytes
+        )
+        self.table: Optional[DenseQTable] = DenseQTable.from_arrays(values, visited)
+
+    @staticmethod
+    def create(source: DenseQTable) -> "SharedQTable":
+        """Allocate a new block holding a copy of ``source``."""
+        size = source.values.nbytes + source.visited.nbytes
+        shared = SharedQTable(SharedMemory(create=True, size=size))
+        assert shared.table is not None
+        shared.table.values[:] = source.values
+        shared.table.visited[:] = source.visited
+        return shared
+
+    @staticmethod
+    def attach(name: str) -> "SharedQTable":
+        """Map an existing block created by another process."""
+        return SharedQTable(SharedMemory(name=name))
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def close(self) -> None:
+        """Unmap the block; no view of it may be alive any more."""
+        self.table = None
+        self._shm.close()
+
+    def unlink(self) -> None:
+        self._shm.unlink()
+
+
+@dataclass(slots=True)
+class ActorLearnerStats:
+    """Throughput of each actor and of the learner over one run."""
+
+    elapsed_seconds: float
+    actor_games: list[int]
+    actor_transitions: list[int]
+    actor_blocked_seconds: list[float]  # 队列满时等待放入的时间
+    learner_games: int
+    learner_idle_seconds: float  # 队列空时等待取出的时间
+
+
+def run_actor(
+    actor_id: int,
+    table_names: tuple[str, str],
+    use_symmetry: tuple[bool, bool],
+    seed: np.random.SeedSequence,
+    epsilons: Any,
+    counters: Any,
+    blocked_seconds: Any,
+    transitions: "Queue[QueueItem]",
+    stop: Event,
+    chunk_games: int,
+) -> None:
+    """Actor process: play chunks of games until ``stop`` is set."""
+    tables = [SharedQTable.attach(name) for name in table_names]
+    agents = []
+    for player, shared, symmetric in zip(Player, tables, use_symmetry):
+        agent = QLearningAgent(
+            player, backend=QTableBackend.DENSE, use_symmetry=symmetric
+        )
+        assert shared.table is not None
+        agent.attach_q_table(shared.table)
+        agents.append(agent)
+    try:
+        while not stop.is_set():
+            policy_x = FrozenPolicy(agents[0], epsilons[0], learns=True)
+            policy_o = FrozenPolicy(agents[1], epsilons[1], learns=True)
+            result = generate_self_play(
+                policy_x, policy_o, chunk_games, seed.spawn(1)[0]
+            )
+            del policy_x, policy_o
+            start = time.perf_counter()
+            while not stop.is_set():
+                try:
+                    transitions.put(
+                        (actor_id, chunk_games, result), timeout=POLL_SECONDS
+                    )
+                except queue.Full:
+                    continue
+                counters[2 * actor_id] += chunk_games
+                counters[2 * actor_id + 1] += sum(map(len, result.values()))
+                break
+            blocked_seconds[actor_id] += time.perf_counter() - start
+    finally:
+        agents.clear()  # 先释放共享内存上的视图
+        for shared in tables:
+            shared.close()
+
+
+class ActorLearner:
+    """Actor processes generating games for the live agents, which learn here.
+
+    Both agents must use the dense backend. While the actor-learner is open
+    their Q-tables live in shared memory; on close they get private copies of
+    the final values back.
+    """
+
+    def __init__(
+        self,
+        agent_x: QLearningAgent,
+        agent_o: QLearningAgent,
+        num_actors: int,
+        seed: int,
+        queue_size: int = TRANSITION_QUEUE_SIZE,
+        chunk_games: int = ACTOR_CHUNK_GAMES,
+    ) -> None:
+        assert num_actors >= 1
+        for agent in (agent_x, agent_o):
+            if agent.backend != QTableBackend.DENSE:
+                raise ValueError(
+                    f"{agent.backend}: actor-learner mode needs the dense backend."
+                )
+        self._agents = {Player.PLAYER_X: agent_x, Player.PLAYER_O: agent_o}
+        self._num_actors = num_actors
+        self._seed = seed
+        self._queue_size = queue_size
+        self._chunk_games = chunk_games
+        self._context = get_context("spawn")
+        self._tables: list[SharedQTable] = []
+        self._processes: list[BaseProcess] = []
+        self._learner_games = 0
+        self._learner_idle_seconds = 0.0
+        self._start_time = 0.0
+        self._end_time: Optional[float] = None
+
+    def __enter__(self) -> "ActorLearner":
+        self.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+    def start(self) -> None:
+        """Move the Q-tables to shared memory and start the actors."""
+        context = self._context
+        for agent in self._agents.values():
+            assert isinstance(agent.q_table, DenseQTable)
+            shared = SharedQTable.create(agent.q_table)
+            assert shared.table is not None
+            agent.attach_q_table(shared.table)
+            self._tables.append(shared)
+        self._epsilons = context.RawArray("d", len(self._agents))
+        self._counters = context.RawArray("q", 2 * self._num_actors)
+        self._blocked_seconds = context.RawArray("d", self._num_actors)
+        self._queue: Queue[QueueItem] = context.Queue(self._queue_size)
+        self._stop = context.Event()
+        self._publish_epsilons()
+        names = (self._tables[0].name, self._tables[1].name)
+        use_symmetry = (
+            self._agents[Player.PLAYER_X].use_symmetry,
+            self._agents[Player.PLAYER_O].use_symmetry,
+        )
+        seeds = np.random.SeedSequence(self._seed).spawn(self._num_actors)
+        for actor_id in range(self._num_actors):
+            process = context.Process(
+                target=run_actor,
+                args=(
+                    actor_id,
+                    names,
+                    use_symmetry,
+                    seeds[actor_id],
+                    self._epsilons,
+                    self._counters,
+                    self._blocked_seconds,
+                    self._queue,
+                    self._stop,
+                    self._chunk_games,
+                ),
+                daemon=True,
+            )
+            process.start()
+            self._processes.append(process)
+        self._start_time = time.perf_counter()
+
+    def _publish_epsilons(self) -> None:
+        self._epsilons[0] = self._agents[Player.PLAYER_X].epsilon
+        self._epsilons[1] = self._agents[Player.PLAYER_O].epsilon
+
+    def learn(self) -> int:
+        """Apply the next chunk of transitions and return its number of games.
+
+        The agents' current epsilons are published to the actors first.
+        """
+        self._publish_epsilons()
+        start = time.perf_counter()
+        while True:
+            try:
+                _, num_games, result = self._queue.get(timeout=POLL_SECONDS)
+                break
+            except queue.Empty:
+                for actor_id, process in enumerate(self._processes):
+                    if process.exitcode not in (None, 0):
+                        raise RuntimeError(
+                            f"actor {actor_id} exited with code {process.exitcode}"
+                        )
+        self._learner_idle_seconds += time.perf_counter() - start
+        for player, batch in result.items():
+            apply_transition_batch(self._agents[player], batch)
+        self._learner_games += num_games
+        return num_games
+
+    def stats(self) -> ActorLearnerStats:
+        counters = list(self._counters)
+        return ActorLearnerStats(
+            elapsed_seconds=(self._end_time or time.perf_counter()) - self._start_time,
+            actor_games=counters[0::2],
+            actor_transitions=counters[1::2],
+            actor_blocked_seconds=list(self._blocked_seconds),
+            learner_games=self._learner_games,
+            learner_idle_seconds=self._learner_idle_seconds,
+        )
+
+    def close(self) -> None:
+        """Stop and join the actors, then give the agents private tables back."""
+        if not self._tables:
+            return
+        self._end_time = time.perf_counter()
+        self._stop.set()
+        # 继续取出队列中的数据，让阻塞在 put 上的 actor 能够退出
+        while any(process.is_alive() for process in self._processes):
+            try:
+                self._queue.get(timeout=POLL_SECONDS)
+            except queue.Empty:
+                pass
+        for process in self._processes:
+            process.join()
+        for agent, shared in zip(self._agents.values(), self._tables):
+            assert shared.table is not None
+            agent.attach_q_table(
+                DenseQTable.from_arrays(
+                    shared.table.values.copy(), shared.table.visited.copy()
+                )
+            )
+            shared.close()
+            shared.unlink()
+        self._tables.clear()
+
+
+def report_actor_learner_stats(stats: ActorLearnerStats) -> None:
+    """Print per-actor and learner throughput."""
+    elapsed = stats.elapsed_seconds
+    print("\n--- Actor-Learner 吞吐量 ---")
+    for actor_id, (games, transitions, blocked) in enumerate(
+        zip(stats.actor_games, stats.actor_transitions, stats.actor_blocked_seconds)
+    ):
+        print(
+            f"Actor {actor_id}: {games} 局 ({games / elapsed:,.0f} 局/秒),"
+            f" {transitions} 条转移, 队列满阻塞 {blocked:.2f} 秒"
+        )
+    print(
+        f"Learner: {stats.learner_games} 局 ({stats.learner_games / elapsed:,.0f} 局/秒),"
+        f" 队列空等待 {stats.learner_idle_seconds:.2f} 秒"
+    )
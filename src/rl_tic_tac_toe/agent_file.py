@@ -0,0 +1,174 @@
+"""Compact binary agent files.
+
+An agent file starts with a 64-byte header (magic, format version, player,
+Q-table backend, symmetry flag, alpha, epsilon and gamma) followed by the
+Q-table in dense form: ``NUM_STATE_IDS`` x 9 little-endian ``float32``
+values, then one visited byte per state.
+
+``load_agent`` maps the file copy-on-write with ``np.memmap``: startup does
+not read the table, processes loading the same file share its pages, and a
+loaded agent can keep learning without ever writing to the file.
+"""
+
+import os
+import struct
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import numpy.typing as npt
+
+from .player import Player
+from .q_learning_agent import QLearningAgent
+from .q_table import DenseQTable, QTable, QTableBackend, make_q_table
+from .tic_tac_toe import BOARD_SIZE, NUM_STATE_IDS
+
+MAGIC = b"TTTQ"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sHcB?ddd31x")
+AGENT_FILE_SUFFIX = ".tttq"
+VALUES_DTYPE = np.dtype("<f4")
+VALUES_NBYTES = NUM_STATE_IDS * BOARD_SIZE * VALUES_DTYPE.itemsize
+FILE_SIZE = HEADER.size + VALUES_NBYTES + NUM_STATE_IDS
+TIMESTAMP_FORMAT = "%Y%m%d-%H%M%S-%f"  # UTC，微秒
+TIMESTAMP_LENGTH = len("20250101-000000-000000")
+
+
+class AgentFileFormatError(ValueError):
+    """Raised when a file is not an agent file this version can use."""
+
+
+def save_agent(agent: QLearningAgent, path: Path, replace: bool = True) -> None:
+    """Write ``agent`` to ``path`` atomically and durably.
+
+    An existing file is replaced, or with ``replace=False`` left alone and
+    ``FileExistsError`` raised.
+    """
+    values = np.zeros((NUM_STATE_IDS, BOARD_SIZE), dtype=VALUES_DTYPE)
+    visited = np.zeros(NUM_STATE_IDS, dtype=np.bool_)
+    states = np.fromiter(agent.q_table, dtype=np.int64)
+    values[states] = agent.q_table.rows(states)
+    visited[states] = True
+    header = HEADER.pack(
+        MAGIC,
+        FORMAT_VERSION,
+        agent.player.value.encode(),
+        agent.backend.value,
+        agent.use_symmetry,
+        agent.alpha,
+        agent.epsilon,
+        agent.gamma,
+    )
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # 先写临时文件并落盘再改名，读取方和崩溃后都不会看到写了一半的文件
+    partial = path.with_name(path.name + ".partial")
+    with open(partial, "wb") as file:
+        file.write(header)
+        file.write(values.data)
+        file.write(visited.data)
+        file.flush()
+        os.fsync(file.fileno())
+    if replace:
+        os.replace(partial, path)
+        return
+    try:
+        os.link(partial, path)  # 目标已存在时失败，不会覆盖
+    finally:
+        os.unlink(partial)
+
+
+def load_agent(path: Path, backend: Optional[QTableBackend] = None) -> QLearningAgent:
+    """Load an agent saved by ``save_agent``.
+
+    The saved backend is used unless ``backend`` is given. A dense table is
+    the copy-on-write mapping of the file itself; a dict table is built from
+    its visited states.
+    """
+    with open(path, "rb") as file:
+        header = file.read(HEADER.size)
+    if len(header) < HEADER.size:
+        raise AgentFileFormatError(f"{path}: truncated header")
+    magic, version, letter, backend_value, use_symmetry, alpha, epsilon, gamma = (
+        HEADER.unpack(header)
+    )
+    if magic != MAGIC:
+        raise AgentFileFormatError(f"{path}: not an agent file")
+    if version != FORMAT_VERSION:
+        raise AgentFileFormatError(f"{path}: unsupported version {version}")
+    if path.stat().st_size != FILE_SIZE:
+        raise AgentFileFormatError(f"{path}: file size mismatch")
+    try:
+        player = Player(letter.decode())
+        backend = backend or QTableBackend(backend_value)
+    except ValueError as error:
+        raise AgentFileFormatError(f"{path}: {error}") from error
+
+    values: npt.NDArray[np.float32] = np.memmap(
+        path,
+        dtype=VALUES_DTYPE,
+        mode="c",
+        offset=HEADER.size,
+        shape=(NUM_STATE_IDS, BOARD_SIZE),
+    )
+    visited: npt.NDArray[np.bool_] = np.memmap(
+        path,
+        dtype=np.bool_,
+        mode="c",
+        offset=HEADER.size + VALUES_NBYTES,
+        shape=(NUM_STATE_IDS,),
+    )
+    agent = QLearningAgent(
+        player,
+        alpha=alpha,
+        epsilon=epsilon,
+        gamma=gamma,
+        backend=backend,
+        use_symmetry=use_symmetry,
+    )
+    agent.attach_q_table(_table_of(backend, values, visited))
+    return agent
+
+
+def _table_of(
+    backend: QTableBackend,
+    values: npt.NDArray[np.float32],
+    visited: npt.NDArray[np.bool_],
+) -> QTable:
+    if backend == QTableBackend.DENSE:
+        return DenseQTable.from_arrays(values, visited)
+    table = make_q_table(backend)
+    states = np.flatnonzero(visited)
+    table.set_many(
+        np.repeat(states, BOARD_SIZE),
+        np.tile(np.arange(BOARD_SIZE), len(states)),
+        values[states].ravel(),
+    )
+    return table
+
+
+def new_agent_file(directory: Path, player: Player) -> Path:
+    """Path for a new save of ``player``'s agent, named after the current UTC time.
+
+    Names have microsecond resolution and sort in save order: a name that
+    would not sort after the latest save is moved past it, so an existing
+    file is never reused.
+    """
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    latest = latest_agent_file(directory, player)
+    if latest is not None:
+        try:
+            latest_time = datetime.strptime(
+                latest.name[:TIMESTAMP_LENGTH], TIMESTAMP_FORMAT
+            )
+        except ValueError:
+            pass  # 其他格式的文件名不参与比较
+        else:
+            now = max(now, latest_time + timedelta(microseconds=1))
+    return directory / f"{now.strftime(TIMESTAMP_FORMAT)}-{player}{AGENT_FILE_SUFFIX}"
+
+
+def latest_agent_file(directory: Path, player: Player) -> Optional[Path]:
+    """The most recent save of ``player``'s agent in ``directory``, if any."""
+    paths = sorted(directory.glob(f"*-{player}{AGENT_FILE_SUFFIX}"))
+    return paths[-1] if paths else None
@@ -0,0 +1,146 @@
+"""Tic Tac Toe played on many boards at once with NumPy arrays.
+
+Boards are stored as an int8 array of shape [N, 9] using the same cell values
+as the state id encoding (empty=0, X=1, O=2).
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import numpy.typing as npt
+
+from .player import Player
+from .tic_tac_toe import BOARD_SIZE, STATE_ID_WEIGHTS, WIN_LINES
+
+EMPTY = 0
+X = 1
+O = 2  # noqa: E741
+PLAYER_OF_VALUE: dict[int, Player] = {X: Player.PLAYER_X, O: Player.PLAYER_O}
+VALUE_OF_PLAYER: dict[Player, int] = {Player.PLAYER_X: X, Player.PLAYER_O: O}
+
+WIN_LINE_INDICES: npt.NDArray[np.int64] = np.array(WIN_LINES)
+STATE_ID_WEIGHT_ARRAY: npt.NDArray[np.int64] = np.array(STATE_ID_WEIGHTS)
+
+
+def legal_masks_of_states(state_ids: npt.NDArray[np.int64]) -> npt.NDArray[np.bool_]:
+    """Legal-move masks of shape [N, 9] decoded from base-3 state ids."""
+    digits: npt.NDArray[np.int64] = (state_ids[:, None] // STATE_ID_WEIGHT_ARRAY) % 3
+    legal: npt.NDArray[np.bool_] = digits == EMPTY
+    return legal
+
+
+def random_legal_actions(
+    legal_masks: npt.NDArray[np.bool_], rng: np.random.Generator
+) -> npt.NDArray[np.int64]:
+    """A uniformly random legal action for every row."""
+    noise = rng.random(legal_masks.shape)
+    actions: npt.NDArray[np.int64] = np.where(legal_masks, noise, -1.0).argmax(axis=1)
+    return actions
+
+
+def masked_greedy_actions(
+    q_values: npt.NDArray[np.float32],
+    legal_masks: npt.NDArray[np.bool_],
+    rng: np.random.Generator,
+) -> npt.NDArray[np.int64]:
+    """Legal-move-masked argmax per row, breaking ties uniformly at random."""
+    return random_legal_actions(masked_best_actions(q_values, legal_masks), rng)
+
+
+def masked_best_actions(
+    q_values: npt.NDArray[np.float32], legal_masks: npt.NDArray[np.bool_]
+) -> npt.NDArray[np.bool_]:
+    """Per row, the legal actions sharing the maximum legal Q-value."""
+    masked = np.where(legal_masks, q_values, -np.inf)
+    best: npt.NDArray[np.bool_] = masked == masked.max(axis=1, keepdims=True)
+    return best & legal_masks
+
+
+def epsilon_greedy_actions(
+    q_values: npt.NDArray[np.float32],
+    legal_masks: npt.NDArray[np.bool_],
+    epsilon: float,
+    rng: np.random.Generator,
+) -> npt.NDArray[np.int64]:
+    """Per row: a random legal action with probability epsilon, else greedy."""
+    greedy = masked_greedy_actions(q_values, legal_masks, rng)
+    if epsilon <= 0.0:
+        return greedy
+    explore = rng.random(len(greedy)) < epsilon
+    return np.where(explore, random_legal_actions(legal_masks, rng), greedy)
+
+
+@dataclass(slots=True)
+class BatchedStepResult:
+    """Outcome of one move on each stepped board, before any auto-reset."""
+
+    state_ids: npt.NDArray[np.int64]
+    legal_masks: npt.NDArray[np.bool_]
+    winners: npt.NDArray[np.int8]  # 0 when nobody has won
+    done: npt.NDArray[np.bool_]
+
+
+class BatchedTicTacToe:
+    """N Tic-Tac-Toe games advanced in lockstep."""
+
+    def __init__(self, num_games: int, auto_reset: bool = True) -> None:
+        assert num_games > 0
+        self._num_games = num_games
+        self._auto_reset = auto_reset
+        self.boards: npt.NDArray[np.int8] = np.zeros(
+            (num_games, BOARD_SIZE), dtype=np.int8
+        )
+        self.state_ids: npt.NDArray[np.int64] = np.zeros(num_games, dtype=np.int64)
+        self.to_move: npt.NDArray[np.int8] = np.full(num_games, X, dtype=np.int8)
+        self.winners: npt.NDArray[np.int8] = np.zeros(num_games, dtype=np.int8)
+        self.done: npt.NDArray[np.bool_] = np.zeros(num_games, dtype=np.bool_)
+
+    @property
+    def num_games(self) -> int:
+        return self._num_games
+
+    def reset(self, rows: Optional[npt.NDArray[np.int64]] = None) -> None:
+        """Reset the given games (all games by default) to an empty board."""
+        index = slice(None) if rows is None else rows
+        self.boards[index] = EMPTY
+        self.state_ids[index] = 0
+        self.to_move[index] = X
+        self.winners[index] = EMPTY
+        self.done[index] = False
+
+    def legal_masks(self) -> npt.NDArray[np.bool_]:
+        """Legal-move masks of shape [N, 9]; finished games have none."""
+        empty: npt.NDArray[np.bool_] = self.boards == EMPTY
+        return empty & ~self.done[:, None]
+
+    def step(
+        self,
+        actions: npt.NDArray[np.int64],
+        rows: Optional[npt.NDArray[np.int64]] = None,
+    ) -> BatchedStepResult:
+        """Play ``actions[i]`` for the side to move on board ``rows[i]``."""
+        if rows is None:
+            rows = np.arange(self._num_games)
+        assert not self.done[rows].any(), "cannot step a finished game"
+        assert (self.boards[rows, actions] == EMPTY).all(), "illegal move"
+        movers = self.to_move[rows]
+        self.boards[rows, actions] = movers
+        self.state_ids[rows] += movers * STATE_ID_WEIGHT_ARRAY[actions]
+        boards = self.boards[rows]
+
+        lines = boards[:, WIN_LINE_INDICES]
+        won = (lines == movers[:, None, None]).all(axis=2).any(axis=1)
+        full = (boards != EMPTY).all(axis=1)
+        done = won | full
+        winners = np.where(won, movers, EMPTY).astype(np.int8)
+        result = BatchedStepResult(
+            self.state_ids[rows], (boards == EMPTY) & ~done[:, None], winners, done
+        )
+
+        self.winners[rows] = winners
+        self.done[rows] = done
+        self.to_move[rows] = X + O - movers
+        if self._auto_reset and done.any():
+            self.reset(rows[done])
+        return result
@@ -0,0 +1,204 @@
+"""Self-play training on many games at once with BatchedTicTacToe.
+
+Rewards follow the rules of the scalar episode in ``training_episode.py``:
+after every non-final move the opponent's previous decision is updated with a
+zero reward toward the new position, and when a game ends the mover's last
+decision gets the win/draw reward and the opponent's last decision the
+loss/draw reward, both with no legal next actions.
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional, Protocol
+
+import numpy as np
+import numpy.typing as npt
+
+from .batched_tic_tac_toe import (
+    PLAYER_OF_VALUE,
+    X,
+    BatchedTicTacToe,
+    epsilon_greedy_actions,
+)
+from .phase_timer import Phase, PhaseTimer
+from .player import Player
+from .q_learning_agent import QLearningAgent
+from .tic_tac_toe import BOARD_SIZE
+from .training_episode import DRAW_GAME_REWARD, LOSER_REWARD, WINNER_REWARD
+
+MAX_NUM_ENVS = 1024
+
+
+class BatchActor(Protocol):
+    """What the batched self-play needs from a player."""
+
+    @property
+    def epsilon(self) -> float: ...
+
+    def q_values(self, states: npt.NDArray[np.int64]) -> npt.NDArray[np.float32]: ...
+
+
+@dataclass(slots=True)
+class TransitionBatch:
+    """Transitions of one side, as parallel arrays."""
+
+    states: npt.NDArray[np.int64]
+    actions: npt.NDArray[np.int64]
+    rewards: npt.NDArray[np.float32]
+    next_states: npt.NDArray[np.int64]
+    next_legal_masks: npt.NDArray[np.bool_]
+
+    def __len__(self) -> int:
+        return len(self.states)
+
+    @staticmethod
+    def concatenate(batches: list["TransitionBatch"]) -> "TransitionBatch":
+        return TransitionBatch(
+            np.concatenate([b.states for b in batches]),
+            np.concatenate([b.actions for b in batches]),
+            np.concatenate([b.rewards for b in batches]),
+            np.concatenate([b.next_states for b in batches]),
+            np.concatenate([b.next_legal_masks for b in batches]),
+        )
+
+
+TransitionSink = Callable[[Player, TransitionBatch], None]
+
+
+class BatchedTrainingEpisode:
+    @staticmethod
+    def run(
+        playing_x: QLearningAgent,
+        playing_o: QLearningAgent,
+        num_games: int,
+        rng: np.random.Generator,
+        num_envs: Optional[int] = None,
+        timer: Optional[PhaseTimer] = None,
+    ) -> None:
+        """Train ``num_games`` episodes between two agents, played in parallel."""
+        agents = {Player.PLAYER_X: playing_x, Player.PLAYER_O: playing_o}
+
+        def apply(player: Player, batch: TransitionBatch) -> None:
+            if timer is None:
+                apply_transition_batch(agents[player], batch)
+                return
+            with timer.measure(Phase.UPDATE_Q_TABLE):
+                apply_transition_batch(agents[player], batch)
+
+        play_self_play_batch(
+            playing_x, playing_o, num_games, rng, apply, num_envs, timer
+        )
+
+
+def apply_transition_batch(agent: QLearningAgent, batch: TransitionBatch) -> None:
+    """Train the agent on a batch of its transitions; snapshots are left as is."""
+    if agent.is_snapshot:
+        return
+    agent.update_q_table_batch(
+        batch.states,
+        batch.actions,
+        batch.rewards,
+        batch.next_states,
+        batch.next_legal_masks,
+    )
+
+
+def play_self_play_batch(
+    actor_x: BatchActor,
+    actor_o: BatchActor,
+    num_games: int,
+    rng: np.random.Generator,
+    sink: TransitionSink,
+    num_envs: Optional[int] = None,
+    timer: Optional[PhaseTimer] = None,
+) -> None:
+    """Play ``num_games`` epsilon-greedy games, feeding transitions to ``sink``.
+
+    Up to ``num_envs`` games run at once; finished boards are reset and reused
+    until ``num_games`` games have been started.
+    """
+    num_envs = min(num_games, num_envs or MAX_NUM_ENVS)
+    env = BatchedTicTacToe(num_envs, auto_reset=True)
+    actors = (actor_x, actor_o)
+    started = num_envs
+    active = np.ones(num_envs, dtype=np.bool_)
+    # 每局双方上一次决策的 (state, action)，下标 0 为 X，1 为 O
+    last_states = np.zeros((num_envs, 2), dtype=np.int64)
+    last_actions = np.zeros((num_envs, 2), dtype=np.int64)
+    has_moved = np.zeros((num_envs, 2), dtype=np.bool_)
+
+    while active.any():
+        rows = np.flatnonzero(active)
+        sides = env.to_move[rows].astype(np.int64) - X
+        states = env.state_ids[rows].copy()
+        legal = env.legal_masks()[rows]
+        actions = np.empty(len(rows), dtype=np.int64)
+        start = 0.0 if timer is None else time.perf_counter()
+        for side, actor in enumerate(actors):
+            mine = sides == side
+            if mine.any():
+                q_values = actor.q_values(states[mine])
+                actions[mine] = epsilon_greedy_actions(
+                    q_values, legal[mine], actor.epsilon, rng
+                )
+        if timer is not None:
+            timer.add(Phase.CHOOSE_ACTION, start)
+        result = env.step(actions, rows)
+
+        opponents = 1 - sides
+        in_game = ~result.done & has_moved[rows, opponents]
+        won = result.winners != 0
+        rewards_to_mover = np.where(won, WINNER_REWARD, DRAW_GAME_REWARD)
+        rewards_to_opponent = np.where(won, LOSER_REWARD, DRAW_GAME_REWARD)
+        no_moves = np.zeros((len(rows), BOARD_SIZE), dtype=np.bool_)
+        for side in range(2):
+            batches = []
+            # 对手落子后，本方上一次决策得到局中奖励
+            sel = in_game & (opponents == side)
+            if sel.any():
+                batches.append(
+                    TransitionBatch(
+                        last_states[rows[sel], side],
+                        last_actions[rows[sel], side],
+                        np.zeros(int(sel.sum()), dtype=np.float32),
+                        result.state_ids[sel],
+                        result.legal_masks[sel],
+                    )
+                )
+            # 本方落子结束了对局
+            sel = result.done & (sides == side)
+            if sel.any():
+                batches.append(
+                    TransitionBatch(
+                        states[sel],
+                        actions[sel],
+                        rewards_to_mover[sel].astype(np.float32),
+                        result.state_ids[sel],
+                        no_moves[sel],
+                    )
+                )
+            # 对手落子结束了对局
+            sel = result.done & (opponents == side)
+            if sel.any():
+                batches.append(
+                    TransitionBatch(
+                        last_states[rows[sel], side],
+                        last_actions[rows[sel], side],
+                        rewards_to_opponent[sel].astype(np.float32),
+                        result.state_ids[sel],
+                        no_moves[sel],
+                    )
+                )
+            if batches:
+                sink(PLAYER_OF_VALUE[X + side], TransitionBatch.concatenate(batches))
+
+        last_states[rows, sides] = states
+        last_actions[rows, sides] = actions
+        has_moved[rows, sides] = True
+
+        finished = rows[result.done]
+        if len(finished):
+            has_moved[finished] = False
+            restarted = min(len(finished), num_games - started)
+            started += restarted
+            active[finished[restarted:]] = False
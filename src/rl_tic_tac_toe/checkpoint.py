@@ -0,0 +1,149 @@
+"""Checkpoints of a training run, for resuming it after a crash.
+
+A checkpoint holds everything the rest of a run depends on: the loop
+parameters with both agents (Q-tables, learning parameters, random
+generators), the schedulers and the snapshot pool, plus the loop's random
+generators and the index of the next episode. Resuming from it plays exactly
+the episodes the interrupted run would have played.
+
+A checkpoint file is a 16-byte header (magic, format version, payload size)
+followed by a pickle of the ``Checkpoint``; objects shared between its parts,
+such as one ``Random`` used by both agents, stay shared when it is loaded.
+"""
+
+import os
+import pickle
+import struct
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from random import Random
+from types import TracebackType
+from typing import TYPE_CHECKING, Optional
+
+import numpy as np
+
+if TYPE_CHECKING:  # training_loop 依赖本模块
+    from .training_loop import TrainingLoopParams
+
+MAGIC = b"TTTC"
+FORMAT_VERSION = 3  # 2: 调度器改为闭式计算，状态字段不同；3: 字典 Q 表增加数组镜像
+HEADER = struct.Struct("<4sH2xQ")
+CHECKPOINT_SUFFIX = ".ckpt"
+KEEP_CHECKPOINTS = 2
+
+
+class CheckpointFormatError(ValueError):
+    """Raised when a file is not a checkpoint this version can use."""
+
+
+@dataclass(slots=True)
+class Checkpoint:
+    episode: int  # 下一个要进行的回合
+    params: "TrainingLoopParams"  # 不含对局记录与评估记录的输出
+    rng: Random
+    np_rng: Optional[np.random.Generator] = None  # 仅批量训练使用
+
+
+def checkpoint_path(directory: Path, episode: int) -> Path:
+    """Path of the checkpoint taken before ``episode``; names sort by episode."""
+    return directory / f"checkpoint-{episode:012d}{CHECKPOINT_SUFFIX}"
+
+
+def latest_checkpoint(directory: Path) -> Optional[Path]:
+    """The checkpoint in ``directory`` with the most episodes done, if any."""
+    paths = sorted(directory.glob(f"checkpoint-*{CHECKPOINT_SUFFIX}"))
+    return paths[-1] if paths else None
+
+
+def dump_checkpoint(checkpoint: Checkpoint) -> bytes:
+    """The file contents of ``checkpoint``, header included."""
+    payload = pickle.dumps(checkpoint, protocol=pickle.HIGHEST_PROTOCOL)
+    return HEADER.pack(MAGIC, FORMAT_VERSION, len(payload)) + payload
+
+
+def write_checkpoint(data: bytes, path: Path) -> None:
+    """Write ``dump_checkpoint`` output to ``path``, replacing it atomically."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # 先写临时文件并落盘再改名，崩溃时不会留下写了一半的检查点
+    partial = path.with_name(path.name + ".partial")
+    with open(partial, "wb") as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(partial, path)
+
+
+def load_checkpoint(path: Path) -> Checkpoint:
+    """Read a checkpoint written by ``write_checkpoint``.
+
+    Only load checkpoints you wrote yourself: the payload is a pickle.
+    """
+    with open(path, "rb") as file:
+        header = file.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise CheckpointFormatError(f"{path}: truncated header")
+        magic, version, payload_size = HEADER.unpack(header)
+        if magic != MAGIC:
+            raise CheckpointFormatError(f"{path}: not a checkpoint")
+        if version != FORMAT_VERSION:
+            raise CheckpointFormatError(f"{path}: unsupported version {version}")
+        payload = file.read()
+    if len(payload) != payload_size:
+        raise CheckpointFormatError(f"{path}: payload size mismatch")
+    checkpoint = pickle.loads(payload)
+    if not isinstance(checkpoint, Checkpoint):
+        raise CheckpointFormatError(f"{path}: unexpected payload")
+    return checkpoint
+
+
+class CheckpointWriter:
+    """Writes checkpoints to a directory from a background thread.
+
+    ``submit`` pickles the checkpoint in the calling thread, so the file holds
+    the state at that moment even though training goes on; the write itself
+    happens in the background. A new submit first waits for the previous
+    write, and only the newest ``keep`` checkpoints are kept.
+    """
+
+    def __init__(self, directory: Path, keep: int = KEEP_CHECKPOINTS) -> None:
+        assert keep >= 1
+        self.directory = directory
+        self._keep = keep
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix="checkpoint")
+        self._pending: Optional[Future[None]] = None
+
+    def __enter__(self) -> "CheckpointWriter":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+    def submit(self, checkpoint: Checkpoint) -> None:
+        data = dump_checkpoint(checkpoint)
+        self.wait()
+        path = checkpoint_path(self.directory, checkpoint.episode)
+        self._pending = self._executor.submit(self._write, data, path)
+
+    def wait(self) -> None:
+        """Wait for the pending write; raise its error if it failed."""
+        if self._pending is not None:
+            pending, self._pending = self._pending, None
+            pending.result()
+
+    def close(self) -> None:
+        try:
+            self.wait()
+        finally:
+            self._executor.shutdown()
+
+    def _write(self, data: bytes, path: Path) -> None:
+        write_checkpoint(data, path)
+        paths = sorted(self.directory.glob(f"checkpoint-*{CHECKPOINT_SUFFIX}"))
+        for old in paths[: -self._keep]:
+            old.unlink()
@@ -0,0 +1,136 @@
+"""Greedy policies compiled into a lookup table, for serving trained agents.
+
+``CompiledPolicy.compile`` asks a trained agent once for the best moves of
+every reachable non-terminal position and packs them into one 9-bit mask per
+state id. Playing is then a single table lookup plus a random pick among the
+tied moves, with no Q-table kept in memory.
+"""
+
+from pathlib import Path
+from random import Random
+from typing import Protocol
+
+import numpy as np
+import numpy.typing as npt
+
+from .action_policy import ActionPolicy
+from .batched_tic_tac_toe import legal_masks_of_states, random_legal_actions
+from .game_record import COMPILED_POLICY_ID
+from .player import Player
+from .q_learning_agent import QLearningAgent
+from .state_space import get_state_space
+from .tic_tac_toe import BOARD_SIZE, CELLS_OF_MASK, NUM_STATE_IDS, TicTacToe
+
+_SQUARE_BITS = np.arange(BOARD_SIZE, dtype=np.uint16)
+
+
+class GreedyAgent(Protocol):
+    """What GameBattle and Evaluator need from a greedy player."""
+
+    @property
+    def snapshot_id(self) -> int: ...
+
+    def choose_action(self, game: TicTacToe, policy: ActionPolicy) -> int: ...
+
+    def best_actions(self, state: int, actions: list[int]) -> list[int]:
+        """The actions, among the given legal ones, the player picks from."""
+        ...
+
+    def choose_actions(
+        self,
+        states: npt.NDArray[np.int64],
+        policy: ActionPolicy,
+        rng: np.random.Generator,
+    ) -> npt.NDArray[np.int64]:
+        """Vectorized ``choose_action``: one legal action per state id."""
+        ...
+
+
+class CompiledPolicy:
+    """Frozen greedy policy: the set of best moves of each state as a bitmask.
+
+    Unknown or terminal states have an empty set, in which case every legal
+    move counts as best, as for a state the agent never visited.
+    """
+
+    __slots__ = ("_player", "_best_masks", "_rng")
+
+    def __init__(
+        self,
+        player: Player,
+        best_masks: npt.NDArray[np.uint16],
+        rng: Random = Random(0),
+    ) -> None:
+        assert best_masks.shape == (NUM_STATE_IDS,)
+        self._player = player
+        self._best_masks = best_masks
+        self._rng = rng
+
+    @staticmethod
+    def compile(agent: QLearningAgent, rng: Random = Random(0)) -> "CompiledPolicy":
+        """Precompute ``agent.best_actions`` for every reachable position."""
+        space = get_state_space()
+        best_masks = np.zeros(NUM_STATE_IDS, dtype=np.uint16)
+        for state, legal_mask in zip(
+            space.state_ids[~space.terminal].tolist(),
+            space.legal_masks[~space.terminal].tolist(),
+        ):
+            best = agent.best_actions(state, list(CELLS_OF_MASK[legal_mask]))
+            best_masks[state] = sum(1 << move for move in best)
+        return CompiledPolicy(agent.player, best_masks, rng)
+
+    def save(self, path: Path) -> None:
+        """Write the table as an ``.npy`` file."""
+        np.save(path, self._best_masks)
+
+    @staticmethod
+    def load(path: Path, player: Player, rng: Random = Random(0)) -> "CompiledPolicy":
+        """Map a table written by ``save``, read-only."""
+        best_masks: npt.NDArray[np.uint16] = np.load(path, mmap_mode="r")
+        if best_masks.dtype != np.uint16 or best_masks.shape != (NUM_STATE_IDS,):
+            raise ValueError(f"{path}: not a compiled policy table")
+        return CompiledPolicy(player, best_masks, rng)
+
+    @property
+    def player(self) -> Player:
+        return self._player
+
+    @property
+    def snapshot_id(self) -> int:
+        return COMPILED_POLICY_ID
+
+    @property
+    def nbytes(self) -> int:
+        return self._best_masks.nbytes
+
+    def choose_action(self, game: TicTacToe, policy: ActionPolicy) -> int:
+        """A best move of the current position; only greedy play is supported."""
+        if policy != ActionPolicy.GREEDY:
+            raise ValueError(f"{policy}: a compiled policy only plays greedily.")
+        moves = CELLS_OF_MASK[int(self._best_masks[game.state_id])]
+        return self._rng.choice(moves or game.empty_cells())
+
+    def choose_actions(
+        self,
+        states: npt.NDArray[np.int64],
+        policy: ActionPolicy,
+        rng: np.random.Generator,
+    ) -> npt.NDArray[np.int64]:
+        if policy != ActionPolicy.GREEDY:
+            raise ValueError(f"{policy}: a compiled policy only plays greedily.")
+        best = self.best_action_masks(states, legal_masks_of_states(states))
+        return random_legal_actions(best, rng)
+
+    def best_actions(self, state: int, actions: list[int]) -> list[int]:
+        mask = int(self._best_masks[state])
+        best = [action for action in actions if mask >> action & 1]
+        return best or list(actions)
+
+    def best_action_masks(
+        self, states: npt.NDArray[np.int64], legal_masks: npt.NDArray[np.bool_]
+    ) -> npt.NDArray[np.bool_]:
+        best: npt.NDArray[np.bool_] = (
+            (self._best_masks[states, None] >> _SQUARE_BITS) & 1
+        ).astype(np.bool_) & legal_masks
+        # 表中没有的局面：所有合法动作都算最优
+        return np.where(best.any(axis=1, keepdims=True), best, legal_masks)
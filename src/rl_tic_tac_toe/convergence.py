@@ -0,0 +1,109 @@
+"""Convergence detection for stopping training early.
+
+``ConvergenceTracker`` reads the evaluation records like any metrics sink. An
+evaluation window has converged when every configured threshold holds: the
+largest and mean |ΔQ| of the window's updates, the fraction of positions
+whose greedy move changed since the last snapshot, and the change of the
+AI-vs-AI draw rate since the previous evaluation. Once ``patience``
+consecutive windows have converged, the tracker records why and where, and
+``TrainingLoop`` ends the run.
+"""
+
+from typing import Optional
+
+from .training_metrics import EvaluationRecord, as_rates
+
+MEAN_DELTA_Q = 0.01
+POLICY_CHANGE = 0.03
+DRAW_RATE_CHANGE = 0.01
+PATIENCE = 3
+
+
+class ConvergenceTracker:
+    """Counts consecutive converged evaluation windows.
+
+    A threshold of None is not checked. The largest |ΔQ| is not checked by
+    default: it follows alpha and a few rarely visited positions, and in
+    batched training it is the net change of a whole batch.
+
+    The tracker is kept in the loop parameters like the schedulers, so its
+    state is saved in checkpoints. That includes the loop's decision to stop,
+    ``stop_episode`` and ``stop_reason``, so a run resumed during the
+    compressed tail neither compresses the schedules again nor moves the end.
+    """
+
+    def __init__(
+        self,
+        max_delta_q: Optional[float] = None,
+        mean_delta_q: Optional[float] = MEAN_DELTA_Q,
+        policy_change: Optional[float] = POLICY_CHANGE,
+        draw_rate_change: Optional[float] = DRAW_RATE_CHANGE,
+        patience: int = PATIENCE,
+        compress_schedules: bool = False,
+    ) -> None:
+        assert patience >= 1
+        self._max_delta_q = max_delta_q
+        self._mean_delta_q = mean_delta_q
+        self._policy_change = policy_change
+        self._draw_rate_change = draw_rate_change
+        self._patience = patience
+        # 收敛后不立即停止，而是把调度器的剩余衰减压缩到再训练一个窗口内完成
+        self.compress_schedules = compress_schedules
+        self._previous_draw_rate: Optional[float] = None
+        self.streak = 0  # 连续满足条件的窗口数
+        self.converged_at: Optional[int] = None  # 判定收敛时已完成的回合数
+        self.reason: Optional[str] = None
+        # 由 TrainingLoop 在判定收敛后设置：结束的回合数及提前结束的原因
+        self.stop_episode: Optional[int] = None
+        self.stop_reason: Optional[str] = None
+
+    @property
+    def converged(self) -> bool:
+        return self.converged_at is not None
+
+    def write(self, record: EvaluationRecord) -> None:
+        """Check the window that ends at ``record``."""
+        window_converged = self._window_converged(record)
+        if self.converged:
+            return
+        self.streak = self.streak + 1 if window_converged else 0
+        if self.streak >= self._patience:
+            self.converged_at = record.stats.episode
+            self.reason = (
+                f"连续 {self._patience} 个评估窗口满足收敛条件 ({self._conditions()})"
+            )
+
+    def flush(self) -> None:
+        pass
+
+    def _window_converged(self, record: EvaluationRecord) -> bool:
+        stats = record.stats
+        draw_rate = as_rates(record.evaluation.ai_vs_ai)["draw_rate"]
+        previous_draw_rate, self._previous_draw_rate = (
+            self._previous_draw_rate,
+            draw_rate,
+        )
+        if self._max_delta_q is not None and stats.max_delta_q > self._max_delta_q:
+            return False
+        if self._mean_delta_q is not None and stats.mean_delta_q > self._mean_delta_q:
+            return False
+        if self._policy_change is not None and (
+            max(stats.policy_change_x, stats.policy_change_o) > self._policy_change
+        ):
+            return False
+        return self._draw_rate_change is None or (
+            previous_draw_rate is not None
+            and abs(draw_rate - previous_draw_rate) <= self._draw_rate_change
+        )
+
+    def _conditions(self) -> str:
+        conditions = []
+        if self._max_delta_q is not None:
+            conditions.append(f"最大 |ΔQ| ≤ {self._max_delta_q:g}")
+        if self._mean_delta_q is not None:
+            conditions.append(f"平均 |ΔQ| ≤ {self._mean_delta_q:g}")
+        if self._policy_change is not None:
+            conditions.append(f"贪心策略变化 ≤ {self._policy_change:.2%}")
+        if self._draw_rate_change is not None:
+            conditions.append(f"平局率变化 ≤ {self._draw_rate_change:.2%}")
+        return ", ".join(conditions)
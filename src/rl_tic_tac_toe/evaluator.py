@@ -1,25 +1,61 @@
+from enum import Enum, auto, unique
+from typing import Callable, Optional
+
+import numpy as np
+
 from .action_policy import ActionPolicy
+from .batched_tic_tac_toe import (
+    EMPTY,
+    PLAYER_OF_VALUE,
+    VALUE_OF_PLAYER,
+    O,
+    X,
+    BatchedTicTacToe,
+    random_legal_actions,
+)
+from .compiled_policy import GreedyAgent
+from .game_record import (
+    NO_MOVE,
+    RANDOM_PLAYER_ID,
+    GameRecordWriter,
+    result_of,
+)
 from .player import Player
-from .q_learning_agent import QLearningAgent
 from .random_player import RandomPlayer
-from .tic_tac_toe import TicTacToe
+from .state_space import get_state_space
+from .tic_tac_toe import BOARD_SIZE, CELLS_OF_MASK, TicTacToe
+
+# (X 胜, O 胜, 平局) 的概率
+Outcome = tuple[float, float, float]
+# (轮到的一方, state id, 合法动作) -> 该方会从中均匀随机选择的动作
+MoveChooser = Callable[[Player, int, list[int]], list[int]]
+
+
+@unique
+class EvaluationMode(Enum):
+    SCALAR = auto()  # play the games one by one
+    BATCHED = auto()  # play all games at once on NumPy arrays
+    EXACT = auto()  # compute the expected results over the game tree
 
 
 class Evaluator:
     @staticmethod
     def evaluate_agents(
-        agent_x: QLearningAgent, agent_o: QLearningAgent, num_games: int = 1000
+        agent_x: GreedyAgent,
+        agent_o: GreedyAgent,
+        num_games: int = 1000,
+        record_writer: Optional[GameRecordWriter] = None,
     ) -> dict[str, int]:
         """
-        Evaluates two Q-learning agents playing against each other in num_games rounds.
+        Evaluates two greedy agents playing against each other in num_games rounds.
         Disables exploration (epsilon=0) to assess performance under optimal play.
         Reports win/draw statistics.
         """
-        # ... (代码未变)
         x_wins, o_wins, draws = 0, 0, 0
         for _ in range(num_games):
             game = TicTacToe()
             turn = Player.PLAYER_X
+            moves: list[int] = []
             while game.has_empty_cell() and not game.current_winner:
                 if turn == Player.PLAYER_X:
                     action = agent_x.choose_action(game, ActionPolicy.GREEDY)
@@ -27,7 +63,14 @@ class Evaluator:
                 else:
                     action = agent_o.choose_action(game, ActionPolicy.GREEDY)
                     game.make_move(action, Player.PLAYER_O)
+                moves.append(action)
                 turn = turn.opponent()
+            if record_writer is not None:
+                record_writer.write(
+                    moves,
+                    result_of(game.current_winner),
+                    (agent_x.snapshot_id, agent_o.snapshot_id),
+                )
             if game.current_winner == Player.PLAYER_X:
                 x_wins += 1
             elif game.current_winner == Player.PLAYER_O:
@@ -38,16 +81,23 @@ class Evaluator:
 
     @staticmethod
     def evaluate_vs_random(
-        agent_to_test: QLearningAgent,
+        agent_to_test: GreedyAgent,
         agent_letter: Player,
         num_games: int = 1000,
+        record_writer: Optional[GameRecordWriter] = None,
     ) -> dict[str, int]:
         """Evaluates the AI's performance against a random player over num_games rounds."""
         random_player = RandomPlayer(agent_letter.opponent())
+        snapshot_ids, epsilons = (
+            record_metadata(agent_to_test, None)
+            if agent_letter == Player.PLAYER_X
+            else record_metadata(None, agent_to_test)
+        )
         wins, losses, draws = 0, 0, 0
         for _ in range(num_games):
             game = TicTacToe()
             turn = Player.PLAYER_X
+            moves: list[int] = []
             while game.has_empty_cell() and not game.current_winner:
                 if turn == agent_letter:
                     action = agent_to_test.choose_action(game, ActionPolicy.GREEDY)
@@ -55,7 +105,12 @@ class Evaluator:
                 else:
                     action = random_player.choose_action(game)
                     game.make_move(action, random_player.player)
+                moves.append(action)
                 turn = turn.opponent()
+            if record_writer is not None:
+                record_writer.write(
+                    moves, result_of(game.current_winner), snapshot_ids, epsilons
+                )
             if game.current_winner == agent_letter:
                 wins += 1
             elif not game.current_winner:
@@ -63,3 +118,197 @@ class Evaluator:
             else:
                 losses += 1
         return {"wins": wins, "losses": losses, "draws": draws}
+
+    @staticmethod
+    def evaluate_agents_batched(
+        agent_x: GreedyAgent,
+        agent_o: GreedyAgent,
+        num_games: int = 1000,
+        seed: Optional[int] = None,
+        record_writer: Optional[GameRecordWriter] = None,
+    ) -> dict[str, int]:
+        """Batched ``evaluate_agents``: all games are played at once.
+
+        Greedy ties are broken with a NumPy generator seeded by ``seed``.
+        """
+        rng = np.random.default_rng(seed)
+        env = play_greedy_batch(
+            (agent_x, agent_o), num_games, rng, lambda _: False, record_writer
+        )
+        x_wins = int(np.count_nonzero(env.winners == VALUE_OF_PLAYER[Player.PLAYER_X]))
+        o_wins = int(np.count_nonzero(env.winners == VALUE_OF_PLAYER[Player.PLAYER_O]))
+        return {
+            "x_wins": x_wins,
+            "o_wins": o_wins,
+            "draws": num_games - x_wins - o_wins,
+        }
+
+    @staticmethod
+    def evaluate_vs_random_batched(
+        agent_to_test: GreedyAgent,
+        agent_letter: Player,
+        num_games: int = 1000,
+        seed: Optional[int] = None,
+        record_writer: Optional[GameRecordWriter] = None,
+    ) -> dict[str, int]:
+        """Batched ``evaluate_vs_random``: all games are played at once.
+
+        The random opponent and greedy tie-breaking share a NumPy generator
+        seeded by ``seed``.
+        """
+        rng = np.random.default_rng(seed)
+        env = play_greedy_batch(
+            (agent_to_test, agent_to_test),
+            num_games,
+            rng,
+            lambda player: player != agent_letter,
+            record_writer,
+        )
+        wins = int(np.count_nonzero(env.winners == VALUE_OF_PLAYER[agent_letter]))
+        draws = int(np.count_nonzero(env.winners == 0))
+        return {"wins": wins, "losses": num_games - wins - draws, "draws": draws}
+
+    @staticmethod
+    def evaluate_agents_exact(
+        agent_x: GreedyAgent,
+        agent_o: GreedyAgent,
+        num_games: Optional[int] = None,
+    ) -> dict[str, float]:
+        """Exact expected results of greedy self-play.
+
+        Each agent picks uniformly among its best moves, as ``evaluate_agents``
+        does. Rates are returned, or expected counts if ``num_games`` is given.
+        """
+        agents = {Player.PLAYER_X: agent_x, Player.PLAYER_O: agent_o}
+        x_wins, o_wins, draws = exact_outcome(
+            lambda player, state, moves: agents[player].best_actions(state, moves)
+        )
+        scale = num_games or 1
+        return {
+            "x_wins": x_wins * scale,
+            "o_wins": o_wins * scale,
+            "draws": draws * scale,
+        }
+
+    @staticmethod
+    def evaluate_vs_random_exact(
+        agent_to_test: GreedyAgent,
+        agent_letter: Player,
+        num_games: Optional[int] = None,
+    ) -> dict[str, float]:
+        """Exact expected results of the greedy agent against a uniform random player.
+
+        Rates are returned, or expected counts if ``num_games`` is given.
+        """
+
+        def choose_moves(player: Player, state: int, moves: list[int]) -> list[int]:
+            if player == agent_letter:
+                return agent_to_test.best_actions(state, moves)
+            return moves
+
+        x_wins, o_wins, draws = exact_outcome(choose_moves)
+        wins, losses = (
+            (x_wins, o_wins) if agent_letter == Player.PLAYER_X else (o_wins, x_wins)
+        )
+        scale = num_games or 1
+        return {"wins": wins * scale, "losses": losses * scale, "draws": draws * scale}
+
+
+def record_metadata(
+    agent_x: Optional[GreedyAgent], agent_o: Optional[GreedyAgent]
+) -> tuple[tuple[int, int], tuple[float, float]]:
+    """Snapshot ids and epsilons of a greedy game; None is the random player."""
+    return (
+        (
+            RANDOM_PLAYER_ID if agent_x is None else agent_x.snapshot_id,
+            RANDOM_PLAYER_ID if agent_o is None else agent_o.snapshot_id,
+        ),
+        (float(agent_x is None), float(agent_o is None)),
+    )
+
+
+def exact_outcome(choose_moves: MoveChooser) -> Outcome:
+    """Outcome probabilities from the empty board when both sides pick uniformly
+    among the moves returned by ``choose_moves``.
+
+    Positions come from the StateSpace tables; each one reached under the two
+    policies is solved once.
+    """
+    space = get_state_space()
+    state_ids: list[int] = space.state_ids.tolist()
+    legal_masks: list[int] = space.legal_masks.tolist()
+    successors: list[list[int]] = space.successors.tolist()
+    to_move: list[int] = space.to_move.tolist()
+    terminal_outcomes: dict[int, Outcome] = {
+        EMPTY: (0.0, 0.0, 1.0),
+        X: (1.0, 0.0, 0.0),
+        O: (0.0, 1.0, 0.0),
+    }
+    memo: dict[int, Outcome] = {
+        index: terminal_outcomes[winner]
+        for index, winner in zip(
+            np.flatnonzero(space.terminal).tolist(),
+            space.winners[space.terminal].tolist(),
+        )
+    }
+
+    def solve(index: int) -> Outcome:
+        cached = memo.get(index)
+        if cached is not None:
+            return cached
+        moves = choose_moves(
+            PLAYER_OF_VALUE[to_move[index]],
+            state_ids[index],
+            list(CELLS_OF_MASK[legal_masks[index]]),
+        )
+        children = [solve(successors[index][move]) for move in moves]
+        prob = 1.0 / len(children)
+        outcome = (
+            prob * sum(child[0] for child in children),
+            prob * sum(child[1] for child in children),
+            prob * sum(child[2] for child in children),
+        )
+        memo[index] = outcome
+        return outcome
+
+    return solve(0)
+
+
+def play_greedy_batch(
+    agents: tuple[GreedyAgent, GreedyAgent],
+    num_games: int,
+    rng: np.random.Generator,
+    is_random_player: Callable[[Player], bool],
+    record_writer: Optional[GameRecordWriter] = None,
+) -> BatchedTicTacToe:
+    """Play ``num_games`` greedy games to the end and return the finished boards.
+
+    ``agents`` are the X and O players; a side for which ``is_random_player``
+    is true plays uniformly random legal moves instead.
+    """
+    env = BatchedTicTacToe(num_games, auto_reset=False)
+    moves = np.full((num_games, BOARD_SIZE), NO_MOVE, dtype=np.uint8)
+    for ply in range(BOARD_SIZE):
+        rows = np.flatnonzero(~env.done)
+        if not len(rows):
+            break
+        # 所有未结束的对局步数相同，轮到同一方落子
+        player = Player.PLAYER_X if ply % 2 == 0 else Player.PLAYER_O
+        if is_random_player(player):
+            actions = random_legal_actions(env.legal_masks()[rows], rng)
+        else:
+            agent = agents[0] if player == Player.PLAYER_X else agents[1]
+            actions = agent.choose_actions(
+                env.state_ids[rows], ActionPolicy.GREEDY, rng
+            )
+        env.step(actions, rows)
+        moves[rows, ply] = actions
+    if record_writer is not None:
+        random_x, random_o = (is_random_player(player) for player in Player)
+        snapshot_ids, epsilons = record_metadata(
+            None if random_x else agents[0], None if random_o else agents[1]
+        )
+        record_writer.write_many(
+            moves, env.winners.astype(np.uint8), snapshot_ids, epsilons
+        )
+    return env
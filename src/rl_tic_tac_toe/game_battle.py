@@ -1,14 +1,16 @@
 import time
+from typing import Optional
 
 from .action_policy import ActionPolicy
+from .compiled_policy import GreedyAgent
+from .game_record import GameRecordWriter, result_of
 from .player import Player
-from .q_learning_agent import QLearningAgent
 from .tic_tac_toe import TicTacToe
 
 
 class GameBattle:
     @staticmethod
-    def play_vs_ai(agent_x: QLearningAgent, agent_o: QLearningAgent) -> None:
+    def play_vs_ai(agent_x: GreedyAgent, agent_o: GreedyAgent) -> None:
         game = TicTacToe()
         player_letter: Player = ask_for_selecting_play_order()
         turn: Player = Player.PLAYER_X
@@ -21,9 +23,14 @@ class GameBattle:
         announce_game_result(game)
 
     @staticmethod
-    def ai_vs_ai(agent_x: QLearningAgent, agent_o: QLearningAgent) -> None:
+    def ai_vs_ai(
+        agent_x: GreedyAgent,
+        agent_o: GreedyAgent,
+        record_writer: Optional[GameRecordWriter] = None,
+    ) -> None:
         game = TicTacToe()
         turn = Player.PLAYER_X
+        moves: list[int] = []
         while game.has_empty_cell() and not game.current_winner:
             if turn == Player.PLAYER_X:
                 action = agent_x.choose_action(game, ActionPolicy.GREEDY)
@@ -31,11 +38,18 @@ class GameBattle:
             else:
                 action = agent_o.choose_action(game, ActionPolicy.GREEDY)
                 game.make_move(action, Player.PLAYER_O)
+            moves.append(action)
             print(f"AI '{turn}' 落子:")
             game.print_board()
             print("-" * 10)
             time.sleep(0.5)
             turn = turn.opponent()
+        if record_writer is not None:
+            record_writer.write(
+                moves,
+                result_of(game.current_winner),
+                (agent_x.snapshot_id, agent_o.snapshot_id),
+            )
         if game.current_winner:
             print(f"胜利者是 {game.current_winner}!")
         else:
@@ -57,7 +71,7 @@ def ask_for_selecting_play_order() -> Player:
 def play_turn(
     turn: Player,
     player_letter: Player,
-    agents: tuple[QLearningAgent, QLearningAgent],
+    agents: tuple[GreedyAgent, GreedyAgent],
     game: TicTacToe,
 ) -> None:
     """Plays a single turn between the human player and the AI."""
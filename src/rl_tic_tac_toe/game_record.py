@@ -0,0 +1,219 @@
+"""Compact binary game records.
+
+A record file starts with a 16-byte header (magic, format version, flags and
+record size) followed by fixed-width little-endian records, one per game:
+
+* ``moves``: the squares played, in order, padded with ``NO_MOVE``;
+* ``result``: ``EMPTY`` for a draw, otherwise the winner's cell value;
+* with ``FLAG_METADATA``, also ``snapshot_ids`` and ``epsilons`` of the X and
+  O players (``LIVE_AGENT_ID`` for a training agent, ``RANDOM_PLAYER_ID`` for
+  the random player, ``COMPILED_POLICY_ID`` for a compiled policy).
+
+Files are only ever appended to. The reader maps them with ``np.memmap`` so
+every field is a zero-copy view, whatever the number of games;
+``read_record_chunks`` streams them instead with one chunk in memory.
+"""
+
+import struct
+from pathlib import Path
+from types import TracebackType
+from typing import Iterator, Optional, Sequence
+
+import numpy as np
+import numpy.typing as npt
+
+from .batched_tic_tac_toe import EMPTY, VALUE_OF_PLAYER
+from .player import Player
+from .tic_tac_toe import BOARD_SIZE
+
+MAGIC = b"TTTR"
+FORMAT_VERSION = 1
+FLAG_METADATA = 1
+HEADER = struct.Struct("<4sHHH6x")
+NO_MOVE = 0xFF
+LIVE_AGENT_ID = 0
+RANDOM_PLAYER_ID = -1
+COMPILED_POLICY_ID = -2
+WRITE_BUFFER_GAMES = 4096
+
+RECORD_DTYPE = np.dtype([("moves", np.uint8, (BOARD_SIZE,)), ("result", np.uint8)])
+METADATA_RECORD_DTYPE = np.dtype(
+    RECORD_DTYPE.descr + [("snapshot_ids", "<i4", (2,)), ("epsilons", "<f4", (2,))]
+)
+
+
+class GameRecordFormatError(ValueError):
+    """Raised when a file is not a game-record file this version can use."""
+
+
+def result_of(winner: Optional[Player]) -> int:
+    """Result byte of a game won by ``winner``, or drawn if it is None."""
+    return EMPTY if winner is None else VALUE_OF_PLAYER[winner]
+
+
+def _record_dtype(flags: int) -> np.dtype[np.void]:
+    return METADATA_RECORD_DTYPE if flags & FLAG_METADATA else RECORD_DTYPE
+
+
+def _read_header(path: Path) -> int:
+    """Validate the header of ``path`` and return its flags."""
+    with open(path, "rb") as file:
+        header = file.read(HEADER.size)
+    if len(header) < HEADER.size:
+        raise GameRecordFormatError(f"{path}: truncated header")
+    magic, version, flags, record_size = HEADER.unpack(header)
+    if magic != MAGIC:
+        raise GameRecordFormatError(f"{path}: not a game-record file")
+    if version != FORMAT_VERSION:
+        raise GameRecordFormatError(f"{path}: unsupported version {version}")
+    if record_size != _record_dtype(flags).itemsize:
+        raise GameRecordFormatError(f"{path}: record size {record_size} mismatch")
+    return int(flags)
+
+
+def read_record_chunks(path: Path, chunk_games: int) -> Iterator[npt.NDArray[np.void]]:
+    """Read the records of ``path`` in order, at most ``chunk_games`` at a time."""
+    dtype = _record_dtype(_read_header(path))
+    chunk_bytes = chunk_games * dtype.itemsize
+    with open(path, "rb") as file:
+        file.seek(HEADER.size)
+        while True:
+            data = file.read(chunk_bytes)
+            count = len(data) // dtype.itemsize  # 忽略末尾不完整的记录
+            if count == 0:
+                return
+            yield np.frombuffer(data, dtype=dtype, count=count)
+
+
+class GameRecordWriter:
+    """Buffered, append-only writer of game records.
+
+    Games are collected in a preallocated array and written out
+    ``buffer_games`` at a time; call ``close`` (or use it as a context
+    manager) to write the rest.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        with_metadata: bool = False,
+        buffer_games: int = WRITE_BUFFER_GAMES,
+    ) -> None:
+        flags = FLAG_METADATA if with_metadata else 0
+        self._dtype = _record_dtype(flags)
+        if path.exists() and path.stat().st_size > 0:
+            if _read_header(path) != flags:
+                raise GameRecordFormatError(f"{path}: metadata flag mismatch")
+            # 丢弃上次异常退出时写了一半的记录
+            records_size = path.stat().st_size - HEADER.size
+            with open(path, "r+b") as file:
+                file.truncate(
+                    HEADER.size
+                    + records_size // self._dtype.itemsize * self._dtype.itemsize
+                )
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "wb") as file:
+                file.write(
+                    HEADER.pack(MAGIC, FORMAT_VERSION, flags, self._dtype.itemsize)
+                )
+        self.path = path
+        self.with_metadata = with_metadata
+        self._file = open(path, "ab")
+        self._buffer = np.zeros(buffer_games, dtype=self._dtype)
+        self._buffered = 0
+        self.games_written = 0
+
+    def __enter__(self) -> "GameRecordWriter":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+    def write(
+        self,
+        moves: Sequence[int],
+        result: int,
+        snapshot_ids: tuple[int, int] = (LIVE_AGENT_ID, LIVE_AGENT_ID),
+        epsilons: tuple[float, float] = (0.0, 0.0),
+    ) -> None:
+        """Append one game; the metadata is dropped if the file has none."""
+        padded = [*moves, *(NO_MOVE,) * (BOARD_SIZE - len(moves))]
+        if self.with_metadata:
+            self._buffer[self._buffered] = (padded, result, snapshot_ids, epsilons)
+        else:
+            self._buffer[self._buffered] = (padded, result)
+        self._buffered += 1
+        self.games_written += 1
+        if self._buffered == len(self._buffer):
+            self.flush()
+
+    def write_many(
+        self,
+        moves: npt.NDArray[np.uint8],
+        results: npt.NDArray[np.uint8],
+        snapshot_ids: tuple[int, int] = (LIVE_AGENT_ID, LIVE_AGENT_ID),
+        epsilons: tuple[float, float] = (0.0, 0.0),
+    ) -> None:
+        """Append a batch of games given as [N, 9] padded moves and N results."""
+        self.flush()
+        records = np.zeros(len(results), dtype=self._dtype)
+        records["moves"] = moves
+        records["result"] = results
+        if self.with_metadata:
+            records["snapshot_ids"] = snapshot_ids
+            records["epsilons"] = epsilons
+        self._file.write(records.data)
+        self.games_written += len(records)
+
+    def flush(self) -> None:
+        if self._buffered:
+            self._file.write(self._buffer[: self._buffered].data)
+            self._buffered = 0
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        self.flush()
+        self._file.close()
+
+
+class GameRecords:
+    """Memory-mapped, read-only view of a game-record file."""
+
+    def __init__(self, path: Path) -> None:
+        flags = _read_header(path)
+        dtype = _record_dtype(flags)
+        count = (path.stat().st_size - HEADER.size) // dtype.itemsize
+        self.path = path
+        self.has_metadata = bool(flags & FLAG_METADATA)
+        self.records: npt.NDArray[np.void] = (
+            np.memmap(path, dtype=dtype, mode="r", offset=HEADER.size, shape=(count,))
+            if count
+            else np.zeros(0, dtype=dtype)
+        )
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @property
+    def moves(self) -> npt.NDArray[np.uint8]:
+        """[N, 9] squares played, padded with ``NO_MOVE``."""
+        moves: npt.NDArray[np.uint8] = self.records["moves"]
+        return moves
+
+    @property
+    def results(self) -> npt.NDArray[np.uint8]:
+        results: npt.NDArray[np.uint8] = self.records["result"]
+        return results
+
+    def chunks(self, chunk_games: int) -> Iterator[npt.NDArray[np.void]]:
+        """Consecutive views of at most ``chunk_games`` records."""
+        for start in range(0, len(self.records), chunk_games):
+            yield self.records[start : start + chunk_games]
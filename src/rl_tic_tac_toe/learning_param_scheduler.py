@@ -1,16 +1,36 @@
-from enum import Enum, auto
-from math import pow
+from enum import Enum, auto, unique
+from math import cos, pi, pow
 from typing import Optional
 
+import numpy as np
+import numpy.typing as npt
 
+
+@unique
 class LearningParamSchedulerPolicy(Enum):
-    """Learning Parameter Scheduler Policy"""
+    """Learning Parameter Scheduler Policy
+
+    Each policy goes from ``start`` to ``min`` over ``episodes`` updates and
+    stays at ``min`` afterwards; ``decay`` is its rate.
+    """
+
+    EXPONENTIAL_DECAY = auto()  # multiplied by decay every episode
+    LINEAR = auto()  # decay subtracted every episode
+    COSINE = auto()  # half a cosine period; decay is unused
+    STEP = auto()  # multiplied by decay every step_episodes episodes
+    INVERSE_TIME = auto()  # start / (1 + decay * t) after t episodes
 
-    EXPONENTIAL_DECAY = auto()
+
+NUM_STEPS = 10  # STEP 策略默认的下降次数
 
 
 class LearningParamScheduler:
-    """Learning Parameter Scheduler"""
+    """Learning Parameter Scheduler
+
+    Values are computed in closed form from the episode index, so any
+    episode can be looked up in O(1) with ``value_at`` or many at once with
+    ``values``; ``update`` only records the value of the current episode.
+    """
 
     def __init__(
         self,
@@ -19,6 +39,7 @@ class LearningParamScheduler:
         min_value: float,
         decay_value: Optional[float] = None,
         policy: LearningParamSchedulerPolicy = LearningParamSchedulerPolicy.EXPONENTIAL_DECAY,
+        step_episodes: Optional[int] = None,
     ):
         assert isinstance(episodes, int) and episodes > 0
         self._episodes = episodes
@@ -27,10 +48,31 @@ class LearningParamScheduler:
         self._start = start_value
         assert isinstance(min_value, float) and 1.0 >= min_value >= 0.0
         self._min = min_value
-        assert (
-            isinstance(decay_value, float) and 1 >= decay_value > 0
-        ) or decay_value is None
-        self._decay = decay_value or pow(min_value / start_value, 1.0 / episodes)
+        assert step_episodes is None or step_episodes > 0
+        self._step = step_episodes or max(1, episodes // NUM_STEPS)
+        match policy:
+            case (
+                LearningParamSchedulerPolicy.EXPONENTIAL_DECAY
+                | LearningParamSchedulerPolicy.STEP
+            ):
+                assert (
+                    isinstance(decay_value, float) and 1 >= decay_value > 0
+                ) or decay_value is None
+            case LearningParamSchedulerPolicy.LINEAR:
+                assert (
+                    isinstance(decay_value, float) and decay_value > 0
+                ) or decay_value is None
+            case LearningParamSchedulerPolicy.INVERSE_TIME:
+                assert (isinstance(decay_value, float) and decay_value > 0) or (
+                    decay_value is None and min_value > 0
+                )
+            case LearningParamSchedulerPolicy.COSINE:
+                assert decay_value is None
+        # 以第 _origin 局结束时的值 _origin_value 为起点，compress 会移动起点
+        self._origin = 0
+        self._origin_value = start_value
+        self._span = episodes
+        self._decay = decay_value or self._default_decay()
         self._current = start_value
 
     @property
@@ -55,16 +97,90 @@ class LearningParamScheduler:
 
     @property
     def decay(self) -> float:
-        """Decay factor applied each update."""
+        """Decay rate of the policy; 0.0 for COSINE."""
         return self._decay
 
+    @property
+    def step_episodes(self) -> int:
+        """Episodes between two decays of the STEP policy."""
+        return self._step
+
     @property
     def current(self) -> float:
         """Current parameter value."""
         return self._current
 
+    def _default_decay(self) -> float:
+        """The rate that reaches the minimum after ``_span`` more episodes."""
+        value, span = self._origin_value, self._span
+        match self._policy:
+            case LearningParamSchedulerPolicy.EXPONENTIAL_DECAY:
+                return pow(self._min / value, 1.0 / span)
+            case LearningParamSchedulerPolicy.LINEAR:
+                return (value - self._min) / span
+            case LearningParamSchedulerPolicy.COSINE:
+                return 0.0
+            case LearningParamSchedulerPolicy.STEP:
+                return pow(self._min / value, 1.0 / max(1, span // self._step))
+            case LearningParamSchedulerPolicy.INVERSE_TIME:
+                return (value / self._min - 1.0) / span
+
+    def value_at(self, episode_idx: int) -> float:
+        """The value after the update of episode ``episode_idx``."""
+        elapsed = max(0, episode_idx + 1 - self._origin)
+        value = self._origin_value
+        match self._policy:
+            case LearningParamSchedulerPolicy.EXPONENTIAL_DECAY:
+                value *= pow(self._decay, elapsed)
+            case LearningParamSchedulerPolicy.LINEAR:
+                value -= self._decay * elapsed
+            case LearningParamSchedulerPolicy.COSINE:
+                progress = min(elapsed / self._span, 1.0)
+                value = self._min + (value - self._min) * (1 + cos(pi * progress)) / 2
+            case LearningParamSchedulerPolicy.STEP:
+                value *= pow(self._decay, elapsed // self._step)
+            case LearningParamSchedulerPolicy.INVERSE_TIME:
+                value /= 1.0 + self._decay * elapsed
+        return max(self._min, value)
+
+    def values(self, episode_indices: npt.NDArray[np.int64]) -> npt.NDArray[np.float64]:
+        """Vectorized ``value_at``."""
+        elapsed = np.maximum(0, episode_indices + 1 - self._origin)
+        value = self._origin_value
+        match self._policy:
+            case LearningParamSchedulerPolicy.EXPONENTIAL_DECAY:
+                values = value * np.power(self._decay, elapsed, dtype=np.float64)
+            case LearningParamSchedulerPolicy.LINEAR:
+                values = value - self._decay * elapsed
+            case LearningParamSchedulerPolicy.COSINE:
+                progress = np.minimum(elapsed / self._span, 1.0)
+                values = (
+                    self._min + (value - self._min) * (1 + np.cos(pi * progress)) / 2
+                )
+            case LearningParamSchedulerPolicy.STEP:
+                values = value * np.power(
+                    self._decay, elapsed // self._step, dtype=np.float64
+                )
+            case LearningParamSchedulerPolicy.INVERSE_TIME:
+                values = value / (1.0 + self._decay * elapsed)
+        return np.maximum(self._min, values)
+
+    def compress(self, episode: int, remaining_episodes: int) -> None:
+        """Reach the minimum ``remaining_episodes`` after ``episode`` episodes.
+
+        The schedule restarts from its value after ``episode`` episodes with
+        the rate that fits the shorter span. Earlier episodes are not kept:
+        their ``value_at`` becomes the value the schedule restarts from.
+        """
+        assert remaining_episodes > 0
+        self._origin_value = self.value_at(episode - 1)
+        self._origin = episode
+        self._span = remaining_episodes
+        self._step = max(1, min(self._step, remaining_episodes // NUM_STEPS))
+        if self._origin_value > self._min:
+            self._decay = self._default_decay()
+
     def update(self, episode_idx: int) -> float:
         """Update learning parameter and return new value."""
-        if self._policy == LearningParamSchedulerPolicy.EXPONENTIAL_DECAY:
-            self._current = max(self._min, self._current * self._decay)
+        self._current = self.value_at(episode_idx)
         return self._current
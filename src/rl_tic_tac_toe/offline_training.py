@@ -0,0 +1,130 @@
+"""Training from stored game records instead of live play.
+
+The pipeline is a chain of generators: record files are read chunk by chunk,
+each chunk is turned into the transitions of both sides with NumPy, and the
+transitions are applied to the agents. Only one chunk is in memory at a time,
+so memory use does not depend on the size of the dataset.
+
+Rewards follow the rules of ``training_episode.py``: every decision but the
+last two of a game gets a zero reward toward the position after the
+opponent's reply; the last move gets the win/draw reward and the move before
+it the loss/draw reward, both with no legal next actions.
+"""
+
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+import numpy.typing as npt
+
+from .batched_tic_tac_toe import (
+    EMPTY,
+    PLAYER_OF_VALUE,
+    STATE_ID_WEIGHT_ARRAY,
+    O,
+    X,
+    legal_masks_of_states,
+)
+from .batched_training_episode import TransitionBatch, apply_transition_batch
+from .game_record import NO_MOVE, read_record_chunks
+from .parallel_self_play import SelfPlayResult
+from .player import Player
+from .q_learning_agent import QLearningAgent
+from .tic_tac_toe import BOARD_SIZE
+from .training_episode import DRAW_GAME_REWARD, LOSER_REWARD, WINNER_REWARD
+
+OFFLINE_CHUNK_GAMES = 16384
+_PLIES = np.arange(BOARD_SIZE)
+# 第 ply 步落子一方的格子取值
+_MOVER_VALUES = np.where(_PLIES % 2 == 0, X, O)
+
+
+@dataclass(slots=True)
+class IngestStats:
+    games: int = 0
+    transitions: int = 0
+    seconds: float = 0.0
+
+    @property
+    def games_per_second(self) -> float:
+        return self.games / self.seconds if self.seconds else 0.0
+
+
+def stream_records(
+    paths: Iterable[Path], chunk_games: int = OFFLINE_CHUNK_GAMES
+) -> Iterator[npt.NDArray[np.void]]:
+    """Records of every file in turn, in chunks of at most ``chunk_games``."""
+    for path in paths:
+        yield from read_record_chunks(path, chunk_games)
+
+
+def transitions_of_records(records: npt.NDArray[np.void]) -> SelfPlayResult:
+    """Transitions of both sides of the recorded games, game by game."""
+    moves = records["moves"].astype(np.int64)
+    played = moves != NO_MOVE
+    deltas = np.where(
+        played, _MOVER_VALUES * STATE_ID_WEIGHT_ARRAY[np.where(played, moves, 0)], 0
+    )
+    after = np.cumsum(deltas, axis=1)  # 每步落子后的 state id
+    before = after - deltas
+    last = played.sum(axis=1)[:, None] - 1
+    final_state = np.take_along_axis(after, last, axis=1)
+    # 局中决策的下一个局面是对手应对之后的局面
+    reply_state = np.concatenate([after[:, 1:], after[:, -1:]], axis=1)
+
+    is_last = _PLIES == last
+    is_second_last = _PLIES == last - 1
+    ends = is_last | is_second_last
+    won = (records["result"] != EMPTY)[:, None]
+    rewards = np.zeros(moves.shape, dtype=np.float32)
+    rewards[is_last & won] = WINNER_REWARD
+    rewards[is_second_last & won] = LOSER_REWARD
+    rewards[ends & ~won] = DRAW_GAME_REWARD
+    next_states = np.where(ends, final_state, reply_state)
+
+    result: SelfPlayResult = {}
+    for side in range(2):
+        sel = played & (_PLIES % 2 == side)
+        if not sel.any():
+            continue
+        next_legal = legal_masks_of_states(next_states[sel])
+        next_legal[ends[sel]] = False
+        result[PLAYER_OF_VALUE[X + side]] = TransitionBatch(
+            before[sel], moves[sel], rewards[sel], next_states[sel], next_legal
+        )
+    return result
+
+
+def stream_transitions(
+    chunks: Iterable[npt.NDArray[np.void]],
+) -> Iterator[tuple[int, SelfPlayResult]]:
+    """(number of games, transitions) of every chunk of records."""
+    for records in chunks:
+        yield len(records), transitions_of_records(records)
+
+
+def train_from_records(
+    paths: Iterable[Path],
+    agent_x: Optional[QLearningAgent] = None,
+    agent_o: Optional[QLearningAgent] = None,
+    chunk_games: int = OFFLINE_CHUNK_GAMES,
+) -> IngestStats:
+    """Train the given agents on every recorded game of their side.
+
+    Each chunk is one ``update_q_table_batch`` per side, so its targets come
+    from the Q-values before the chunk.
+    """
+    agents = {Player.PLAYER_X: agent_x, Player.PLAYER_O: agent_o}
+    stats = IngestStats()
+    start = time.perf_counter()
+    for num_games, result in stream_transitions(stream_records(paths, chunk_games)):
+        for player, batch in result.items():
+            agent = agents[player]
+            if agent is not None:
+                apply_transition_batch(agent, batch)
+                stats.transitions += len(batch)
+        stats.games += num_games
+    stats.seconds = time.perf_counter() - start
+    return stats
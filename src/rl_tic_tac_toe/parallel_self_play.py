@@ -0,0 +1,131 @@
+"""Self-play generation in a pool of worker processes.
+
+Workers receive frozen copies of both policies and their own seeds, play
+epsilon-greedy games with ``play_self_play_batch`` and send back the
+transitions of each learning side. The main process applies them to the live
+agents in submission order, so a run is reproducible for a given seed and
+number of workers regardless of how the workers are scheduled.
+"""
+
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import get_context
+from types import TracebackType
+from typing import Optional
+
+import numpy as np
+import numpy.typing as npt
+
+from .batched_training_episode import (
+    TransitionBatch,
+    apply_transition_batch,
+    play_self_play_batch,
+)
+from .player import Player
+from .q_learning_agent import QLearningAgent
+
+SelfPlayResult = dict[Player, TransitionBatch]
+
+
+@dataclass(slots=True)
+class FrozenPolicy:
+    """Picklable read-only copy of an agent's policy, sent to a worker."""
+
+    snapshot: QLearningAgent
+    epsilon: float
+    learns: bool  # 是否需要把该方的转移发回主进程
+
+    @staticmethod
+    def of(agent: QLearningAgent) -> "FrozenPolicy":
+        if agent.is_snapshot:
+            return FrozenPolicy(agent, agent.epsilon, learns=False)
+        return FrozenPolicy(agent.snapshot(), agent.epsilon, learns=True)
+
+    def q_values(self, states: npt.NDArray[np.int64]) -> npt.NDArray[np.float32]:
+        return self.snapshot.q_values(states)
+
+
+def generate_self_play(
+    policy_x: FrozenPolicy,
+    policy_o: FrozenPolicy,
+    num_games: int,
+    seed: np.random.SeedSequence,
+    num_envs: Optional[int] = None,
+) -> SelfPlayResult:
+    """Play ``num_games`` games and return the transitions of the learning sides."""
+    collected: dict[Player, list[TransitionBatch]] = {
+        player: []
+        for player, policy in ((Player.PLAYER_X, policy_x), (Player.PLAYER_O, policy_o))
+        if policy.learns
+    }
+
+    def collect(player: Player, batch: TransitionBatch) -> None:
+        if player in collected:
+            collected[player].append(batch)
+
+    rng = np.random.default_rng(seed)
+    play_self_play_batch(policy_x, policy_o, num_games, rng, collect, num_envs)
+    return {
+        player: TransitionBatch.concatenate(batches)
+        for player, batches in collected.items()
+        if batches
+    }
+
+
+class SelfPlayWorkers:
+    """A process pool that plays self-play games for the live agents."""
+
+    def __init__(self, num_workers: int, seed: int) -> None:
+        assert num_workers >= 1
+        self.num_workers = num_workers
+        self._seeds = np.random.SeedSequence(seed)
+        # spawn 而非 fork：子进程不继承主进程的线程与锁状态
+        self._executor = ProcessPoolExecutor(
+            num_workers, mp_context=get_context("spawn")
+        )
+
+    def __enter__(self) -> "SelfPlayWorkers":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._executor.shutdown(cancel_futures=True)
+
+    def play(
+        self,
+        agent_x: QLearningAgent,
+        agent_o: QLearningAgent,
+        pairings: list[tuple[QLearningAgent, QLearningAgent]],
+        num_games: int,
+    ) -> None:
+        """Play ``num_games`` games split over the pairings, then train on them.
+
+        Each pairing becomes one worker task. ``agent_x`` and ``agent_o`` are
+        the live agents: their policy is frozen once for every task, and they
+        receive the transitions of the games in which they played.
+        """
+        live = {id(agent): FrozenPolicy.of(agent) for agent in (agent_x, agent_o)}
+        seeds = self._seeds.spawn(len(pairings))
+        futures: list[Future[SelfPlayResult]] = []
+        for task_idx, (playing_x, playing_o) in enumerate(pairings):
+            task_games = (num_games + task_idx) // len(pairings)
+            if task_games == 0:
+                continue
+            policy_x = live.get(id(playing_x)) or FrozenPolicy.of(playing_x)
+            policy_o = live.get(id(playing_o)) or FrozenPolicy.of(playing_o)
+            futures.append(
+                self._executor.submit(
+                    generate_self_play, policy_x, policy_o, task_games, seeds[task_idx]
+                )
+            )
+        agents = {Player.PLAYER_X: agent_x, Player.PLAYER_O: agent_o}
+        for future in futures:
+            for player, batch in future.result().items():
+                apply_transition_batch(agents[player], batch)
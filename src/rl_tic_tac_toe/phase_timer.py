@@ -0,0 +1,97 @@
+"""Cumulative timers and call counters for the phases of training.
+
+Instrumented code takes an optional ``PhaseTimer`` and only reads the clock
+when one is given, so leaving it out costs a single ``is None`` check per
+call site.
+"""
+
+import time
+from collections import deque
+from contextlib import contextmanager
+from enum import Enum, auto, unique
+from typing import Iterator
+
+THROUGHPUT_WINDOW = 256  # 计算吞吐量时保留的最近记录数
+
+
+@unique
+class Phase(Enum):
+    CHOOSE_ACTION = auto()  # picking moves, exploration included
+    UPDATE_Q_TABLE = auto()  # Q-learning updates, scalar or batched
+    SCHEDULER = auto()  # update_learning_params
+    EVALUATION = auto()  # evaluation games, or submitting them when async
+    SNAPSHOT = auto()  # taking snapshots and adding them to the pool
+    REPORTING = auto()  # printing reports
+    CHECKPOINT = auto()  # pickling checkpoints; the writes run in the background
+
+
+class PhaseTimer:
+    """Wall time and call count per phase, and recent episodes/s."""
+
+    __slots__ = ("_seconds", "_calls", "_start", "_marks")
+
+    def __init__(self, window: int = THROUGHPUT_WINDOW) -> None:
+        assert window >= 2  # noqa: PLR2004
+        self._seconds = [0.0] * len(Phase)
+        self._calls = [0] * len(Phase)
+        self._start = time.perf_counter()
+        # (时刻, 累计局数)，用于滑动窗口内的吞吐量
+        self._marks: deque[tuple[float, int]] = deque([(self._start, 0)], maxlen=window)
+
+    def add(self, phase: Phase, start: float) -> None:
+        """Charge the time since ``start`` (a ``perf_counter`` value) to ``phase``."""
+        index = phase.value - 1
+        self._seconds[index] += time.perf_counter() - start
+        self._calls[index] += 1
+
+    @contextmanager
+    def measure(self, phase: Phase) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(phase, start)
+
+    def seconds(self, phase: Phase) -> float:
+        return self._seconds[phase.value - 1]
+
+    def calls(self, phase: Phase) -> int:
+        return self._calls[phase.value - 1]
+
+    def count_episodes(self, num_episodes: int = 1) -> None:
+        """Record that ``num_episodes`` more episodes have finished."""
+        self._marks.append((time.perf_counter(), self.episodes + num_episodes))
+
+    @property
+    def episodes(self) -> int:
+        return self._marks[-1][1]
+
+    @property
+    def elapsed_seconds(self) -> float:
+        return time.perf_counter() - self._start
+
+    @property
+    def episodes_per_second(self) -> float:
+        """Throughput over the last ``window`` records of finished episodes."""
+        (first_time, first_episodes), (last_time, last_episodes) = (
+            self._marks[0],
+            self._marks[-1],
+        )
+        if last_time <= first_time:
+            return 0.0
+        return (last_episodes - first_episodes) / (last_time - first_time)
+
+    def report(self) -> None:
+        """Print the time breakdown by phase and the recent throughput."""
+        elapsed = self.elapsed_seconds
+        print(f"\n--- 各阶段耗时 (共 {elapsed:.2f} 秒, {self.episodes} 局) ---")
+        for phase in Phase:
+            seconds, calls = self.seconds(phase), self.calls(phase)
+            per_call_us = seconds / calls * 1e6 if calls else 0.0
+            print(
+                f"{phase.name:<15} {seconds:9.3f} 秒 ({seconds / elapsed:6.1%})"
+                f" {calls:>10} 次 {per_call_us:10.2f} µs/次"
+            )
+        other = elapsed - sum(self._seconds)
+        print(f"{'OTHER':<15} {other:9.3f} 秒 ({other / elapsed:6.1%})")
+        print(f"最近吞吐量: {self.episodes_per_second:,.0f} 局/秒")
@@ -1,11 +1,33 @@
 """A Tic-Tac-Toe Learning Agent by Q-learning algorithm."""
 
 import copy
+from dataclasses import dataclass
 from random import Random
+from typing import TYPE_CHECKING, Mapping, Optional
+
+import numpy as np
+import numpy.typing as npt
 
 from .action_policy import ActionPolicy
+from .batched_tic_tac_toe import (
+    epsilon_greedy_actions,
+    legal_masks_of_states,
+    masked_greedy_actions,
+    random_legal_actions,
+)
 from .player import Player
-from .tic_tac_toe import TicTacToe
+from .q_table import QTable, QTableBackend, make_q_table
+from .symmetry import (
+    ACTION_FROM_CANONICAL,
+    ACTION_TO_CANONICAL,
+    ACTION_TO_CANONICAL_ARRAY,
+    canonicalize,
+    canonicalize_many,
+)
+from .tic_tac_toe import BOARD_SIZE, TicTacToe, encode_board
+
+if TYPE_CHECKING:  # replay_buffer 依赖 batched_training_episode，后者又依赖本模块
+    from .replay_buffer import ReplayBuffer
 
 
 class ImmutableSnapshotError(Exception):
@@ -16,6 +38,26 @@ class ImmutableSnapshotError(Exception):
         super().__init__(self.message)
 
 
+@dataclass(slots=True)
+class UpdateStats:
+    """Sizes of the Q-value changes made since the stats were last taken."""
+
+    num_updates: int = 0
+    max_abs_delta: float = 0.0
+    sum_abs_delta: float = 0.0
+
+    @property
+    def mean_abs_delta(self) -> float:
+        return self.sum_abs_delta / self.num_updates if self.num_updates else 0.0
+
+    def merge(self, other: "UpdateStats") -> "UpdateStats":
+        return UpdateStats(
+            self.num_updates + other.num_updates,
+            max(self.max_abs_delta, other.max_abs_delta),
+            self.sum_abs_delta + other.sum_abs_delta,
+        )
+
+
 class QLearningAgent:
     """A Tic-Tac-Toe Learning Agent by Q-learning algorithm."""
 
@@ -26,9 +68,15 @@ class QLearningAgent:
         epsilon: float = 1.0,
         gamma: float = 0.9,
         rng: Random = Random(0),
+        backend: QTableBackend = QTableBackend.DICT,
+        use_symmetry: bool = False,
+        replay_buffer: Optional["ReplayBuffer"] = None,
+        replay_updates: int = 0,
     ):
         self._player: Player = player
-        self._q_table: dict[str, dict[int, float]] = {}
+        self._backend = backend
+        self._use_symmetry = use_symmetry
+        self._q_table: QTable = make_q_table(backend)
         assert isinstance(alpha, float) and (1.0 >= alpha >= 0)
         self._alpha = alpha
         assert isinstance(gamma, float) and (1.0 >= gamma >= 0)
@@ -37,6 +85,16 @@ class QLearningAgent:
         self._epsilon = epsilon
         self._rng = rng
         self._is_snapshot = False
+        self._snapshot_id = 0  # 0 为训练中的代理，快照从 1 开始编号
+        self._num_snapshots = 0
+        # 每条真实转移之后，从缓冲区采样 replay_updates 条再更新一次
+        assert replay_updates >= 0 and (replay_buffer is not None or not replay_updates)
+        self._replay_buffer = replay_buffer
+        self._replay_updates = replay_updates
+        # 自上次 take_update_stats 以来 Q 值变化量 |ΔQ| 的统计
+        self._num_updates = 0
+        self._max_abs_delta = 0.0
+        self._sum_abs_delta = 0.0
 
     @property
     def player(self) -> Player:
@@ -90,13 +148,72 @@ class QLearningAgent:
     def is_snapshot(self) -> bool:
         return self._is_snapshot
 
-    def get_state(self, game: TicTacToe) -> str:
-        """Converts the current board state into a string representation."""
-        return "".join(game.board)
+    @property
+    def snapshot_id(self) -> int:
+        """0 for a live agent, otherwise the sequence number of the snapshot."""
+        return self._snapshot_id
+
+    @property
+    def backend(self) -> QTableBackend:
+        return self._backend
+
+    @property
+    def use_symmetry(self) -> bool:
+        """Whether symmetric positions share one canonical Q-table entry."""
+        return self._use_symmetry
+
+    @property
+    def q_table(self) -> QTable:
+        return self._q_table
+
+    @property
+    def replay_buffer(self) -> Optional["ReplayBuffer"]:
+        return self._replay_buffer
+
+    @property
+    def replay_updates(self) -> int:
+        """Replayed updates made per real transition."""
+        return self._replay_updates
+
+    def load_q_table(self, q_table: Mapping[int | str, Mapping[int, float]]) -> None:
+        """Replace the Q-table, converting legacy board-string keys to state ids."""
+        if self.is_snapshot:
+            raise ImmutableSnapshotError()
+        self._q_table = make_q_table(self._backend)
+        for state, row in q_table.items():
+            state_id = encode_board(state) if isinstance(state, str) else state
+            for action, value in row.items():
+                self._set_q_value(state_id, action, value)
+
+    def attach_q_table(self, q_table: QTable) -> None:
+        """Use the given table as is, e.g. one backed by shared memory."""
+        if self.is_snapshot:
+            raise ImmutableSnapshotError()
+        self._q_table = q_table
+
+    def get_state(self, game: TicTacToe) -> int:
+        """Returns the integer state id of the current board."""
+        return game.state_id
 
-    def get_q_value(self, state: str, action: int) -> float:
+    def get_q_value(self, state: int, action: int) -> float:
         """Retrieves the Q-value for a given state-action pair from the Q-table."""
-        return self._q_table.get(state, {}).get(action, 0.0)
+        if self._use_symmetry:
+            state, symmetry = canonicalize(state)
+            action = ACTION_TO_CANONICAL[symmetry][action]
+        return self._q_table.get(state, action)
+
+    def _set_q_value(self, state: int, action: int, value: float) -> None:
+        if self._use_symmetry:
+            state, symmetry = canonicalize(state)
+            action = ACTION_TO_CANONICAL[symmetry][action]
+        self._q_table.set(state, action, value)
+
+    def _max_q_value(self, state: int, actions: list[int]) -> float:
+        if self._use_symmetry and actions:
+            state, symmetry = canonicalize(state)
+            to_canonical = ACTION_TO_CANONICAL[symmetry]
+            actions = [to_canonical[action] for action in actions]
+        return self._q_table.max_value(state, actions)
 
     def choose_action(self, game: TicTacToe, policy: ActionPolicy) -> int:
         """Select an action based on the current state and Q-values."""
@@ -114,11 +231,42 @@ class QLearningAgent:
         available = game.empty_cells()
         if not available:
             return self.choose_action_full_exploration(game)
-        state = self.get_state(game)
-        move_q_pairs = [(move, self.get_q_value(state, move)) for move in available]
-        max_q = max(q for _, q in move_q_pairs)
-        best_moves = [move for move, q in move_q_pairs if q == max_q]
-        return self.rng.choice(best_moves)
+        return self.rng.choice(self.best_actions(self.get_state(game), available))
+
+    def best_actions(self, state: int, actions: list[int]) -> list[int]:
+        """The actions, among the given legal ones, with the highest Q-value."""
+        if not self._use_symmetry:
+            return self._q_table.best_actions(state, actions)
+        # 在规范棋盘上选出最优动作，再映射回实际棋盘
+        canonical_state, symmetry = canonicalize(state)
+        to_canonical = ACTION_TO_CANONICAL[symmetry]
+        from_canonical = ACTION_FROM_CANONICAL[symmetry]
+        best_moves = self._q_table.best_actions(
+            canonical_state, [to_canonical[move] for move in actions]
+        )
+        return [from_canonical[move] for move in best_moves]
+
+    def choose_actions(
+        self,
+        states: npt.NDArray[np.int64],
+        policy: ActionPolicy,
+        rng: np.random.Generator,
+    ) -> npt.NDArray[np.int64]:
+        """Vectorized ``choose_action``: one legal action per state id.
+
+        Ties and exploration are drawn from ``rng`` per row. States must not
+        be terminal.
+        """
+        legal = legal_masks_of_states(states)
+        match policy:
+            case ActionPolicy.GREEDY:
+                return masked_greedy_actions(self.q_values(states), legal, rng)
+            case ActionPolicy.EPSILON_GREEDY:
+                return epsilon_greedy_actions(
+                    self.q_values(states), legal, self.epsilon, rng
+                )
+            case ActionPolicy.FULL_EXPLORATION:
+                return random_legal_actions(legal, rng)
 
     def choose_action_full_exploration(self, game: TicTacToe) -> int:
         available = game.empty_cells()
@@ -126,28 +274,134 @@ class QLearningAgent:
 
     def update_q_table(
         self,
-        state: str,
+        state: int,
         action: int,
         reward: float,
-        next_state: str,
+        next_state: int,
         next_actions: list[int],
     ) -> None:
         """Updates the Q-value for a given state-action pair based on the reward and next state's maximum Q-value."""
         if self.is_snapshot:
             raise ImmutableSnapshotError()
         old_q = self.get_q_value(state, action)
-        next_max_q = 0.0
-        if next_actions:
-            next_qs = (self.get_q_value(next_state, move) for move in next_actions)
-            next_max_q = max(next_qs, default=0.0)
+        next_max_q = self._max_q_value(next_state, next_actions)
         new_q = old_q + self.alpha * (reward + self.gamma * next_max_q - old_q)
-        if state not in self._q_table:
-            self._q_table[state] = {}
-        self._q_table[state][action] = new_q
+        self._set_q_value(state, action, new_q)
+        delta = abs(new_q - old_q)
+        self._num_updates += 1
+        self._sum_abs_delta += delta
+        if delta > self._max_abs_delta:
+            self._max_abs_delta = delta
+        if self._replay_buffer is not None:
+            self._replay_buffer.add(state, action, reward, next_state, next_actions)
+            self._replay(1)
+
+    def q_values(self, states: npt.NDArray[np.int64]) -> npt.NDArray[np.float32]:
+        """Q-values of all nine actions for each state id, shape [N, 9]."""
+        if not self._use_symmetry:
+            return self._q_table.rows(states)
+        canonical_states, symmetries = canonicalize_many(states)
+        rows = self._q_table.rows(canonical_states)
+        # q[n, a] = rows[n, 动作 a 在规范棋盘上的位置]
+        return np.take_along_axis(rows, ACTION_TO_CANONICAL_ARRAY[symmetries], axis=1)
+
+    def update_q_table_batch(
+        self,
+        states: npt.NDArray[np.int64],
+        actions: npt.NDArray[np.int64],
+        rewards: npt.NDArray[np.float32],
+        next_states: npt.NDArray[np.int64],
+        next_legal_masks: npt.NDArray[np.bool_],
+    ) -> None:
+        """Apply a batch of transitions in one vectorized Q-learning update.
+
+        Targets are computed from the Q-values before the batch. Transitions
+        sharing a (state, action) pair are folded in batch order, giving the
+        same result as applying them one by one toward those targets.
+        """
+        if self.is_snapshot:
+            raise ImmutableSnapshotError()
+        self._apply_batch(states, actions, rewards, next_states, next_legal_masks)
+        if self._replay_buffer is not None:
+            self._replay_buffer.add_batch(
+                states, actions, rewards, next_states, next_legal_masks
+            )
+            self._replay(len(states))
+
+    def _replay(self, num_transitions: int) -> None:
+        """Replay ``replay_updates`` sampled transitions per real one."""
+        assert self._replay_buffer is not None
+        if not self._replay_updates:
+            return
+        batch = self._replay_buffer.sample(num_transitions * self._replay_updates)
+        self._apply_batch(
+            batch.states,
+            batch.actions,
+            batch.rewards,
+            batch.next_states,
+            batch.next_legal_masks,
+        )
+
+    def _apply_batch(
+        self,
+        states: npt.NDArray[np.int64],
+        actions: npt.NDArray[np.int64],
+        rewards: npt.NDArray[np.float32],
+        next_states: npt.NDArray[np.int64],
+        next_legal_masks: npt.NDArray[np.bool_],
+    ) -> None:
+        if len(states) == 0:
+            return
+        next_qs = np.where(next_legal_masks, self.q_values(next_states), -np.inf)
+        next_max_q = np.where(next_legal_masks.any(axis=1), next_qs.max(axis=1), 0.0)
+        targets = rewards + self.gamma * next_max_q
+        if self._use_symmetry:
+            states, symmetries = canonicalize_many(states)
+            actions = ACTION_TO_CANONICAL_ARRAY[symmetries, actions]
+
+        keys = states * BOARD_SIZE + actions
+        order = np.argsort(keys, kind="stable")
+        unique_keys, first, counts = np.unique(
+            keys[order], return_index=True, return_counts=True
+        )
+        group = np.repeat(np.arange(len(unique_keys)), counts)
+        # 同组第 j 次更新（共 k 次）在最终值中的权重为 alpha * (1 - alpha)^(k - j)
+        steps_to_end = (first + counts)[group] - 1 - np.arange(len(keys))
+        decay = 1.0 - self.alpha
+        weighted = self.alpha * decay**steps_to_end * targets[order]
+        unique_states, unique_actions = np.divmod(unique_keys, BOARD_SIZE)
+        old_q = self._q_table.rows(unique_states)[
+            np.arange(len(unique_keys)), unique_actions
+        ]
+        new_q = decay**counts * old_q + np.bincount(group, weights=weighted)
+        self._q_table.set_many(unique_states, unique_actions, new_q.astype(np.float32))
+        # 同一 (状态, 动作) 在批内的多次更新按一次净变化计
+        deltas = np.abs(new_q - old_q)
+        self._num_updates += len(deltas)
+        self._sum_abs_delta += float(deltas.sum())
+        self._max_abs_delta = max(self._max_abs_delta, float(deltas.max()))
+
+    def take_update_stats(self) -> UpdateStats:
+        """The |ΔQ| stats of the updates since the last call, then reset them."""
+        stats = UpdateStats(self._num_updates, self._max_abs_delta, self._sum_abs_delta)
+        self._num_updates = 0
+        self._max_abs_delta = 0.0
+        self._sum_abs_delta = 0.0
+        return stats
 
     def snapshot(self) -> "QLearningAgent":
-        """Creates a snapshot of the agent with exploration disabled."""
-        snapshot = copy.deepcopy(self)
+        """Creates a snapshot of the agent with exploration disabled.
+
+        The snapshot holds a frozen copy of the Q-table that shares storage
+        with the live table where the backend allows it.
+        """
+        self._num_snapshots += 1
+        snapshot = copy.copy(self)
+        snapshot._snapshot_id = self._num_snapshots
+        snapshot._replay_buffer = None  # 快照不学习，也不持有缓冲区
+        snapshot._replay_updates = 0
+        snapshot._q_table = self._q_table.frozen_copy()
+        snapshot._rng = copy.deepcopy(self._rng)
         snapshot._epsilon = 0  # 快照不进行探索
         snapshot._is_snapshot = True
         return snapshot
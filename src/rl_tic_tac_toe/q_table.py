@@ -0,0 +1,343 @@
+"""Q-table storage backends for QLearningAgent."""
+
+import sys
+from enum import Enum, auto, unique
+from typing import Callable, Iterator, Protocol, Sequence
+
+import numpy as np
+import numpy.typing as npt
+
+from .tic_tac_toe import BOARD_SIZE, NUM_STATE_IDS
+
+
+@unique
+class QTableBackend(Enum):
+    DICT = auto()  # nested dicts, only visited states allocated
+    DENSE = auto()  # preallocated float32 array indexed by state id
+
+
+class QTable(Protocol):
+    """Storage of Q-values keyed by (state id, action)."""
+
+    def __len__(self) -> int:
+        """Number of states with at least one stored Q-value."""
+        ...
+
+    def __iter__(self) -> Iterator[int]:
+        """Iterate over the state ids with stored Q-values."""
+        ...
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the table, in bytes."""
+        ...
+
+    def get(self, state: int, action: int) -> float: ...
+
+    def set(self, state: int, action: int, value: float) -> None: ...
+
+    def max_value(self, state: int, actions: Sequence[int]) -> float:
+        """Maximum Q-value over the given actions, 0.0 if there are none."""
+        ...
+
+    def best_actions(self, state: int, actions: Sequence[int]) -> list[int]:
+        """Actions among the given ones that share the maximum Q-value."""
+        ...
+
+    def rows(self, states: npt.NDArray[np.int64]) -> npt.NDArray[np.float32]:
+        """Q-values of all nine actions for each state, shape [N, 9]."""
+        ...
+
+    def set_many(
+        self,
+        states: npt.NDArray[np.int64],
+        actions: npt.NDArray[np.int64],
+        values: npt.NDArray[np.float32],
+    ) -> None:
+        """Store values for distinct (state, action) pairs."""
+        ...
+
+    def frozen_copy(self) -> "QTable":
+        """Read-only copy of the current values; writes to it raise ValueError.
+
+        The copy may share storage with this table, so it is cheap to take
+        even when the table is large.
+        """
+        ...
+
+
+class DictQTable:
+    """Q-table stored as ``{state: {action: value}}``.
+
+    Frozen copies share the row dicts with the table they were taken from.
+    The live table copies a shared row the first time it writes to it, so
+    taking a copy costs one dict of references and later memory grows only
+    with the rows that actually change.
+
+    ``rows`` reads from an array mirror of the visited rows, sorted by state
+    id, so batch lookups are NumPy gathers. Only the rows written since the
+    previous batch lookup are copied into it, and a frozen copy takes the
+    mirror over together with the rows.
+    """
+
+    __slots__ = (
+        "_rows",
+        "_owned",
+        "_frozen",
+        "_mirror_states",
+        "_mirror_values",
+        "_stale",
+        "_owns_mirror",
+    )
+
+    def __init__(self) -> None:
+        self._rows: dict[int, dict[int, float]] = {}
+        # 本表独占、可以原地修改的行；其余的行与冻结副本共享
+        self._owned: set[int] = set()
+        self._frozen = False
+        # rows() 使用的数组镜像：按状态排序的状态 id 与对应的 Q 值行。
+        # 镜像数组只整体替换、不原地修改，因此可以与冻结副本共享
+        self._mirror_states: npt.NDArray[np.int64] = np.zeros(0, dtype=np.int64)
+        self._mirror_values: npt.NDArray[np.float32] = np.zeros(
+            (0, BOARD_SIZE), dtype=np.float32
+        )
+        # 上次刷新镜像后写过的状态
+        self._stale: set[int] = set()
+        self._owns_mirror = True
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._rows)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory of the table and of the rows it owns.
+
+        Every row is counted by exactly one table: the one that allocated it,
+        or the frozen copy it was handed to.
+        """
+        rows = self._rows
+        mirror = (
+            self._mirror_states.nbytes + self._mirror_values.nbytes
+            if self._owns_mirror
+            else 0
+        )
+        return (
+            sys.getsizeof(rows)
+            + sum(
+                sys.getsizeof(rows[state]) + len(rows[state]) * sys.getsizeof(0.0)
+                for state in self._owned
+            )
+            + mirror
+        )
+
+    def get(self, state: int, action: int) -> float:
+        row = self._rows.get(state)
+        if row is None:
+            return 0.0
+        return row.get(action, 0.0)
+
+    def set(self, state: int, action: int, value: float) -> None:
+        if self._frozen:
+            raise ValueError("Q-table is read-only")
+        row = self._rows.get(state)
+        if row is None:
+            row = self._rows[state] = {}
+            self._owned.add(state)
+        elif state not in self._owned:
+            row = self._rows[state] = dict(row)  # 写时复制共享行
+            self._owned.add(state)
+        row[action] = value
+        self._stale.add(state)
+
+    def max_value(self, state: int, actions: Sequence[int]) -> float:
+        if not actions:
+            return 0.0
+        row = self._rows.get(state)
+        if row is None:
+            return 0.0
+        return max(row.get(action, 0.0) for action in actions)
+
+    def best_actions(self, state: int, actions: Sequence[int]) -> list[int]:
+        row = self._rows.get(state)
+        if row is None:
+            return list(actions)
+        qs = [row.get(action, 0.0) for action in actions]
+        max_q = max(qs)
+        return [action for action, q in zip(actions, qs) if q == max_q]
+
+    def rows(self, states: npt.NDArray[np.int64]) -> npt.NDArray[np.float32]:
+        self._refresh_mirror()
+        mirror_states, mirror_values = self._mirror_states, self._mirror_values
+        if not len(mirror_states):
+            return np.zeros((len(states), BOARD_SIZE), dtype=np.float32)
+        index = np.searchsorted(mirror_states, states)
+        np.minimum(index, len(mirror_states) - 1, out=index)
+        found = mirror_states[index] == states
+        result: npt.NDArray[np.float32] = np.where(
+            found[:, None], mirror_values[index], np.float32(0.0)
+        )
+        return result
+
+    def _refresh_mirror(self) -> None:
+        """Copy the rows written since the last refresh into the mirror."""
+        if not self._stale:
+            return
+        stale = np.fromiter(self._stale, dtype=np.int64, count=len(self._stale))
+        stale.sort()
+        self._stale = set()
+        values = np.zeros((len(stale), BOARD_SIZE), dtype=np.float32)
+        for i, state in enumerate(stale.tolist()):
+            row = self._rows[state]
+            values[i, list(row)] = list(row.values())
+        # 去掉旧镜像中被改写的行，再与新行合并、按状态重新排序
+        kept = ~np.isin(self._mirror_states, stale, assume_unique=True)
+        mirror_states = np.concatenate((self._mirror_states[kept], stale))
+        order = np.argsort(mirror_states, kind="stable")
+        self._mirror_states = mirror_states[order]
+        self._mirror_values = np.concatenate((self._mirror_values[kept], values))[order]
+        self._owns_mirror = True
+
+    def set_many(
+        self,
+        states: npt.NDArray[np.int64],
+        actions: npt.NDArray[np.int64],
+        values: npt.NDArray[np.float32],
+    ) -> None:
+        for state, action, value in zip(
+            states.tolist(), actions.tolist(), values.tolist()
+        ):
+            self.set(state, action, value)
+
+    def frozen_copy(self) -> "DictQTable":
+        copy = DictQTable()
+        copy._rows = dict(self._rows)
+        # 已有的行交给副本记账，本表之后写入时再复制
+        copy._owned, self._owned = self._owned, set()
+        copy._frozen = True
+        # 镜像同样交给副本记账，本表下次刷新时生成新的数组
+        copy._mirror_states = self._mirror_states
+        copy._mirror_values = self._mirror_values
+        copy._stale = set(self._stale)
+        self._owns_mirror = False
+        return copy
+
+
+class DenseQTable:
+    """Q-table stored as a preallocated ``float32`` array of shape [states, 9].
+
+    Values are rounded to ``float32`` when stored, so the same updates leave
+    the dense and dict tables a few ulps apart and a near-tie may break
+    differently. Both are equally fast for single-state lookups; the dense
+    table is the one the batched and shared-memory paths need.
+
+    A frozen copy is a single buffer copy of the array, marked non-writeable.
+    """
+
+    __slots__ = ("_values", "_visited")
+
+    def __init__(self, num_states: int = NUM_STATE_IDS) -> None:
+        self._values: npt.NDArray[np.float32] = np.zeros(
+            (num_states, BOARD_SIZE), dtype=np.float32
+        )
+        self._visited: npt.NDArray[np.bool_] = np.zeros(num_states, dtype=np.bool_)
+
+    @staticmethod
+    def from_arrays(
+        values: npt.NDArray[np.float32], visited: npt.NDArray[np.bool_]
+    ) -> "DenseQTable":
+        """Wrap existing arrays, e.g. views of shared memory, without copying."""
+        assert values.shape == (len(visited), BOARD_SIZE)
+        table = DenseQTable.__new__(DenseQTable)
+        table._values = values
+        table._visited = visited
+        return table
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self._visited))
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(np.flatnonzero(self._visited).tolist())
+
+    @property
+    def nbytes(self) -> int:
+        return self._values.nbytes + self._visited.nbytes
+
+    @property
+    def values(self) -> npt.NDArray[np.float32]:
+        """The underlying [states, 9] array of Q-values."""
+        return self._values
+
+    @property
+    def visited(self) -> npt.NDArray[np.bool_]:
+        """The underlying per-state flag of stored Q-values."""
+        return self._visited
+
+    def get(self, state: int, action: int) -> float:
+        return float(self._values[state, action])
+
+    def set(self, state: int, action: int, value: float) -> None:
+        self._values[state, action] = value
+        self._visited[state] = True
+
+    # 单行只有 9 个元素，numpy 的调用开销远大于计算本身：
+    # 未访问的行全为 0，直接返回；否则整行一次性转成 list 后在 Python 里
+    # 做掩码 max/argmax。
+    def max_value(self, state: int, actions: Sequence[int]) -> float:
+        if not actions or not self._visited[state]:
+            return 0.0
+        row: list[float] = self._values[state].tolist()
+        return max([row[action] for action in actions])
+
+    def best_actions(self, state: int, actions: Sequence[int]) -> list[int]:
+        if not self._visited[state]:
+            return list(actions)
+        row: list[float] = self._values[state].tolist()
+        max_q = max([row[action] for action in actions])
+        return [action for action in actions if row[action] == max_q]
+
+    def rows(self, states: npt.NDArray[np.int64]) -> npt.NDArray[np.float32]:
+        return self._values[states]
+
+    def set_many(
+        self,
+        states: npt.NDArray[np.int64],
+        actions: npt.NDArray[np.int64],
+        values: npt.NDArray[np.float32],
+    ) -> None:
+        self._values[states, actions] = values
+        self._visited[states] = True
+
+    def frozen_copy(self) -> "DenseQTable":
+        copy = DenseQTable.from_arrays(self._values.copy(), self._visited.copy())
+        copy._values.flags.writeable = False
+        copy._visited.flags.writeable = False
+        return copy
+
+    def __reduce__(
+        self,
+    ) -> tuple[Callable[..., "DenseQTable"], tuple[object, ...]]:
+        # pickle 不保留数组的只读标记，冻结的副本在加载后重新冻结
+        frozen = not self._values.flags.writeable
+        return _unpickle_dense_q_table, (self._values, self._visited, frozen)
+
+
+def _unpickle_dense_q_table(
+    values: npt.NDArray[np.float32], visited: npt.NDArray[np.bool_], frozen: bool
+) -> DenseQTable:
+    table = DenseQTable.from_arrays(values, visited)
+    if frozen:
+        values.flags.writeable = False
+        visited.flags.writeable = False
+    return table
+
+
+def make_q_table(backend: QTableBackend) -> QTable:
+    """Create an empty Q-table for the given backend."""
+    match backend:
+        case QTableBackend.DICT:
+            return DictQTable()
+        case QTableBackend.DENSE:
+            return DenseQTable()
@@ -0,0 +1,117 @@
+"""Experience replay for QLearningAgent.
+
+Transitions are kept in a fixed-capacity ring buffer of NumPy columns; once
+full, each new transition overwrites the oldest one. Legal next actions are
+stored as 9-bit masks, so a transition takes 16 bytes.
+"""
+
+from typing import Optional
+
+import numpy as np
+import numpy.typing as npt
+
+from .batched_training_episode import TransitionBatch
+from .tic_tac_toe import BOARD_SIZE
+
+_SQUARE_BITS = np.arange(BOARD_SIZE, dtype=np.uint16)
+
+
+class ReplayBuffer:
+    """Fixed-capacity ring buffer of transitions with uniform sampling."""
+
+    def __init__(
+        self, capacity: int, rng: Optional[np.random.Generator] = None
+    ) -> None:
+        assert capacity >= 1
+        self._capacity = capacity
+        self._rng = rng or np.random.default_rng(0)
+        self._states = np.zeros(capacity, dtype=np.int32)
+        self._actions = np.zeros(capacity, dtype=np.uint8)
+        self._rewards = np.zeros(capacity, dtype=np.float32)
+        self._next_states = np.zeros(capacity, dtype=np.int32)
+        self._next_legal_masks = np.zeros(capacity, dtype=np.uint16)
+        self._dones = np.zeros(capacity, dtype=np.bool_)
+        self._next = 0  # 下一个写入位置
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def nbytes(self) -> int:
+        return sum(
+            column.nbytes
+            for column in (
+                self._states,
+                self._actions,
+                self._rewards,
+                self._next_states,
+                self._next_legal_masks,
+                self._dones,
+            )
+        )
+
+    def add(
+        self,
+        state: int,
+        action: int,
+        reward: float,
+        next_state: int,
+        next_actions: list[int],
+    ) -> None:
+        """Store one transition; no next actions means the game is over."""
+        i = self._next
+        self._states[i] = state
+        self._actions[i] = action
+        self._rewards[i] = reward
+        self._next_states[i] = next_state
+        self._next_legal_masks[i] = sum(1 << move for move in next_actions)
+        self._dones[i] = not next_actions
+        self._next = (i + 1) % self._capacity
+        self._size = min(self._size + 1, self._capacity)
+
+    def add_batch(
+        self,
+        states: npt.NDArray[np.int64],
+        actions: npt.NDArray[np.int64],
+        rewards: npt.NDArray[np.float32],
+        next_states: npt.NDArray[np.int64],
+        next_legal_masks: npt.NDArray[np.bool_],
+    ) -> None:
+        """Store a batch of transitions, in order."""
+        keep = slice(max(0, len(states) - self._capacity), len(states))
+        count = keep.stop - keep.start  # 超出容量时只有最后 capacity 条会留下
+        if count == 0:
+            return
+        rows = (self._next + np.arange(count)) % self._capacity
+        masks = (next_legal_masks[keep].astype(np.uint16) << _SQUARE_BITS).sum(
+            axis=1, dtype=np.uint16
+        )
+        self._states[rows] = states[keep]
+        self._actions[rows] = actions[keep]
+        self._rewards[rows] = rewards[keep]
+        self._next_states[rows] = next_states[keep]
+        self._next_legal_masks[rows] = masks
+        self._dones[rows] = masks == 0
+        self._next = int(rows[-1] + 1) % self._capacity
+        self._size = min(self._size + count, self._capacity)
+
+    def sample(self, batch_size: int) -> TransitionBatch:
+        """Draw ``batch_size`` stored transitions uniformly, with replacement."""
+        assert self._size > 0
+        rows = self._rng.integers(0, self._size, batch_size)
+        next_legal: npt.NDArray[np.bool_] = (
+            (self._next_legal_masks[rows, None] >> _SQUARE_BITS) & 1
+        ).astype(np.bool_)
+        next_legal[self._dones[rows]] = False
+        return TransitionBatch(
+            self._states[rows].astype(np.int64),
+            self._actions[rows].astype(np.int64),
+            self._rewards[rows],
+            self._next_states[rows].astype(np.int64),
+            next_legal,
+        )
@@ -1,8 +1,158 @@
-from typing import TypedDict
+"""Bounded pool of historical agent snapshots used as training opponents.
 
+Each side keeps at most ``capacity`` snapshots. A new snapshot whose greedy
+policy is identical to the latest one of its side is skipped; when the side is
+full, the eviction policy decides which snapshot makes room for it.
+"""
+
+from enum import Enum, auto, unique
+from functools import cache
+from random import Random
+from typing import Iterable, Optional
+
+import numpy as np
+import numpy.typing as npt
+
+from .batched_tic_tac_toe import legal_masks_of_states
+from .player import Player
 from .q_learning_agent import QLearningAgent
+from .state_space import get_state_space
+
+SNAPSHOT_POOL_CAPACITY = 10
+
+
+@unique
+class EvictionPolicy(Enum):
+    FIFO = auto()  # evict the oldest snapshot
+    RESERVOIR = auto()  # keep a uniform sample of every snapshot offered
+    KEEP_DIVERSE = auto()  # evict the snapshot closest to another one
+
+
+@cache
+def _decision_states() -> tuple[npt.NDArray[np.int64], npt.NDArray[np.bool_]]:
+    state_space = get_state_space()
+    state_ids = state_space.state_ids[~state_space.terminal].astype(np.int64)
+    return state_ids, legal_masks_of_states(state_ids)
+
+
+def greedy_policy(agent: QLearningAgent) -> npt.NDArray[np.int8]:
+    """The agent's greedy move in every non-terminal reachable position.
+
+    Ties are broken toward the lowest square, so two agents with the same
+    greedy policy get identical arrays.
+    """
+    state_ids, legal = _decision_states()
+    q_values = np.where(legal, agent.q_values(state_ids), -np.inf)
+    policy: npt.NDArray[np.int8] = q_values.argmax(axis=1).astype(np.int8)
+    return policy
+
+
+class SnapshotPool:
+    """Snapshots of both sides, indexed by player letter like ``pool["X"]``."""
+
+    def __init__(
+        self,
+        snapshots: Iterable[QLearningAgent] = (),
+        capacity: int = SNAPSHOT_POOL_CAPACITY,
+        policy: EvictionPolicy = EvictionPolicy.FIFO,
+        rng: Random = Random(0),
+    ) -> None:
+        assert capacity >= 1
+        self._capacity = capacity
+        self._policy = policy
+        self._rng = rng
+        # 每方的快照按加入顺序排列，与其贪心策略一一对应
+        self._snapshots: dict[str, list[QLearningAgent]] = {p.value: [] for p in Player}
+        self._policies: dict[str, list[npt.NDArray[np.int8]]] = {
+            p.value: [] for p in Player
+        }
+        self._num_offered: dict[str, int] = {p.value: 0 for p in Player}
+        # 每方最近一次提供的快照的贪心策略，无论是否留在池中
+        self._last_offered: dict[str, Optional[npt.NDArray[np.int8]]] = {
+            p.value: None for p in Player
+        }
+        for snapshot in snapshots:
+            self.add(snapshot)
+
+    def __getitem__(self, letter: str) -> list[QLearningAgent]:
+        """The snapshots of one side, oldest first. Do not modify the list."""
+        return self._snapshots[letter]
+
+    def __len__(self) -> int:
+        return sum(len(snapshots) for snapshots in self._snapshots.values())
+
+    @property
+    def capacity(self) -> int:
+        """Maximum number of snapshots kept per side."""
+        return self._capacity
+
+    @property
+    def policy(self) -> EvictionPolicy:
+        return self._policy
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the pooled Q-tables and policy fingerprints."""
+        # 最近提供的策略可能也在池中，按对象去重
+        fingerprints = {
+            id(policy): policy
+            for policies in self._policies.values()
+            for policy in policies
+        }
+        fingerprints.update(
+            (id(policy), policy)
+            for policy in self._last_offered.values()
+            if policy is not None
+        )
+        return sum(
+            snapshot.q_table.nbytes
+            for snapshots in self._snapshots.values()
+            for snapshot in snapshots
+        ) + sum(policy.nbytes for policy in fingerprints.values())
+
+    def policy_change(self, agent: QLearningAgent) -> float:
+        """Fraction of positions where ``agent`` now moves differently.
+
+        The comparison is with the greedy policy of the last snapshot offered
+        for its side, whether or not the pool kept it; 1.0 if none was offered.
+        """
+        last_offered = self._last_offered[agent.player.value]
+        if last_offered is None:
+            return 1.0
+        return float(np.mean(greedy_policy(agent) != last_offered))
+
+    def add(self, snapshot: QLearningAgent) -> bool:
+        """Offer a snapshot to the pool; return whether it was kept."""
+        assert snapshot.is_snapshot
+        letter = snapshot.player.value
+        snapshots, policies = self._snapshots[letter], self._policies[letter]
+        policy = greedy_policy(snapshot)
+        self._last_offered[letter] = policy
+        if policies and np.array_equal(policies[-1], policy):
+            return False  # 与最新快照的贪心策略相同
 
+        self._num_offered[letter] += 1
+        if len(snapshots) >= self._capacity:
+            evicted = self._pick_eviction(letter, policy)
+            if evicted is None:
+                return False
+            del snapshots[evicted], policies[evicted]
+        snapshots.append(snapshot)
+        policies.append(policy)
+        return True
 
-class SnapshotPool(TypedDict, total=True):
-    X: list[QLearningAgent]
-    O: list[QLearningAgent]  # noqa: E741
+    def _pick_eviction(self, letter: str, policy: npt.NDArray[np.int8]) -> int | None:
+        """Index of the snapshot to evict for a new one, None to drop the new one."""
+        match self._policy:
+            case EvictionPolicy.FIFO:
+                return 0
+            case EvictionPolicy.RESERVOIR:
+                # 蓄水池抽样：第 n 个快照以 capacity / n 的概率留下
+                slot = self._rng.randrange(self._num_offered[letter])
+                return slot if slot < self._capacity else None
+            case EvictionPolicy.KEEP_DIVERSE:
+                # 新快照总是保留；淘汰与其他快照最接近的旧快照，距离相同时淘汰较旧的
+                policies = np.stack(self._policies[letter] + [policy])
+                distances = (policies[:, None, :] != policies[None, :, :]).sum(axis=2)
+                np.fill_diagonal(distances, policies.shape[1] + 1)
+                return int(distances[:-1].min(axis=1).argmin())
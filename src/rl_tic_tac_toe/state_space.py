@@ -0,0 +1,182 @@
+"""Precomputed index of every reachable Tic-Tac-Toe position.
+
+Positions are numbered densely (ordered by ply, then by state id) and the
+facts every component needs about them are stored as flat arrays: legal-move
+bitmask, terminal flag, winner, side to move and the successor of each move.
+The tables are built once, cached on disk as an ``.npz`` file and loaded from
+there on later runs. ``$RL_TIC_TAC_TOE_CACHE_DIR`` moves the cache, and a
+cached file is only used if its tables hash to ``STATE_SPACE_DIGEST``.
+"""
+
+import hashlib
+import os
+from functools import cache
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import numpy.typing as npt
+
+from .batched_tic_tac_toe import EMPTY, O, X
+from .tic_tac_toe import (
+    BOARD_SIZE,
+    CELLS_OF_MASK,
+    FULL_MASK,
+    NUM_STATE_IDS,
+    SQUARE_WIN_LINE_MASKS,
+    STATE_ID_WEIGHTS,
+)
+
+STATE_SPACE_VERSION = 1
+# build() 结果的 SHA-256；修改表的内容或布局时需同时更新
+STATE_SPACE_DIGEST = "24d5f8ce8b0fe03b90a20231310c41f2b4db33a36f676f053116c3a06ddd1374"
+NUM_REACHABLE_STATES = 5478
+NO_STATE = -1
+CACHE_DIR_ENV = "RL_TIC_TAC_TOE_CACHE_DIR"
+TABLES = ("state_ids", "legal_masks", "terminal", "winners", "to_move", "successors")
+
+
+def default_cache_path() -> Path:
+    """Cache file location.
+
+    The directory is ``$RL_TIC_TAC_TOE_CACHE_DIR`` if set, otherwise
+    ``rl_tic_tac_toe`` under ``$XDG_CACHE_HOME`` or ``~/.cache``.
+    """
+    cache_dir = os.environ.get(CACHE_DIR_ENV)
+    if not cache_dir:
+        cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+        cache_dir = str(Path(cache_home) / "rl_tic_tac_toe")
+    return Path(cache_dir) / f"state_space_v{STATE_SPACE_VERSION}.npz"
+
+
+class StateSpace:
+    """Dense tables over the 5,478 reachable positions."""
+
+    def __init__(
+        self,
+        state_ids: npt.NDArray[np.int32],
+        legal_masks: npt.NDArray[np.uint16],
+        terminal: npt.NDArray[np.bool_],
+        winners: npt.NDArray[np.int8],
+        to_move: npt.NDArray[np.int8],
+        successors: npt.NDArray[np.int16],
+    ) -> None:
+        # winners/to_move 使用与棋盘格相同的取值：EMPTY(无)/X/O
+        self.state_ids = state_ids
+        self.legal_masks = legal_masks
+        self.terminal = terminal
+        self.winners = winners
+        self.to_move = to_move
+        self.successors = successors
+        self.index_of: npt.NDArray[np.int16] = np.full(
+            NUM_STATE_IDS, NO_STATE, dtype=np.int16
+        )
+        self.index_of[state_ids] = np.arange(len(state_ids), dtype=np.int16)
+
+    def __len__(self) -> int:
+        return len(self.state_ids)
+
+    def digest(self) -> str:
+        """SHA-256 of the tables, their dtypes and shapes included."""
+        sha = hashlib.sha256()
+        for name in TABLES:
+            table: npt.NDArray[np.generic] = getattr(self, name)
+            sha.update(f"{name}:{table.dtype.str}:{table.shape};".encode())
+            sha.update(np.ascontiguousarray(table).tobytes())
+        return sha.hexdigest()
+
+    @staticmethod
+    def build() -> "StateSpace":
+        """Enumerate the reachable positions breadth-first from the empty board."""
+        # (x_mask, o_mask) 按 state id 去重，逐层展开
+        layer: dict[int, tuple[int, int]] = {0: (0, 0)}
+        positions: list[tuple[int, int, int, int]] = []  # (state, x, o, winner)
+        winner_of: dict[int, int] = {0: EMPTY}
+        while layer:
+            next_layer: dict[int, tuple[int, int]] = {}
+            for state_id in sorted(layer):
+                x_mask, o_mask = layer[state_id]
+                positions.append((state_id, x_mask, o_mask, winner_of[state_id]))
+                occupied = x_mask | o_mask
+                if winner_of[state_id] != EMPTY or occupied == FULL_MASK:
+                    continue
+                x_to_move = occupied.bit_count() % 2 == 0
+                for move in CELLS_OF_MASK[FULL_MASK & ~occupied]:
+                    bit = 1 << move
+                    if x_to_move:
+                        child = (x_mask | bit, o_mask)
+                        child_id = state_id + STATE_ID_WEIGHTS[move]
+                        mover_mask, winner = child[0], X
+                    else:
+                        child = (x_mask, o_mask | bit)
+                        child_id = state_id + 2 * STATE_ID_WEIGHTS[move]
+                        mover_mask, winner = child[1], O
+                    if child_id not in next_layer:
+                        next_layer[child_id] = child
+                        wins = any(
+                            mover_mask & line == line
+                            for line in SQUARE_WIN_LINE_MASKS[move]
+                        )
+                        winner_of[child_id] = winner if wins else EMPTY
+            layer = next_layer
+
+        count = len(positions)
+        state_ids = np.array([p[0] for p in positions], dtype=np.int32)
+        occupied_masks = [p[1] | p[2] for p in positions]
+        legal_masks = np.array(
+            [FULL_MASK & ~mask for mask in occupied_masks], dtype=np.uint16
+        )
+        winners = np.array([p[3] for p in positions], dtype=np.int8)
+        terminal = (winners != EMPTY) | (legal_masks == 0)
+        to_move = np.array(
+            [X if mask.bit_count() % 2 == 0 else O for mask in occupied_masks],
+            dtype=np.int8,
+        )
+        index_of = {state_id: i for i, state_id in enumerate(state_ids.tolist())}
+        successors = np.full((count, BOARD_SIZE), NO_STATE, dtype=np.int16)
+        for i, (state_id, *_) in enumerate(positions):
+            if terminal[i]:
+                continue
+            weight = int(to_move[i])
+            for move in CELLS_OF_MASK[int(legal_masks[i])]:
+                successors[i, move] = index_of[
+                    state_id + weight * STATE_ID_WEIGHTS[move]
+                ]
+        return StateSpace(
+            state_ids, legal_masks, terminal, winners, to_move, successors
+        )
+
+    def save(self, path: Path) -> None:
+        """Write the tables to ``path`` atomically."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.stem}.{os.getpid()}.tmp.npz")
+        np.savez(tmp_path, **{name: getattr(self, name) for name in TABLES})
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def load(path: Optional[Path] = None) -> "StateSpace":
+        """Load the tables from the cache file, building and caching them if needed.
+
+        A cache file whose tables do not match ``STATE_SPACE_DIGEST`` is
+        rebuilt and overwritten.
+        """
+        path = path or default_cache_path()
+        try:
+            with np.load(path) as data:
+                cached = StateSpace(*(data[name] for name in TABLES))
+            if cached.digest() == STATE_SPACE_DIGEST:
+                return cached
+        except (OSError, KeyError, ValueError, IndexError):
+            pass  # 缓存缺失或损坏时重新构建
+        state_space = StateSpace.build()
+        try:
+            state_space.save(path)
+        except OSError:
+            pass  # 缓存目录不可写时只在内存中使用
+        return state_space
+
+
+@cache
+def get_state_space() -> StateSpace:
+    """The process-wide StateSpace, loaded lazily on first use."""
+    return StateSpace.load()
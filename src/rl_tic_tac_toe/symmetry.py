@@ -0,0 +1,81 @@
+"""Board symmetries used to share Q-values between equivalent positions.
+
+The 3x3 board has eight symmetries (four rotations, each optionally mirrored).
+A position is canonicalized by taking the smallest state id among its eight
+images; actions are mapped into and out of that canonical frame with
+precomputed permutation tables.
+"""
+
+from functools import cache
+
+import numpy as np
+import numpy.typing as npt
+
+from .tic_tac_toe import BOARD_SIZE, STATE_ID_WEIGHTS
+
+IDENTITY: tuple[int, ...] = tuple(range(BOARD_SIZE))
+# 变换后棋盘的第 i 格取自原棋盘的第 perm[i] 格
+ROTATE_90: tuple[int, ...] = (6, 3, 0, 7, 4, 1, 8, 5, 2)
+MIRROR: tuple[int, ...] = (2, 1, 0, 5, 4, 3, 8, 7, 6)
+
+
+def compose(first: tuple[int, ...], second: tuple[int, ...]) -> tuple[int, ...]:
+    """Permutation equivalent to applying ``first`` and then ``second``."""
+    return tuple(first[second[i]] for i in range(BOARD_SIZE))
+
+
+def invert(perm: tuple[int, ...]) -> tuple[int, ...]:
+    """Inverse permutation of ``perm``."""
+    inverse = [0] * BOARD_SIZE
+    for i, source in enumerate(perm):
+        inverse[source] = i
+    return tuple(inverse)
+
+
+def _all_symmetries() -> tuple[tuple[int, ...], ...]:
+    rotations = [IDENTITY]
+    for _ in range(3):
+        rotations.append(compose(rotations[-1], ROTATE_90))
+    return tuple(rotations + [compose(rotation, MIRROR) for rotation in rotations])
+
+
+SYMMETRY_PERMUTATIONS: tuple[tuple[int, ...], ...] = _all_symmetries()
+# ACTION_TO_CANONICAL[k][a]: 原棋盘动作 a 在第 k 个变换后棋盘上的位置
+ACTION_TO_CANONICAL: tuple[tuple[int, ...], ...] = tuple(
+    invert(perm) for perm in SYMMETRY_PERMUTATIONS
+)
+# ACTION_FROM_CANONICAL[k][c]: 第 k 个变换后棋盘上的动作 c 在原棋盘上的位置
+ACTION_FROM_CANONICAL: tuple[tuple[int, ...], ...] = SYMMETRY_PERMUTATIONS
+ACTION_TO_CANONICAL_ARRAY: npt.NDArray[np.int64] = np.array(ACTION_TO_CANONICAL)
+_PERMUTATION_ARRAY: npt.NDArray[np.int64] = np.array(SYMMETRY_PERMUTATIONS)
+_WEIGHT_ARRAY: npt.NDArray[np.int64] = np.array(STATE_ID_WEIGHTS)
+
+
+def transform_state(state_id: int, symmetry: int) -> int:
+    """State id of the board after applying the given symmetry."""
+    digits: list[int] = []
+    for _ in range(BOARD_SIZE):
+        state_id, digit = divmod(state_id, 3)
+        digits.append(digit)
+    perm = SYMMETRY_PERMUTATIONS[symmetry]
+    return sum(digits[perm[i]] * STATE_ID_WEIGHTS[i] for i in range(BOARD_SIZE))
+
+
+@cache
+def canonicalize(state_id: int) -> tuple[int, int]:
+    """Return the canonical state id and the index of the symmetry reaching it."""
+    return min(
+        (transform_state(state_id, symmetry), symmetry)
+        for symmetry in range(len(SYMMETRY_PERMUTATIONS))
+    )
+
+
+def canonicalize_many(
+    state_ids: npt.NDArray[np.int64],
+) -> tuple[npt.NDArray[np.int64], npt.NDArray[np.int64]]:
+    """Vectorized ``canonicalize`` over an array of state ids."""
+    digits = (state_ids[:, None] // _WEIGHT_ARRAY) % 3
+    # images[n, k]: 第 n 个局面在第 k 个变换下的 state id
+    images = digits[:, _PERMUTATION_ARRAY] @ _WEIGHT_ARRAY
+    symmetries = images.argmin(axis=1)
+    return images[np.arange(len(state_ids)), symmetries], symmetries
@@ -1,25 +1,187 @@
-"""Tic Tac Toe game logic module."""
+"""Tic Tac Toe game logic module.
 
-from typing import Optional
+The board is stored as two 9-bit masks, one per player, where bit ``i`` is set
+when the player occupies square ``i``. Win detection only checks the
+precomputed lines that pass through the square just played.
+
+Each position also has an integer state id: the board read as a base-3 number
+with square ``i`` as digit ``i`` (empty=0, X=1, O=2). The game keeps it up to
+date incrementally on every move.
+
+``TicTacToe.board`` is derived from the masks on every read, so it is a
+read-only ``BoardView``: ``game.board[i] = "X"`` raises ``TypeError`` instead
+of changing a copy. Set single squares with ``make_move``, or assign the whole
+``game.board``.
+"""
+
+from typing import NoReturn, Optional, Sequence, overload
 
 from .player import Player
 
+BOARD_SIZE = 9
+FULL_MASK = (1 << BOARD_SIZE) - 1
+EMPTY_CELL = " "
+NUM_STATE_IDS = 3**BOARD_SIZE
+STATE_ID_WEIGHTS: tuple[int, ...] = tuple(3**i for i in range(BOARD_SIZE))
+CELL_VALUES: dict[str, int] = {EMPTY_CELL: 0, Player.PLAYER_X: 1, Player.PLAYER_O: 2}
+CELL_OF_VALUE: tuple[str, ...] = (EMPTY_CELL, Player.PLAYER_X, Player.PLAYER_O)
+
+WIN_LINES: tuple[tuple[int, int, int], ...] = (
+    (0, 1, 2),
+    (3, 4, 5),
+    (6, 7, 8),
+    (0, 3, 6),
+    (1, 4, 7),
+    (2, 5, 8),
+    (0, 4, 8),
+    (2, 4, 6),
+)
+WIN_LINE_MASKS: tuple[int, ...] = tuple(
+    (1 << a) | (1 << b) | (1 << c) for a, b, c in WIN_LINES
+)
+# 每个格子所在的获胜线掩码
+SQUARE_WIN_LINE_MASKS: tuple[tuple[int, ...], ...] = tuple(
+    tuple(mask for mask in WIN_LINE_MASKS if mask & (1 << square))
+    for square in range(BOARD_SIZE)
+)
+# 空位掩码 -> 空位下标列表
+CELLS_OF_MASK: tuple[tuple[int, ...], ...] = tuple(
+    tuple(i for i in range(BOARD_SIZE) if mask & (1 << i))
+    for mask in range(FULL_MASK + 1)
+)
+
+
+def is_winning_mask(mask: int) -> bool:
+    """Return True if the player mask contains a complete line."""
+    return any(mask & line == line for line in WIN_LINE_MASKS)
+
+
+def encode_board(cells: Sequence[str]) -> int:
+    """Encode a board of ``" "``/``"X"``/``"O"`` cells as a base-3 state id."""
+    assert len(cells) == BOARD_SIZE
+    return sum(CELL_VALUES[c] * w for c, w in zip(cells, STATE_ID_WEIGHTS))
+
+
+def decode_state(state_id: int) -> list[str]:
+    """Decode a base-3 state id back into a list of cells."""
+    assert 0 <= state_id < NUM_STATE_IDS
+    cells: list[str] = []
+    for _ in range(BOARD_SIZE):
+        state_id, value = divmod(state_id, 3)
+        cells.append(CELL_OF_VALUE[value])
+    return cells
+
+
+class BoardView(Sequence[str]):
+    """Read-only cells of a board; compares equal to a list of the same cells."""
+
+    __slots__ = ("_cells",)
+
+    def __init__(self, cells: Sequence[str]) -> None:
+        self._cells = tuple(cells)
+
+    @overload
+    def __getitem__(self, index: int) -> str: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> tuple[str, ...]: ...
+
+    def __getitem__(self, index: int | slice) -> str | tuple[str, ...]:
+        return self._cells[index]
+
+    def __setitem__(self, index: int | slice, value: object) -> NoReturn:
+        raise TypeError(
+            "TicTacToe.board is read-only; use make_move or assign the whole board"
+        )
+
+    def __len__(self) -> int:
+        return len(self._cells)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, BoardView):
+            return self._cells == other._cells
+        if isinstance(other, (list, tuple)):
+            return self._cells == tuple(other)
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(self._cells)
+
+    def __repr__(self) -> str:
+        return repr(list(self._cells))
+
 
 class TicTacToe:
     """A class to represent the Tic-Tac-Toe game."""
 
-    # ... (代码未变)
+    __slots__ = ("_x_mask", "_o_mask", "_state_id", "_current_winner")
+
     def __init__(self) -> None:
-        self.board: list[str] = [" " for _ in range(9)]
+        self._x_mask = 0
+        self._o_mask = 0
+        self._state_id = 0
         self._current_winner: Optional[Player] = None
 
+    @property
+    def board(self) -> BoardView:
+        """The nine ``" "``/``"X"``/``"O"`` cells, read-only."""
+        x_mask, o_mask = self._x_mask, self._o_mask
+        return BoardView(
+            [
+                Player.PLAYER_X
+                if x_mask & (1 << i)
+                else Player.PLAYER_O
+                if o_mask & (1 << i)
+                else EMPTY_CELL
+                for i in range(BOARD_SIZE)
+            ]
+        )
+
+    @board.setter
+    def board(self, cells: Sequence[str]) -> None:
+        assert len(cells) == BOARD_SIZE
+        self._x_mask = sum(1 << i for i, c in enumerate(cells) if c == Player.PLAYER_X)
+        self._o_mask = sum(1 << i for i, c in enumerate(cells) if c == Player.PLAYER_O)
+        self._state_id = encode_board(cells)
+        self._current_winner = None
+        if is_winning_mask(self._x_mask):
+            self._current_winner = Player.PLAYER_X
+        elif is_winning_mask(self._o_mask):
+            self._current_winner = Player.PLAYER_O
+
     @property
     def current_winner(self) -> Optional[Player]:
         return self._current_winner
 
+    @property
+    def state_id(self) -> int:
+        """Base-3 integer id of the current position."""
+        return self._state_id
+
+    @property
+    def x_mask(self) -> int:
+        """Bitmask of the squares occupied by X."""
+        return self._x_mask
+
+    @property
+    def o_mask(self) -> int:
+        """Bitmask of the squares occupied by O."""
+        return self._o_mask
+
+    @property
+    def empty_mask(self) -> int:
+        """Bitmask of the empty squares, i.e. the legal moves."""
+        return FULL_MASK & ~(self._x_mask | self._o_mask)
+
+    @property
+    def move_count(self) -> int:
+        """Number of moves played so far."""
+        return (self._x_mask | self._o_mask).bit_count()
+
     def print_board(self) -> None:
         """Prints the current state of the board."""
-        for row in [self.board[i * 3 : (i + 1) * 3] for i in range(3)]:
+        board = self.board
+        for row in [board[i * 3 : (i + 1) * 3] for i in range(3)]:
             print("| " + " | ".join(row) + " |")
 
     @staticmethod
@@ -31,44 +193,45 @@ class TicTacToe:
 
     def empty_cells(self) -> list[int]:
         """return empty cells in the board"""
-        return [i for i, spot in enumerate(self.board) if spot == " "]
+        return list(CELLS_OF_MASK[FULL_MASK & ~(self._x_mask | self._o_mask)])
 
     def has_empty_cell(self) -> bool:
         """return True if there are empty squares in the board"""
-        return " " in self.board
+        return (self._x_mask | self._o_mask) != FULL_MASK
 
     def make_move(self, square: int, letter: Player) -> bool:
         """Make a move on the board if the square is available."""
-        if self.board[square] == " ":
-            self.board[square] = letter
-            if self.winner(square, letter):
-                self._current_winner = letter
-            return True
-        return False
+        if not 0 <= square < BOARD_SIZE:
+            raise IndexError(f"{square}: square index out of range")
+        bit = 1 << square
+        if (self._x_mask | self._o_mask) & bit:
+            return False
+        if letter == Player.PLAYER_X:
+            self._x_mask |= bit
+            self._state_id += STATE_ID_WEIGHTS[square]
+        else:
+            self._o_mask |= bit
+            self._state_id += 2 * STATE_ID_WEIGHTS[square]
+        if self.winner(square, letter):
+            self._current_winner = letter
+        return True
 
     def winner(self, square: int, player: Player) -> bool:
         """Check if the given player is the winner."""
-        row_ind = square // 3
-        row = self.board[row_ind * 3 : (row_ind + 1) * 3]
-        if all([spot == player for spot in row]):
-            return True
-        col_ind = square % 3
-        column = [self.board[col_ind + i * 3] for i in range(3)]
-        if all([spot == player for spot in column]):
-            return True
-        if square % 2 == 0:
-            diagonal1 = [self.board[i] for i in [0, 4, 8]]
-            if all([spot == player for spot in diagonal1]):
-                return True
-            diagonal2 = [self.board[i] for i in [2, 4, 6]]
-            if all([spot == player for spot in diagonal2]):
+        mask = self._x_mask if player == Player.PLAYER_X else self._o_mask
+        for line in SQUARE_WIN_LINE_MASKS[square]:
+            if mask & line == line:
                 return True
         return False
 
     def is_ended(self) -> bool:
         """Check if the game has ended (win or draw)."""
-        return not self.has_empty_cell() or self.current_winner is not None
+        return (
+            self._x_mask | self._o_mask
+        ) == FULL_MASK or self._current_winner is not None
 
     def is_draw(self) -> bool:
         """Check if the game ended in a draw."""
-        return not self.has_empty_cell() and self.current_winner is None
+        return (
+            self._x_mask | self._o_mask
+        ) == FULL_MASK and self._current_winner is None
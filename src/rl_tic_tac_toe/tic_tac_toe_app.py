@@ -1,13 +1,38 @@
+from pathlib import Path
+
+from .agent_file import (
+    AgentFileFormatError,
+    latest_agent_file,
+    load_agent,
+    new_agent_file,
+    save_agent,
+)
 from .game_battle import GameBattle
 from .player import Player
 from .q_learning_agent import QLearningAgent
 from .training_loop import TrainingLoop, TrainingLoopParams
 
+AGENT_DIR = Path.home() / ".rl_tic_tac_toe" / "agents"
+
 
 class TicTacToeApp:
-    def __init__(self) -> None:
-        self._agent_x: QLearningAgent = QLearningAgent(Player.PLAYER_X)
-        self._agent_o: QLearningAgent = QLearningAgent(Player.PLAYER_O)
+    def __init__(self, agent_dir: Path = AGENT_DIR) -> None:
+        self._agent_dir = agent_dir
+        self._agent_x: QLearningAgent = self._load_latest_agent(Player.PLAYER_X)
+        self._agent_o: QLearningAgent = self._load_latest_agent(Player.PLAYER_O)
+
+    def _load_latest_agent(self, player: Player) -> QLearningAgent:
+        """The latest saved agent of ``player``, or a new untrained one."""
+        path = latest_agent_file(self._agent_dir, player)
+        if path is None:
+            return QLearningAgent(player)
+        try:
+            agent = load_agent(path)
+        except (OSError, AgentFileFormatError) as error:
+            print(f"无法加载 {path}: {error}，使用未训练的 AI。")
+            return QLearningAgent(player)
+        print(f"已加载 {player} 方 AI: {path}")
+        return agent
 
     def run(self) -> None:
         while True:
@@ -46,3 +71,7 @@ class TicTacToeApp:
         params = TrainingLoopParams(episodes, self._agent_x, self._agent_o)
         train_loop = TrainingLoop(params)
         train_loop.run()
+        for agent in (self._agent_x, self._agent_o):
+            path = new_agent_file(self._agent_dir, agent.player)
+            save_agent(agent, path, replace=False)
+            print(f"已保存 {agent.player} 方 AI: {path}")
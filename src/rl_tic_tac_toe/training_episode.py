@@ -1,8 +1,11 @@
 import itertools
+import time
 from dataclasses import dataclass
-from typing import Sequence
+from typing import Optional, Sequence
 
 from .action_policy import ActionPolicy
+from .game_record import GameRecordWriter, result_of
+from .phase_timer import Phase, PhaseTimer
 from .player import Player
 from .q_learning_agent import QLearningAgent
 from .tic_tac_toe import TicTacToe
@@ -14,7 +17,7 @@ LOSER_REWARD = -1
 
 @dataclass(slots=True)
 class Decision:
-    state: str
+    state: int
     action: int
 
 
@@ -23,37 +26,54 @@ History = list[tuple[Decision, QLearningAgent]]
 
 class TrainingEpisode:
     @staticmethod
-    def run(playing_x: QLearningAgent, playing_o: QLearningAgent) -> None:
-        """Train a single episode between two agents."""
+    def run(
+        playing_x: QLearningAgent,
+        playing_o: QLearningAgent,
+        record_writer: Optional[GameRecordWriter] = None,
+        timer: Optional[PhaseTimer] = None,
+    ) -> None:
+        """Train a single episode between two agents, optionally recording it."""
         game = TicTacToe()
         history: list[tuple[Decision, QLearningAgent]] = []
         agents = (playing_x, playing_o)
 
         # 游戏主循环
         for turn_idx, current_agent in enumerate(itertools.cycle(agents)):
-            make_move_and_record(current_agent, game, history)
+            make_move_and_record(current_agent, game, history, timer)
             # if is_ended(game):
             if game.is_ended():
                 break
             opponent = agents[(turn_idx + 1) % 2]
-            update_in_game_reward(opponent, game, history)
+            update_in_game_reward(opponent, game, history, timer)
+
+        if record_writer is not None:
+            record_writer.write(
+                [decision.action for decision, _ in history],
+                result_of(game.current_winner),
+                (playing_x.snapshot_id, playing_o.snapshot_id),
+                (playing_x.epsilon, playing_o.epsilon),
+            )
 
         # 处理游戏结束时的奖励
         if game.is_draw():
-            update_draw_reward_for_both_agents(agents, game, history)
+            update_draw_reward_for_both_agents(agents, game, history, timer)
             return
-        update_winner_reward(agents, game, history)
-        update_loser_reward(agents, game, history)
+        update_winner_reward(agents, game, history, timer)
+        update_loser_reward(agents, game, history, timer)
 
 
 def make_move_and_record(
     agent: QLearningAgent,
     game: TicTacToe,
     history: History,
+    timer: Optional[PhaseTimer] = None,
 ) -> None:
     """Make a move for the agent and record the decision in history."""
     state = agent.get_state(game)
+    start = 0.0 if timer is None else time.perf_counter()
     action = agent.choose_action(game, ActionPolicy.EPSILON_GREEDY)
+    if timer is not None:
+        timer.add(Phase.CHOOSE_ACTION, start)
     game.make_move(action, agent.player)
     history.append((Decision(state, action), agent))
 
@@ -75,55 +95,75 @@ def update_reward_if_active(
     agent: QLearningAgent,
     game: TicTacToe,
     decision: Decision,
-    last_state: str,
+    last_state: int,
     reward: float,
+    timer: Optional[PhaseTimer] = None,
 ) -> None:
     """Update the reward for the agent if it is not a snapshot."""
     if agent.is_snapshot:
         return
 
     available_moves: list[int] = [] if game.current_winner else game.empty_cells()
+    start = 0.0 if timer is None else time.perf_counter()
     agent.update_q_table(
         decision.state, decision.action, reward, last_state, available_moves
     )
+    if timer is not None:
+        timer.add(Phase.UPDATE_Q_TABLE, start)
 
 
 def update_winner_reward(
-    agents: Sequence[QLearningAgent], game: TicTacToe, history: History
+    agents: Sequence[QLearningAgent],
+    game: TicTacToe,
+    history: History,
+    timer: Optional[PhaseTimer] = None,
 ) -> None:
     """Update the reward for the winning agent."""
     winner_decision, winner = history[-1]
     winner_last_state = winner.get_state(game)
     update_reward_if_active(
-        winner, game, winner_decision, winner_last_state, WINNER_REWARD
+        winner, game, winner_decision, winner_last_state, WINNER_REWARD, timer
     )
 
 
 def update_loser_reward(
-    agents: Sequence[QLearningAgent], game: TicTacToe, history: History
+    agents: Sequence[QLearningAgent],
+    game: TicTacToe,
+    history: History,
+    timer: Optional[PhaseTimer] = None,
 ) -> None:
     """Update the reward for the losing agent."""
     loser_decision, loser = history[-2]
     loser_last_state = loser.get_state(game)
-    update_reward_if_active(loser, game, loser_decision, loser_last_state, LOSER_REWARD)
+    update_reward_if_active(
+        loser, game, loser_decision, loser_last_state, LOSER_REWARD, timer
+    )
 
 
 def update_draw_reward_for_both_agents(
-    agents: Sequence[QLearningAgent], game: TicTacToe, history: History
+    agents: Sequence[QLearningAgent],
+    game: TicTacToe,
+    history: History,
+    timer: Optional[PhaseTimer] = None,
 ) -> None:
     """Update the reward for both agents in case of a draw."""
     for i in range(2):
         decision, agent = history[-(i + 1)]
         last_state = agent.get_state(game)
-        update_reward_if_active(agent, game, decision, last_state, DRAW_GAME_REWARD)
+        update_reward_if_active(
+            agent, game, decision, last_state, DRAW_GAME_REWARD, timer
+        )
 
 
 def update_in_game_reward(
-    agent: QLearningAgent, game: TicTacToe, history: History
+    agent: QLearningAgent,
+    game: TicTacToe,
+    history: History,
+    timer: Optional[PhaseTimer] = None,
 ) -> None:
     """Update the in-game reward for the agent based on the current game state."""
     if not has_moved_at_least_once(agent.player, history):
         return
     decision, _ = history[-2]
     last_state = agent.get_state(game)
-    update_reward_if_active(agent, game, decision, last_state, 0)
+    update_reward_if_active(agent, game, decision, last_state, 0, timer)
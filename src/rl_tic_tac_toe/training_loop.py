@@ -1,17 +1,33 @@
 """A module implementing the training loop for a Q-learning Tic-Tac-Toe agent."""
 
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
+from pathlib import Path
 from random import Random
 from typing import Optional
 
+import numpy as np
+
+from .actor_learner import ActorLearner, report_actor_learner_stats
+from .batched_training_episode import BatchedTrainingEpisode
+from .convergence import ConvergenceTracker
+from .checkpoint import (
+    Checkpoint,
+    CheckpointWriter,
+    latest_checkpoint,
+    load_checkpoint,
+)
+from .game_record import GameRecordWriter
 from .learning_param_scheduler import (
     LearningParamScheduler as Scheduler,
 )
+from .parallel_self_play import SelfPlayWorkers
+from .phase_timer import Phase, PhaseTimer
 from .player import Player
 from .q_learning_agent import QLearningAgent
 from .snapshot_pool import SnapshotPool
 from .training_episode import TrainingEpisode
+from .training_metrics import ConsoleRenderer, MetricsSink
 from .training_reporter import TrainingReporter
 
 EVALUATION_NUM = 20
@@ -21,6 +37,8 @@ ALPHA_START = 0.5
 ALPHA_MIN = 0.01
 EPSILON_START = 1.0
 EPSILON_MIN = 0.01
+POLICY_REFRESH_EPISODES = 4096  # 多进程模式下每隔多少局刷新一次发给子进程的策略
+CHECKPOINT_INTERVAL = 50000
 
 
 @dataclass(slots=True)
@@ -31,26 +49,77 @@ class TrainingLoopParams:
     alpha_scheduler: Optional[Scheduler] = None
     epsilon_scheduler: Optional[Scheduler] = None
     snapshot_pool: Optional[SnapshotPool] = None
+    batch_size: int = 1  # >1 时每批并行进行 batch_size 局
+    num_workers: int = 1  # >1 时在多个子进程中生成对局
+    policy_refresh_episodes: int = POLICY_REFRESH_EPISODES
+    num_actors: int = 0  # >0 时使用 actor-learner 模式，需要 dense 后端
+    record_writer: Optional[GameRecordWriter] = None  # 仅逐局训练时记录对局
+    max_pending_evaluations: int = 0  # >0 时在子进程中异步评估，最多同时进行的评估数
+    profile: bool = False  # 统计各阶段耗时，评估时和训练结束时输出
+    metrics_sink: Optional[MetricsSink] = None  # 评估记录的结构化输出，如 JSONL 文件
+    console_report: bool = True  # 在控制台输出评估报告
+    checkpoint_dir: Optional[Path] = None  # 定期写入检查点的目录，仅逐局与批量训练
+    checkpoint_interval: int = CHECKPOINT_INTERVAL  # 每隔多少局写一次检查点
+    convergence: Optional[ConvergenceTracker] = None  # 收敛后提前结束训练
 
 
 class TrainingLoop:
-    """A class to manage the training loop of Q-learning agents."""
+    """A class to manage the training loop of Q-learning agents.
+
+    With a ``checkpoint_dir``, the state of the run is saved there every
+    ``checkpoint_interval`` episodes, and ``resume`` continues an interrupted
+    run from its latest checkpoint exactly as if it had not stopped. Pending
+    asynchronous evaluations are reported before each checkpoint, so the
+    sinks and the convergence tracker have seen every evaluation up to it.
+
+    With a ``convergence`` tracker, the run ends early once the tracker
+    reports convergence, or one evaluation interval later when it compresses
+    the schedules; ``stop_reason`` then says why.
+    """
 
     def __init__(
         self,
         params: TrainingLoopParams,
         rng: Random = Random(0),
+        start_episode: int = 0,
     ) -> None:
         assert params.episodes != 0
+        self._params = params
         self._episodes = params.episodes
+        assert 0 <= start_episode <= params.episodes
+        self._start_episode = start_episode
+        assert params.batch_size >= 1
+        self._batch_size = params.batch_size
+        assert params.num_workers >= 1
+        self._num_workers = params.num_workers
+        assert params.policy_refresh_episodes >= 1
+        self._policy_refresh_episodes = params.policy_refresh_episodes
+        assert params.num_actors >= 0
+        self._num_actors = params.num_actors
+        self._record_writer = params.record_writer
+        # 多进程模式下子进程各自的随机状态无法保存，不支持检查点
+        assert params.checkpoint_dir is None or (
+            params.num_actors == 0 and params.num_workers == 1
+        )
+        assert params.checkpoint_interval >= 1
+        self._checkpoint_writer: Optional[CheckpointWriter] = None
+        self._next_checkpoint = (
+            start_episode // params.checkpoint_interval + 1
+        ) * params.checkpoint_interval
+        self._np_rng: Optional[np.random.Generator] = None
         assert params.agent_x
         self._agent_x = params.agent_x
         assert params.agent_o
         self._agent_o = params.agent_o
-        self.snapshot_pool = params.snapshot_pool or {
-            "X": [params.agent_x.snapshot()],
-            "O": [params.agent_o.snapshot()],
-        }
+        # 空的对手池为假值，但仍要使用调用者给出的容量与淘汰策略
+        self.snapshot_pool = (
+            params.snapshot_pool
+            if params.snapshot_pool is not None
+            else SnapshotPool(
+                [params.agent_x.snapshot(), params.agent_o.snapshot()],
+                capacity=SNAPSHOT_NUM,
+            )
+        )
         self.alpha_scheduler = params.alpha_scheduler or Scheduler(
             params.episodes, ALPHA_START, ALPHA_MIN
         )
@@ -58,24 +127,232 @@ class TrainingLoop:
             params.episodes, EPSILON_START, EPSILON_MIN
         )
         self.rng = rng
+        self.timer = PhaseTimer() if params.profile else None
+        sinks: list[MetricsSink] = []
+        if params.console_report:
+            sinks.append(ConsoleRenderer())
+        if params.metrics_sink is not None:
+            sinks.append(params.metrics_sink)
+        self._convergence = params.convergence
+        if self._convergence is not None:
+            sinks.append(self._convergence)
         self._reporter = TrainingReporter(
-            self._agent_x, self._agent_o, self._episodes, self.snapshot_pool
+            self._agent_x,
+            self._agent_o,
+            self._episodes,
+            self.snapshot_pool,
+            max_pending_evaluations=params.max_pending_evaluations,
+            timer=self.timer,
+            sinks=sinks,
+            start_episode=start_episode,
+        )
+
+    @staticmethod
+    def resume(
+        path: Path,
+        record_writer: Optional[GameRecordWriter] = None,
+        metrics_sink: Optional[MetricsSink] = None,
+    ) -> "TrainingLoop":
+        """A loop that continues the run saved in a checkpoint.
+
+        ``path`` is a checkpoint file or a checkpoint directory, in which case
+        its latest checkpoint is used. The outputs cannot be saved in a
+        checkpoint and are given again.
+        """
+        if path.is_dir():
+            latest = latest_checkpoint(path)
+            if latest is None:
+                raise FileNotFoundError(f"{path}: no checkpoint")
+            path = latest
+        checkpoint = load_checkpoint(path)
+        params = replace(
+            checkpoint.params, record_writer=record_writer, metrics_sink=metrics_sink
+        )
+        loop = TrainingLoop(params, checkpoint.rng, checkpoint.episode)
+        loop._np_rng = checkpoint.np_rng
+        return loop
+
+    @property
+    def stop_reason(self) -> Optional[str]:
+        """Why the run ends early, once the convergence tracker has decided."""
+        return None if self._convergence is None else self._convergence.stop_reason
+
+    def checkpoint(self, episode: int) -> Checkpoint:
+        """The state of the run before ``episode``, sharing the live objects."""
+        params = replace(
+            self._params,
+            alpha_scheduler=self.alpha_scheduler,
+            epsilon_scheduler=self.epsilon_scheduler,
+            snapshot_pool=self.snapshot_pool,
+            record_writer=None,
+            metrics_sink=None,
         )
+        return Checkpoint(episode, params, self.rng, self._np_rng)
 
     def run(self) -> tuple[QLearningAgent, QLearningAgent]:
         """Run the training loop for a specified number of episodes."""
         start_time = time.time()
 
-        for episode_idx in range(self._episodes):
-            playing_x, playing_o = self.pick_opponents(episode_idx, self.rng)
-            TrainingEpisode.run(playing_x, playing_o)
-            self.update_learning_params(episode_idx)
-            self._reporter.evaluate_and_snapshot_if_needed(episode_idx)
+        if self._params.checkpoint_dir is not None:
+            self._checkpoint_writer = CheckpointWriter(self._params.checkpoint_dir)
+        try:
+            if self._should_stop(self._start_episode):
+                pass  # 从提前结束处的检查点恢复，没有剩余的回合
+            elif self._num_actors > 0:
+                self._run_actor_learner()
+            elif self._num_workers > 1:
+                self._run_parallel()
+            elif self._batch_size > 1:
+                self._run_batched()
+            else:
+                for episode_idx in range(self._start_episode, self._episodes):
+                    playing_x, playing_o = self.pick_opponents(episode_idx, self.rng)
+                    TrainingEpisode.run(
+                        playing_x, playing_o, self._record_writer, self.timer
+                    )
+                    self.update_learning_params(episode_idx)
+                    self._reporter.evaluate_and_snapshot_if_needed(episode_idx)
+                    self._checkpoint_if_needed(episode_idx + 1)
+                    if self._should_stop(episode_idx + 1):
+                        break
+        finally:
+            try:
+                self._reporter.close()  # 输出尚未完成的异步评估
+            finally:
+                if self._checkpoint_writer is not None:
+                    self._checkpoint_writer.close()  # 等待最后一个检查点写完
+                    self._checkpoint_writer = None
 
         end_time = time.time()
         report_training_result(start_time, end_time)
+        if self._convergence is not None and self._convergence.stop_reason is not None:
+            print(
+                f"--- [系统]: 在回合 {self._convergence.stop_episode} 提前结束训练:"
+                f" {self._convergence.stop_reason} ---"
+            )
+        if self.timer is not None:
+            self.timer.report()
         return self._agent_x, self._agent_o
 
+    def _run_batched(self) -> None:
+        """Train in batches of games played in parallel by BatchedTrainingEpisode.
+
+        Opponents are picked once per batch, alternating sides between batches;
+        the learning parameters and the reporter still advance per episode.
+        """
+        if self._np_rng is None:
+            self._np_rng = np.random.default_rng(self.rng.getrandbits(64))
+        np_rng = self._np_rng
+        # 检查点只在批次之间写入，恢复时 start_episode 总是批次的起点
+        for batch_start in range(self._start_episode, self._episodes, self._batch_size):
+            batch_idx = batch_start // self._batch_size
+            batch_end = min(batch_start + self._batch_size, self._episodes)
+            playing_x, playing_o = self.pick_opponents(batch_idx, self.rng)
+            BatchedTrainingEpisode.run(
+                playing_x,
+                playing_o,
+                batch_end - batch_start,
+                np_rng,
+                timer=self.timer,
+            )
+            for episode_idx in range(batch_start, batch_end):
+                self.update_learning_params(episode_idx)
+                self._reporter.evaluate_and_snapshot_if_needed(episode_idx)
+            self._checkpoint_if_needed(batch_end)
+            if self._should_stop(batch_end):
+                break
+
+    def _checkpoint_if_needed(self, episode: int) -> None:
+        """Submit a checkpoint once ``episode`` episodes reach the next interval."""
+        if self._checkpoint_writer is None or episode < self._next_checkpoint:
+            return
+        interval = self._params.checkpoint_interval
+        self._next_checkpoint = (episode // interval + 1) * interval
+        # 异步评估的结果要先交给收敛判定，否则恢复后这些评估会丢失
+        self._reporter.drain()
+        start = 0.0 if self.timer is None else time.perf_counter()
+        self._checkpoint_writer.submit(self.checkpoint(episode))
+        if self.timer is not None:
+            self.timer.add(Phase.CHECKPOINT, start)
+
+    def _should_stop(self, episode: int) -> bool:
+        """Whether the run ends after ``episode`` episodes because it converged.
+
+        When the tracker compresses the schedules, training goes on for one
+        more evaluation interval while alpha and epsilon decay to their
+        minimum. The decision is kept in the tracker, and the compressed
+        schedules in the schedulers, so both are restored from checkpoints.
+        """
+        tracker = self._convergence
+        if tracker is None or tracker.reason is None:
+            return False
+        if tracker.stop_episode is None:
+            if episode >= self._episodes:
+                return False  # 已经训练完，不算提前结束
+            tail = (
+                self._reporter.evaluation_interval if tracker.compress_schedules else 0
+            )
+            stop_episode = min(episode + tail, self._episodes)
+            tracker.stop_episode = stop_episode
+            tracker.stop_reason = tracker.reason
+            if stop_episode > episode:
+                self.alpha_scheduler.compress(episode, stop_episode - episode)
+                self.epsilon_scheduler.compress(episode, stop_episode - episode)
+                tracker.stop_reason += (
+                    f", 之后压缩调度器再训练 {stop_episode - episode} 局"
+                )
+        return episode >= tracker.stop_episode
+
+    def _run_parallel(self) -> None:
+        """Generate the games in worker processes and learn from them here.
+
+        The episodes are played in rounds of ``policy_refresh_episodes``; every
+        round sends fresh copies of the policies to the workers and splits its
+        games into one task per worker, each with its own pick of opponents.
+        """
+        with SelfPlayWorkers(self._num_workers, self.rng.getrandbits(64)) as workers:
+            task_idx = 0
+            for round_start in range(0, self._episodes, self._policy_refresh_episodes):
+                round_end = min(
+                    round_start + self._policy_refresh_episodes, self._episodes
+                )
+                pairings = []
+                for _ in range(self._num_workers):
+                    pairings.append(self.pick_opponents(task_idx, self.rng))
+                    task_idx += 1
+                workers.play(
+                    self._agent_x, self._agent_o, pairings, round_end - round_start
+                )
+                for episode_idx in range(round_start, round_end):
+                    self.update_learning_params(episode_idx)
+                    self._reporter.evaluate_and_snapshot_if_needed(episode_idx)
+                if self._should_stop(round_end):
+                    break
+
+    def _run_actor_learner(self) -> None:
+        """Learn here from games generated by ``num_actors`` actor processes.
+
+        The actors always play the live agents against each other; the
+        snapshot pool is still filled by the reporter for evaluation.
+        """
+        actor_learner = ActorLearner(
+            self._agent_x,
+            self._agent_o,
+            self._num_actors,
+            self.rng.getrandbits(64),
+        )
+        with actor_learner:
+            episode_idx = 0
+            while episode_idx < self._episodes:
+                num_games = actor_learner.learn()
+                for _ in range(min(num_games, self._episodes - episode_idx)):
+                    self.update_learning_params(episode_idx)
+                    self._reporter.evaluate_and_snapshot_if_needed(episode_idx)
+                    episode_idx += 1
+                if self._should_stop(episode_idx):
+                    break
+        report_actor_learner_stats(actor_learner.stats())
+
     def pick_opponents(
         self, episode_idx: int, rng: Random
     ) -> tuple[QLearningAgent, QLearningAgent]:
@@ -94,12 +371,16 @@ class TrainingLoop:
 
     def update_learning_params(self, episode_idx: int) -> None:
         """Adjust learning parameters for the agents."""
+        start = 0.0 if self.timer is None else time.perf_counter()
         agent_x = self._agent_x
         agent_o = self._agent_o
         alpha = self.alpha_scheduler.update(episode_idx)
         agent_x.alpha, agent_o.alpha = alpha, alpha
         epsilon = self.epsilon_scheduler.update(episode_idx)
         agent_x.epsilon, agent_o.epsilon = epsilon, epsilon
+        if self.timer is not None:
+            self.timer.add(Phase.SCHEDULER, start)
+            self.timer.count_episodes()  # 每局调用一次，顺带记录完成的局数
 
 
 def pick_agent(
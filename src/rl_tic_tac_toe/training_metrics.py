@@ -0,0 +1,202 @@
+"""Structured records of the evaluations made during training, and their sinks.
+
+The reporter turns each evaluation into an ``EvaluationRecord`` and hands it
+to every sink: ``JsonlMetricsWriter`` appends it as one JSON line to a file
+or stream for dashboards, ``ConsoleRenderer`` prints it for people.
+"""
+
+import json
+import sys
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from types import TracebackType
+from typing import Mapping, Optional, Protocol, TextIO
+
+WRITE_BUFFER_RECORDS = 16
+# 精确评估给出的是概率而不是对局数，结果中用这些键代替对应的计数键
+RATE_KEYS = {
+    "x_wins": "x_win_rate",
+    "o_wins": "o_win_rate",
+    "wins": "win_rate",
+    "losses": "loss_rate",
+    "draws": "draw_rate",
+}
+
+
+def rate_keyed(rates: Mapping[str, float]) -> dict[str, float]:
+    """Rates returned under the count keys, renamed to the rate keys."""
+    return {RATE_KEYS[key]: rate for key, rate in rates.items()}
+
+
+def as_rates(results: Mapping[str, float]) -> dict[str, float]:
+    """Rates under the rate keys, from either game counts or rates."""
+    if all(key in RATE_KEYS for key in results):
+        total = sum(results.values())
+        return {RATE_KEYS[key]: count / total for key, count in results.items()}
+    return dict(results)
+
+
+@dataclass(slots=True)
+class Evaluation:
+    """Results of one evaluation round.
+
+    Sampled evaluations hold game counts such as ``x_wins``; exact ones hold
+    probabilities under the matching ``RATE_KEYS`` names such as
+    ``x_win_rate``.
+    """
+
+    ai_vs_ai: Mapping[str, float]
+    x_vs_random: Mapping[str, float]
+    o_vs_random: Mapping[str, float]
+
+
+@dataclass(slots=True)
+class TrainingStats:
+    """State of the training at the episode an evaluation was made."""
+
+    episode: int  # 已完成的回合数
+    episodes: int  # 总回合数
+    alpha_x: float
+    alpha_o: float
+    epsilon_x: float
+    epsilon_o: float
+    q_table_size_x: int
+    q_table_size_o: int
+    pool_size_x: int
+    pool_size_o: int
+    episodes_per_second: float  # 自上次评估以来
+    # 自上次评估以来两方所有更新的 |ΔQ|
+    max_delta_q: float
+    mean_delta_q: float
+    # 与本方最新快照相比贪心动作改变的局面比例
+    policy_change_x: float
+    policy_change_o: float
+
+
+@dataclass(slots=True)
+class EvaluationRecord:
+    stats: TrainingStats
+    evaluation: Evaluation
+
+    def to_json(self) -> str:
+        """One line of JSON with the stats and the results side by side."""
+        return json.dumps(
+            {**asdict(self.stats), **asdict(self.evaluation)}, ensure_ascii=False
+        )
+
+
+class MetricsSink(Protocol):
+    def write(self, record: EvaluationRecord) -> None: ...
+
+    def flush(self) -> None: ...
+
+
+class JsonlMetricsWriter:
+    """Buffered JSON Lines writer of evaluation records.
+
+    Records are written ``buffer_records`` at a time; ``flush`` writes the
+    rest. Opened with a path the writer owns the file and ``close`` closes
+    it; a given stream such as ``sys.stdout`` is only flushed.
+    """
+
+    def __init__(
+        self,
+        target: Path | TextIO = sys.stdout,
+        buffer_records: int = WRITE_BUFFER_RECORDS,
+    ) -> None:
+        assert buffer_records >= 1
+        if isinstance(target, Path):
+            target.parent.mkdir(parents=True, exist_ok=True)
+            self._stream: TextIO = open(target, "a", encoding="utf-8")
+            self._owns_stream = True
+        else:
+            self._stream = target
+            self._owns_stream = False
+        self._buffer_records = buffer_records
+        self._lines: list[str] = []
+        self.records_written = 0
+
+    def __enter__(self) -> "JsonlMetricsWriter":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+    def write(self, record: EvaluationRecord) -> None:
+        self._lines.append(record.to_json() + "\n")
+        self.records_written += 1
+        if len(self._lines) >= self._buffer_records:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._lines:
+            self._stream.write("".join(self._lines))
+            self._lines.clear()
+        self._stream.flush()
+
+    def close(self) -> None:
+        self.flush()
+        if self._owns_stream:
+            self._stream.close()
+
+
+def read_metrics(path: Path) -> list[dict[str, object]]:
+    """Records written by ``JsonlMetricsWriter``, as plain dictionaries."""
+    with open(path, encoding="utf-8") as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+class ConsoleRenderer:
+    """Prints each record as the human-readable evaluation report."""
+
+    def write(self, record: EvaluationRecord) -> None:
+        stats, evaluation = record.stats, record.evaluation
+        progress_percent: float = (stats.episode / stats.episodes) * 100
+        print(
+            f"\n{'=' * 15} 训练进度: {progress_percent:.0f}% (回合 {stats.episode}/{stats.episodes}) {'=' * 15}"
+        )
+        print("\n--- 评估: AI vs. AI ---")
+        results = evaluation.ai_vs_ai
+        print(f"X 胜率: {self._format(results, 'x_wins', False)}")
+        print(f"O 胜率: {self._format(results, 'o_wins', False)}")
+        print(f"平局率: {self._format(results, 'draws', False)}")
+        self._print_vs_random("X", evaluation.x_vs_random)
+        self._print_vs_random("O", evaluation.o_vs_random)
+        print(
+            f"\nalpha: X {stats.alpha_x:.4f} / O {stats.alpha_o:.4f},"
+            f" epsilon: X {stats.epsilon_x:.4f} / O {stats.epsilon_o:.4f}"
+        )
+        print(
+            f"Q 表状态数: X {stats.q_table_size_x} / O {stats.q_table_size_o},"
+            f" 对手池: X {stats.pool_size_x} / O {stats.pool_size_o},"
+            f" {stats.episodes_per_second:,.0f} 局/秒"
+        )
+        print(
+            f"|ΔQ| 最大 {stats.max_delta_q:.2e} / 平均 {stats.mean_delta_q:.2e},"
+            f" 贪心策略变化: X {stats.policy_change_x:.2%} / O {stats.policy_change_o:.2%}"
+        )
+        print(f"{'=' * 50}")
+
+    @classmethod
+    def _print_vs_random(cls, letter: str, results: Mapping[str, float]) -> None:
+        print(f"\n--- 评估: AI ({letter}) vs. 随机玩家 ---")
+        print(f"AI 胜率: {cls._format(results, 'wins', True)}")
+        print(f"AI 败率: {cls._format(results, 'losses', True)}")
+        print(f"平局率: {cls._format(results, 'draws', True)}")
+
+    @staticmethod
+    def _format(results: Mapping[str, float], key: str, with_total: bool) -> str:
+        """``count (rate)`` for game counts, only the rate for exact results."""
+        rate = as_rates(results)[RATE_KEYS[key]]
+        if key not in results:
+            return f"{rate:.2%}"
+        total = f" / {sum(results.values())}" if with_total else ""
+        return f"{results[key]}{total} ({rate:.2%})"
+
+    def flush(self) -> None:
+        pass
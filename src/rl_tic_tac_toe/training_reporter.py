@@ -1,83 +1,266 @@
-from .evaluator import Evaluator
+import time
+from collections import deque
+from contextlib import AbstractContextManager, nullcontext
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Mapping, Optional, Sequence
+
+from .evaluator import EvaluationMode, Evaluator
+from .phase_timer import Phase, PhaseTimer
 from .player import Player
 from .q_learning_agent import QLearningAgent
 from .snapshot_pool import SnapshotPool
+from .training_metrics import (
+    ConsoleRenderer,
+    Evaluation,
+    EvaluationRecord,
+    MetricsSink,
+    TrainingStats,
+    rate_keyed,
+)
+
+
+EVALUATION_GAMES = 1000
 
 
 class TrainingReporter:
+    """Periodic evaluation and snapshots during training.
+
+    With ``max_pending_evaluations`` > 0, each evaluation runs in a worker
+    process on the snapshots taken at that point while training goes on. At
+    most that many evaluations are in flight; their results are printed in
+    episode order as they complete, and ``drain`` and ``close`` wait for the
+    rest.
+
+    Each evaluation becomes an ``EvaluationRecord`` written to every sink;
+    by default the only sink is a ``ConsoleRenderer``. ``close`` flushes
+    them.
+
+    With a ``timer``, evaluation, snapshots and printing are timed, and the
+    breakdown by phase is printed after each evaluation report.
+    """
+
     def __init__(
         self,
         agent_x: QLearningAgent,
         agent_o: QLearningAgent,
         episodes: int,
         snapshot_pool: SnapshotPool,
+        evaluation_mode: EvaluationMode = EvaluationMode.EXACT,
+        max_pending_evaluations: int = 0,
+        timer: Optional[PhaseTimer] = None,
+        sinks: Optional[Sequence[MetricsSink]] = None,
+        start_episode: int = 0,
     ) -> None:
         self._agent_x = agent_x
         self._agent_o = agent_o
         self._episodes = episodes
         self._snapshot_pool = snapshot_pool
+        self._evaluation_mode = evaluation_mode
         self.evaluation_interval = max((1, episodes // 20))
+        self.evaluation_games = EVALUATION_GAMES
+        assert max_pending_evaluations >= 0
+        self._max_pending_evaluations = max_pending_evaluations
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # (回合, 评估结果)，按回合顺序排列
+        self._pending: deque[tuple[TrainingStats, Future[Evaluation]]] = deque()
+        self._timer = timer
+        self._sinks = [ConsoleRenderer()] if sinks is None else list(sinks)
+        # 上次评估时的 (时刻, 回合数)，用于计算吞吐量
+        self._last_mark = (time.perf_counter(), start_episode)
 
     def evaluate_and_snapshot_if_needed(self, episode_idx: int) -> None:
+        self._report_finished_evaluations()
         if (episode_idx + 1) % self.evaluation_interval != 0:
             return
-        self._run_evaluation(episode_idx)
-        self._run_snapshot(episode_idx, Player.PLAYER_X)
-        self._run_snapshot(episode_idx, Player.PLAYER_O)
+        stats = self._training_stats(episode_idx)
+        if not self._max_pending_evaluations:
+            with self._measure(Phase.EVALUATION):
+                evaluation = evaluate(
+                    self._agent_x,
+                    self._agent_o,
+                    self._evaluation_mode,
+                    self.evaluation_games,
+                    episode_idx,
+                )
+            self._report_evaluation(stats, evaluation)
+            self._run_snapshot(episode_idx, Player.PLAYER_X)
+            self._run_snapshot(episode_idx, Player.PLAYER_O)
+            return
+        snapshot_x = self._run_snapshot(episode_idx, Player.PLAYER_X)
+        snapshot_o = self._run_snapshot(episode_idx, Player.PLAYER_O)
+        self._submit_evaluation(episode_idx, stats, snapshot_x, snapshot_o)
 
-    def _run_evaluation(self, episode_idx: int) -> None:
-        """Run evaluation of agents and report the results."""
-        progress_percent: float = ((episode_idx + 1) / self._episodes) * 100
-        print(
-            f"\n{'=' * 15} 训练进度: {progress_percent:.0f}% (回合 {episode_idx + 1}/{self._episodes}) {'=' * 15}"
+    def _training_stats(self, episode_idx: int) -> TrainingStats:
+        now, episode = time.perf_counter(), episode_idx + 1
+        last_time, last_episode = self._last_mark
+        self._last_mark = (now, episode)
+        pool = self._snapshot_pool
+        updates = self._agent_x.take_update_stats().merge(
+            self._agent_o.take_update_stats()
         )
-        ai_vs_ai_results = Evaluator.evaluate_agents(self._agent_x, self._agent_o)
-        print("\n--- 评估: AI vs. AI ---")
-        total_games = sum(ai_vs_ai_results.values())
-        print(
-            f"X 胜率: {ai_vs_ai_results['x_wins']} ({(ai_vs_ai_results['x_wins'] / total_games) * 100:.2f}%)"
-        )
-        print(
-            f"O 胜率: {ai_vs_ai_results['o_wins']} ({(ai_vs_ai_results['o_wins'] / total_games) * 100:.2f}%)"
-        )
-        print(
-            f"平局率: {ai_vs_ai_results['draws']} ({(ai_vs_ai_results['draws'] / total_games) * 100:.2f}%)"
+        return TrainingStats(
+            episode=episode,
+            episodes=self._episodes,
+            alpha_x=self._agent_x.alpha,
+            alpha_o=self._agent_o.alpha,
+            epsilon_x=self._agent_x.epsilon,
+            epsilon_o=self._agent_o.epsilon,
+            q_table_size_x=len(self._agent_x.q_table),
+            q_table_size_o=len(self._agent_o.q_table),
+            pool_size_x=len(pool[Player.PLAYER_X.value]),
+            pool_size_o=len(pool[Player.PLAYER_O.value]),
+            episodes_per_second=(episode - last_episode) / max(now - last_time, 1e-9),
+            max_delta_q=updates.max_abs_delta,
+            mean_delta_q=updates.mean_abs_delta,
+            policy_change_x=pool.policy_change(self._agent_x),
+            policy_change_o=pool.policy_change(self._agent_o),
         )
 
-        x_vs_random_results = Evaluator.evaluate_vs_random(
-            self._agent_x, Player.PLAYER_X
-        )
-        print("\n--- 评估: AI (X) vs. 随机玩家 ---")
-        total_games = sum(x_vs_random_results.values())
-        print(
-            f"AI 胜率: {x_vs_random_results['wins']} / {total_games} ({(x_vs_random_results['wins'] / total_games) * 100:.2f}%)"
-        )
-        print(
-            f"AI 败率: {x_vs_random_results['losses']} / {total_games} ({(x_vs_random_results['losses'] / total_games) * 100:.2f}%)"
-        )
-        print(
-            f"平局率: {x_vs_random_results['draws']} / {total_games} ({(x_vs_random_results['draws'] / total_games) * 100:.2f}%)"
-        )
+    def _submit_evaluation(
+        self,
+        episode_idx: int,
+        stats: TrainingStats,
+        agent_x: QLearningAgent,
+        agent_o: QLearningAgent,
+    ) -> None:
+        if self._executor is None:
+            # spawn 而非 fork：子进程不继承主进程的线程与锁状态
+            self._executor = ProcessPoolExecutor(
+                self._max_pending_evaluations, mp_context=get_context("spawn")
+            )
+        if len(self._pending) >= self._max_pending_evaluations:
+            with self._measure(Phase.EVALUATION):
+                self._pending[0][1].result()  # 等待最早的评估完成
+            self._report_oldest_evaluation()
+        with self._measure(Phase.EVALUATION):
+            future = self._executor.submit(
+                evaluate,
+                agent_x,
+                agent_o,
+                self._evaluation_mode,
+                self.evaluation_games,
+                episode_idx,
+            )
+        self._pending.append((stats, future))
 
-        o_vs_random_results = Evaluator.evaluate_vs_random(
-            self._agent_o, Player.PLAYER_O
-        )
-        print("\n--- 评估: AI (O) vs. 随机玩家 ---")
-        total_games = sum(o_vs_random_results.values())
-        print(
-            f"AI 胜率: {o_vs_random_results['wins']} / {total_games} ({(o_vs_random_results['wins'] / total_games) * 100:.2f}%)"
-        )
+    def _report_finished_evaluations(self) -> None:
+        while self._pending and self._pending[0][1].done():
+            self._report_oldest_evaluation()
+
+    def _report_oldest_evaluation(self) -> None:
+        stats, future = self._pending.popleft()
+        self._report_evaluation(stats, future.result())
+
+    def drain(self) -> None:
+        """Wait for the pending evaluations and report them."""
+        while self._pending:
+            with self._measure(Phase.EVALUATION):
+                self._pending[0][1].result()
+            self._report_oldest_evaluation()
+
+    def close(self) -> None:
+        """Report the pending evaluations, stop the workers and flush the sinks.
+
+        If an evaluation failed, its error is raised after the remaining ones
+        are cancelled, the workers stopped and the sinks flushed.
+        """
+        try:
+            self.drain()
+        finally:
+            self._pending.clear()
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+                self._executor = None
+            for sink in self._sinks:
+                sink.flush()
+
+    def _measure(self, phase: Phase) -> AbstractContextManager[None]:
+        if self._timer is None:
+            return nullcontext()
+        return self._timer.measure(phase)
+
+    def _report_evaluation(self, stats: TrainingStats, evaluation: Evaluation) -> None:
+        record = EvaluationRecord(stats, evaluation)
+        with self._measure(Phase.REPORTING):
+            for sink in self._sinks:
+                sink.write(record)
+            if self._timer is not None:
+                self._timer.report()
+
+    def _run_snapshot(self, episode_idx: int, player: Player) -> QLearningAgent:
+        """Create a snapshot of the agent and offer it to the opponent pool."""
+        agent = self._agent_x if player == Player.PLAYER_X else self._agent_o
+        start = time.perf_counter()
+        with self._measure(Phase.SNAPSHOT):
+            snapshot = agent.snapshot()
+        elapsed_ms = (time.perf_counter() - start) * 1000
         print(
-            f"AI 败率: {o_vs_random_results['losses']} / {total_games} ({(o_vs_random_results['losses'] / total_games) * 100:.2f}%)"
+            f"--- [系统]: 在回合 {episode_idx + 1} 创建 '{player}' 代理的快照"
+            f" (耗时 {elapsed_ms:.2f} ms, 占用 {snapshot.q_table.nbytes / 1024:.1f} KiB) ---"
         )
+        pool = self._snapshot_pool
+        with self._measure(Phase.SNAPSHOT):
+            added = pool.add(snapshot)
+        if not added:
+            print("--- [系统]: 快照未加入对手池（策略与最新快照相同或被淘汰） ---")
         print(
-            f"平局率: {o_vs_random_results['draws']} / {total_games} ({(o_vs_random_results['draws'] / total_games) * 100:.2f}%)"
+            f"--- [系统]: 对手池 {len(pool[player.value])}/{pool.capacity},"
+            f" 共占用 {pool.nbytes / 1024:.1f} KiB ---"
         )
+        return snapshot
 
-        print(f"{'=' * 50}")
 
-    def _run_snapshot(self, episode_idx: int, player: Player) -> None:
-        """Create a snapshot of the agent and add it to the opponent pool."""
-        print(f"--- [系统]: 在回合 {episode_idx + 1} 创建 '{player}' 代理的快照 ---")
-        agent = self._agent_x if player == Player.PLAYER_X else self._agent_o
-        self._snapshot_pool[player.value].append(agent.snapshot())
+def evaluate(
+    agent_x: QLearningAgent,
+    agent_o: QLearningAgent,
+    mode: EvaluationMode,
+    num_games: int,
+    episode_idx: int,
+) -> Evaluation:
+    """Evaluate the agents against each other and against a random player.
+
+    Batched evaluations are seeded with ``episode_idx``. Exact evaluations
+    report rates instead of counts and ignore ``num_games``.
+    """
+    return Evaluation(
+        _evaluate_agents(agent_x, agent_o, mode, num_games, episode_idx),
+        _evaluate_vs_random(agent_x, Player.PLAYER_X, mode, num_games, episode_idx),
+        _evaluate_vs_random(agent_o, Player.PLAYER_O, mode, num_games, episode_idx),
+    )
+
+
+def _evaluate_agents(
+    agent_x: QLearningAgent,
+    agent_o: QLearningAgent,
+    mode: EvaluationMode,
+    num_games: int,
+    episode_idx: int,
+) -> Mapping[str, float]:
+    match mode:
+        case EvaluationMode.SCALAR:
+            return Evaluator.evaluate_agents(agent_x, agent_o, num_games)
+        case EvaluationMode.BATCHED:
+            return Evaluator.evaluate_agents_batched(
+                agent_x, agent_o, num_games, seed=episode_idx
+            )
+        case EvaluationMode.EXACT:
+            return rate_keyed(Evaluator.evaluate_agents_exact(agent_x, agent_o))
+
+
+def _evaluate_vs_random(
+    agent: QLearningAgent,
+    letter: Player,
+    mode: EvaluationMode,
+    num_games: int,
+    episode_idx: int,
+) -> Mapping[str, float]:
+    match mode:
+        case EvaluationMode.SCALAR:
+            return Evaluator.evaluate_vs_random(agent, letter, num_games)
+        case EvaluationMode.BATCHED:
+            return Evaluator.evaluate_vs_random_batched(
+                agent, letter, num_games, seed=episode_idx
+            )
+        case EvaluationMode.EXACT:
+            return rate_keyed(Evaluator.evaluate_vs_random_exact(agent, letter))
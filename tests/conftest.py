@@ -0,0 +1,17 @@
+from typing import Iterator
+
+import pytest
+
+from rl_tic_tac_toe.state_space import CACHE_DIR_ENV
+
+
+@pytest.fixture(autouse=True, scope="session")
+def state_space_cache_dir(tmp_path_factory: pytest.TempPathFactory) -> Iterator[None]:
+    """Keep the StateSpace cache out of the user's home directory.
+
+    The variable is set in ``os.environ``, so spawned worker processes
+    use the same directory.
+    """
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv(CACHE_DIR_ENV, str(tmp_path_factory.mktemp("cache")))
+        yield
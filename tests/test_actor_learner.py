@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from rl_tic_tac_toe.actor_learner import ActorLearner, SharedQTable
+from rl_tic_tac_toe.player import Player
+from rl_tic_tac_toe.q_learning_agent import QLearningAgent
+from rl_tic_tac_toe.q_table import DenseQTable, QTableBackend
+
+
+def make_agents() -> tuple[QLearningAgent, QLearningAgent]:
+    return (
+        QLearningAgent(Player.PLAYER_X, backend=QTableBackend.DENSE),
+        QLearningAgent(Player.PLAYER_O, backend=QTableBackend.DENSE),
+    )
+
+
+def test_shared_q_table_is_visible_across_attachments() -> None:
+    source = DenseQTable()
+    source.set(10, 3, 0.5)
+    shared = SharedQTable.create(source)
+    attached = SharedQTable.attach(shared.name)
+    try:
+        assert shared.table is not None and attached.table is not None
+        assert attached.table.get(10, 3) == 0.5  # noqa: PLR2004
+        shared.table.set(20, 1, -1.0)
+        assert attached.table.get(20, 1) == -1.0
+        assert sorted(attached.table) == [10, 20]
+    finally:
+        attached.close()
+        shared.close()
+        shared.unlink()
+
+
+def test_actor_learner_requires_dense_backend() -> None:
+    with pytest.raises(ValueError):
+        ActorLearner(QLearningAgent(Player.PLAYER_X), make_agents()[1], 1, seed=0)
+
+
+def test_actor_learner_trains_agents_and_counts_throughput() -> None:
+    agent_x, agent_o = make_agents()
+    agent_x.epsilon, agent_o.epsilon = 0.5, 0.5
+    actor_learner = ActorLearner(
+        agent_x, agent_o, 2, seed=0, queue_size=2, chunk_games=64
+    )
+    with actor_learner:
+        learned = sum(actor_learner.learn() for _ in range(6))
+    stats = actor_learner.stats()
+
+    assert learned == 6 * 64  # noqa: PLR2004
+    assert stats.learner_games == learned
+    assert len(stats.actor_games) == 2  # noqa: PLR2004
+    # actors may have produced more than was learned before being stopped
+    assert sum(stats.actor_games) >= learned
+    assert all(count > 0 for count in stats.actor_transitions)
+    # the agents keep private copies of the trained tables after close
+    assert isinstance(agent_x.q_table, DenseQTable)
+    assert len(agent_x.q_table) > 0 and len(agent_o.q_table) > 0
+    agent_x.update_q_table(0, 4, 1.0, 4, [])
+    assert np.isfinite(agent_x.q_values(np.array([0]))).all()
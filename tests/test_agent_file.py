@@ -0,0 +1,150 @@
+from pathlib import Path
+from random import Random
+
+import numpy as np
+import pytest
+
+from rl_tic_tac_toe.agent_file import (
+    HEADER,
+    AgentFileFormatError,
+    latest_agent_file,
+    load_agent,
+    new_agent_file,
+    save_agent,
+)
+from rl_tic_tac_toe.player import Player
+from rl_tic_tac_toe.q_learning_agent import QLearningAgent
+from rl_tic_tac_toe.q_table import DenseQTable, QTableBackend
+from rl_tic_tac_toe.tic_tac_toe_app import TicTacToeApp
+from rl_tic_tac_toe.training_episode import TrainingEpisode
+
+ALL_STATES = np.arange(3**9)
+
+
+def trained_agents(
+    backend: QTableBackend, use_symmetry: bool = False
+) -> tuple[QLearningAgent, QLearningAgent]:
+    agent_x = QLearningAgent(
+        Player.PLAYER_X,
+        alpha=0.3,
+        epsilon=0.2,
+        gamma=0.8,
+        rng=Random(0),
+        backend=backend,
+        use_symmetry=use_symmetry,
+    )
+    agent_o = QLearningAgent(
+        Player.PLAYER_O, rng=Random(1), backend=backend, use_symmetry=use_symmetry
+    )
+    for _ in range(200):
+        TrainingEpisode.run(agent_x, agent_o)
+    return agent_x, agent_o
+
+
+@pytest.mark.parametrize("backend", list(QTableBackend))
+def test_save_and_load_round_trip(tmp_path: Path, backend: QTableBackend) -> None:
+    agent, _ = trained_agents(backend, use_symmetry=True)
+    path = tmp_path / "x.tttq"
+    save_agent(agent, path)
+    loaded = load_agent(path)
+
+    assert loaded.player == Player.PLAYER_X
+    assert loaded.backend == backend
+    assert loaded.use_symmetry
+    assert (loaded.alpha, loaded.epsilon, loaded.gamma) == (0.3, 0.2, 0.8)
+    assert set(loaded.q_table) == set(agent.q_table)
+    np.testing.assert_array_equal(
+        loaded.q_values(ALL_STATES), agent.q_values(ALL_STATES)
+    )
+
+
+def test_load_with_other_backend(tmp_path: Path) -> None:
+    agent, _ = trained_agents(QTableBackend.DICT)
+    path = tmp_path / "x.tttq"
+    save_agent(agent, path)
+    loaded = load_agent(path, QTableBackend.DENSE)
+
+    assert isinstance(loaded.q_table, DenseQTable)
+    np.testing.assert_array_equal(
+        loaded.q_values(ALL_STATES), agent.q_values(ALL_STATES)
+    )
+
+
+def test_loaded_agent_learns_without_changing_file(tmp_path: Path) -> None:
+    agent_x, agent_o = trained_agents(QTableBackend.DENSE)
+    path = tmp_path / "x.tttq"
+    save_agent(agent_x, path)
+    saved = path.read_bytes()
+    loaded = load_agent(path)
+    for _ in range(50):
+        TrainingEpisode.run(loaded, agent_o)
+
+    assert path.read_bytes() == saved
+    assert not np.array_equal(
+        loaded.q_values(ALL_STATES), load_agent(path).q_values(ALL_STATES)
+    )
+
+
+def test_rejects_invalid_files(tmp_path: Path) -> None:
+    agent, _ = trained_agents(QTableBackend.DENSE)
+    path = tmp_path / "x.tttq"
+    save_agent(agent, path)
+    data = path.read_bytes()
+
+    path.write_bytes(b"XXXX" + data[4:])
+    with pytest.raises(AgentFileFormatError, match="not an agent file"):
+        load_agent(path)
+    path.write_bytes(data[:4] + (99).to_bytes(2, "little") + data[6:])
+    with pytest.raises(AgentFileFormatError, match="unsupported version"):
+        load_agent(path)
+    path.write_bytes(data[:-1])
+    with pytest.raises(AgentFileFormatError, match="size mismatch"):
+        load_agent(path)
+    path.write_bytes(data[: HEADER.size - 1])
+    with pytest.raises(AgentFileFormatError, match="truncated header"):
+        load_agent(path)
+
+
+def test_save_without_replace_keeps_existing_file(tmp_path: Path) -> None:
+    path = tmp_path / "agent.tttq"
+    agent_x, _ = trained_agents(QTableBackend.DICT)
+    save_agent(agent_x, path)
+    data = path.read_bytes()
+
+    with pytest.raises(FileExistsError):
+        save_agent(QLearningAgent(Player.PLAYER_X), path, replace=False)
+    assert path.read_bytes() == data
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_new_agent_file_names_are_unique_and_ordered(tmp_path: Path) -> None:
+    agent = QLearningAgent(Player.PLAYER_X)
+    paths = []
+    for _ in range(3):
+        path = new_agent_file(tmp_path, Player.PLAYER_X)
+        save_agent(agent, path, replace=False)
+        paths.append(path)
+    assert paths == sorted(set(paths))
+    assert latest_agent_file(tmp_path, Player.PLAYER_X) == paths[-1]
+
+    # 时钟回拨时新文件名仍排在最新的保存之后
+    future = tmp_path / "29990101-000000-000000-X.tttq"
+    save_agent(agent, future)
+    assert new_agent_file(tmp_path, Player.PLAYER_X).name == (
+        "29990101-000000-000001-X.tttq"
+    )
+
+
+def test_app_loads_latest_saved_agents(tmp_path: Path) -> None:
+    assert TicTacToeApp(tmp_path)._agent_x.q_table.nbytes < 1024  # noqa: PLR2004
+    agent_x, agent_o = trained_agents(QTableBackend.DICT)
+    save_agent(QLearningAgent(Player.PLAYER_X), tmp_path / "20240101-000000-X.tttq")
+    save_agent(agent_x, tmp_path / "20250101-000000-X.tttq")
+    save_agent(agent_o, tmp_path / "20250101-000000-O.tttq")
+
+    assert latest_agent_file(tmp_path, Player.PLAYER_X) == (
+        tmp_path / "20250101-000000-X.tttq"
+    )
+    app = TicTacToeApp(tmp_path)
+    assert len(app._agent_x.q_table) == len(agent_x.q_table)
+    assert len(app._agent_o.q_table) == len(agent_o.q_table)
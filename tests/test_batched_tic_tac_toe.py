@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+from rl_tic_tac_toe.batched_tic_tac_toe import (
+    EMPTY,
+    O,
+    X,
+    BatchedTicTacToe,
+    epsilon_greedy_actions,
+    legal_masks_of_states,
+    masked_greedy_actions,
+    random_legal_actions,
+)
+from rl_tic_tac_toe.player import Player
+from rl_tic_tac_toe.tic_tac_toe import TicTacToe
+
+
+@pytest.fixture
+def rng() -> np.random.Generator:
+    return np.random.default_rng(0)
+
+
+def test_step_matches_scalar_game() -> None:
+    """Each board follows the same rules and state ids as TicTacToe."""
+    games = [[0, 3, 1, 4, 2], [4, 0, 8, 2, 1, 7, 6, 5, 3]]
+    env = BatchedTicTacToe(2, auto_reset=False)
+    scalar = [TicTacToe(), TicTacToe()]
+    for ply in range(9):
+        rows = np.array([i for i, g in enumerate(games) if ply < len(g)])
+        actions = np.array([games[i][ply] for i in rows])
+        result = env.step(actions, rows)
+        for k, i in enumerate(rows):
+            player = Player.PLAYER_X if ply % 2 == 0 else Player.PLAYER_O
+            scalar[i].make_move(games[i][ply], player)
+            assert result.state_ids[k] == scalar[i].state_id
+            assert result.done[k] == scalar[i].is_ended()
+    assert env.winners.tolist() == [X, EMPTY]
+    assert env.done.all()
+    assert not env.legal_masks().any()
+
+
+def test_auto_reset() -> None:
+    env = BatchedTicTacToe(1, auto_reset=True)
+    for action in [0, 3, 1, 4]:
+        assert not env.step(np.array([action])).done[0]
+    result = env.step(np.array([2]))
+    assert result.done[0] and result.winners[0] == X
+    assert result.state_ids[0] != 0
+    assert env.state_ids[0] == 0
+    assert env.to_move[0] == X
+    assert env.legal_masks().all()
+
+
+def test_illegal_move_is_rejected() -> None:
+    env = BatchedTicTacToe(1)
+    env.step(np.array([4]))
+    assert env.to_move[0] == O
+    with pytest.raises(AssertionError):
+        env.step(np.array([4]))
+
+
+def test_legal_masks_of_states() -> None:
+    game = TicTacToe()
+    game.make_move(2, Player.PLAYER_X)
+    game.make_move(7, Player.PLAYER_O)
+    masks = legal_masks_of_states(np.array([0, game.state_id]))
+    assert masks[0].all()
+    assert np.flatnonzero(~masks[1]).tolist() == [2, 7]
+
+
+def test_masked_greedy_breaks_ties_randomly(rng: np.random.Generator) -> None:
+    q_values = np.zeros((2000, 9), dtype=np.float32)
+    q_values[:, 0] = 5.0  # 非法动作，不能被选中
+    q_values[:, [3, 6]] = 1.0
+    legal = np.ones((2000, 9), dtype=np.bool_)
+    legal[:, 0] = False
+    actions = masked_greedy_actions(q_values, legal, rng)
+    assert set(actions.tolist()) == {3, 6}
+    assert 0.4 < (actions == 3).mean() < 0.6  # noqa: PLR2004
+
+
+def test_random_and_epsilon_greedy_respect_legal_moves(
+    rng: np.random.Generator,
+) -> None:
+    legal = np.zeros((1000, 9), dtype=np.bool_)
+    legal[:, [1, 5, 8]] = True
+    assert set(random_legal_actions(legal, rng).tolist()) == {1, 5, 8}
+
+    q_values = np.zeros((1000, 9), dtype=np.float32)
+    q_values[:, 5] = 1.0
+    greedy = epsilon_greedy_actions(q_values, legal, 0.0, rng)
+    assert (greedy == 5).all()  # noqa: PLR2004
+    explored = epsilon_greedy_actions(q_values, legal, 1.0, rng)
+    assert set(explored.tolist()) == {1, 5, 8}
@@ -0,0 +1,83 @@
+from random import Random
+
+import numpy as np
+import numpy.typing as npt
+
+from rl_tic_tac_toe.batched_training_episode import (
+    BatchedTrainingEpisode,
+    TransitionBatch,
+    play_self_play_batch,
+)
+from rl_tic_tac_toe.player import Player
+from rl_tic_tac_toe.q_learning_agent import QLearningAgent
+from rl_tic_tac_toe.q_table import QTableBackend
+from rl_tic_tac_toe.tic_tac_toe import encode_board
+
+
+class LowestSquareActor:
+    """Greedy actor that always plays the lowest empty square."""
+
+    epsilon = 0.0
+
+    def q_values(self, states: npt.NDArray[np.int64]) -> npt.NDArray[np.float32]:
+        return np.tile(-np.arange(9, dtype=np.float32), (len(states), 1))
+
+
+def test_rewards_follow_scalar_episode_rules() -> None:
+    """X plays 0, 2, 4, 6 and wins on the 2-4-6 diagonal."""
+    received: dict[Player, list[TransitionBatch]] = {
+        Player.PLAYER_X: [],
+        Player.PLAYER_O: [],
+    }
+    play_self_play_batch(
+        LowestSquareActor(),
+        LowestSquareActor(),
+        1,
+        np.random.default_rng(0),
+        lambda player, batch: received[player].append(batch),
+    )
+    x_batch = TransitionBatch.concatenate(received[Player.PLAYER_X])
+    o_batch = TransitionBatch.concatenate(received[Player.PLAYER_O])
+
+    assert x_batch.actions.tolist() == [0, 2, 4, 6]
+    assert x_batch.rewards.tolist() == [0, 0, 0, 1]
+    assert o_batch.actions.tolist() == [1, 3, 5]
+    assert o_batch.rewards.tolist() == [0, 0, -1]
+
+    # 局中更新：下一状态是对手落子后的局面，合法动作为空位
+    assert x_batch.states[1] == encode_board("XO       ")
+    assert x_batch.next_states[0] == encode_board("XO       ")
+    assert x_batch.next_legal_masks[0].sum() == 7  # noqa: PLR2004
+    # 终局更新：没有后续动作
+    final = encode_board("XOXOXOX  ")
+    assert x_batch.next_states[-1] == final
+    assert o_batch.next_states[-1] == final
+    assert not x_batch.next_legal_masks[-1].any()
+    assert not o_batch.next_legal_masks[-1].any()
+
+
+def test_every_decision_is_updated_exactly_once() -> None:
+    moves = {Player.PLAYER_X: 0, Player.PLAYER_O: 0}
+
+    def count(player: Player, batch: TransitionBatch) -> None:
+        moves[player] += len(batch)
+
+    agent_x = QLearningAgent(Player.PLAYER_X, rng=Random(0))
+    agent_o = QLearningAgent(Player.PLAYER_O, rng=Random(1))
+    play_self_play_batch(
+        agent_x, agent_o, 300, np.random.default_rng(0), count, num_envs=64
+    )
+    # X 每局比 O 多走 0 或 1 步，每局至少 5 步
+    assert 300 * 3 <= moves[Player.PLAYER_X] <= 300 * 5
+    assert 0 <= moves[Player.PLAYER_X] - moves[Player.PLAYER_O] <= 300  # noqa: PLR2004
+
+
+def test_batched_episode_trains_agents_but_not_snapshots() -> None:
+    agent_x = QLearningAgent(
+        Player.PLAYER_X, rng=Random(0), backend=QTableBackend.DENSE
+    )
+    agent_o = QLearningAgent(Player.PLAYER_O, rng=Random(1))
+    snapshot_o = agent_o.snapshot()
+    BatchedTrainingEpisode.run(agent_x, snapshot_o, 200, np.random.default_rng(0))
+    assert len(agent_x.q_table) > 0
+    assert len(snapshot_o.q_table) == 0
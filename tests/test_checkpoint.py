@@ -0,0 +1,81 @@
+from pathlib import Path
+from random import Random
+
+import pytest
+
+from rl_tic_tac_toe.checkpoint import (
+    HEADER,
+    Checkpoint,
+    CheckpointFormatError,
+    CheckpointWriter,
+    checkpoint_path,
+    dump_checkpoint,
+    latest_checkpoint,
+    load_checkpoint,
+    write_checkpoint,
+)
+from rl_tic_tac_toe.player import Player
+from rl_tic_tac_toe.q_learning_agent import QLearningAgent
+from rl_tic_tac_toe.training_loop import TrainingLoopParams
+
+
+def make_checkpoint(episode: int) -> Checkpoint:
+    rng = Random(7)
+    agent_x = QLearningAgent(Player.PLAYER_X, rng=rng)
+    agent_o = QLearningAgent(Player.PLAYER_O, rng=rng)
+    agent_x.update_q_table(0, 4, 1.0, 4, [])
+    return Checkpoint(episode, TrainingLoopParams(100, agent_x, agent_o), rng)
+
+
+def test_write_and_load(tmp_path: Path) -> None:
+    path = checkpoint_path(tmp_path, 50)
+    write_checkpoint(dump_checkpoint(make_checkpoint(50)), path)
+
+    checkpoint = load_checkpoint(path)
+    assert checkpoint.episode == 50  # noqa: PLR2004
+    assert checkpoint.params.agent_x.q_table.get(0, 4) > 0
+    # 共享的对象加载后仍然共享
+    assert checkpoint.params.agent_x.rng is checkpoint.rng
+    assert checkpoint.params.agent_o.rng is checkpoint.rng
+    assert checkpoint.rng.random() == Random(7).random()
+    assert not path.with_name(path.name + ".partial").exists()
+
+
+def test_load_rejects_bad_files(tmp_path: Path) -> None:
+    path = tmp_path / "bad.ckpt"
+    path.write_bytes(b"TTT")
+    with pytest.raises(CheckpointFormatError, match="truncated"):
+        load_checkpoint(path)
+
+    path.write_bytes(b"XXXX" + bytes(HEADER.size))
+    with pytest.raises(CheckpointFormatError, match="not a checkpoint"):
+        load_checkpoint(path)
+
+    data = dump_checkpoint(make_checkpoint(1))
+    path.write_bytes(data[:-1])
+    with pytest.raises(CheckpointFormatError, match="size mismatch"):
+        load_checkpoint(path)
+
+
+def test_writer_keeps_newest_checkpoints(tmp_path: Path) -> None:
+    assert latest_checkpoint(tmp_path) is None
+
+    with CheckpointWriter(tmp_path, keep=2) as writer:
+        for episode in (100, 200, 300):
+            writer.submit(make_checkpoint(episode))
+
+    assert sorted(tmp_path.iterdir()) == [
+        checkpoint_path(tmp_path, 200),
+        checkpoint_path(tmp_path, 300),
+    ]
+    assert latest_checkpoint(tmp_path) == checkpoint_path(tmp_path, 300)
+
+
+def test_writer_reports_write_errors(tmp_path: Path) -> None:
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    writer = CheckpointWriter(blocker / "checkpoints")
+    writer.submit(make_checkpoint(1))
+
+    with pytest.raises(OSError):
+        writer.close()
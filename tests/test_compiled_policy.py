@@ -0,0 +1,101 @@
+from pathlib import Path
+from random import Random
+
+import numpy as np
+import pytest
+
+from rl_tic_tac_toe.action_policy import ActionPolicy
+from rl_tic_tac_toe.compiled_policy import CompiledPolicy
+from rl_tic_tac_toe.evaluator import Evaluator
+from rl_tic_tac_toe.game_battle import GameBattle
+from rl_tic_tac_toe.game_record import COMPILED_POLICY_ID, GameRecords, GameRecordWriter
+from rl_tic_tac_toe.player import Player
+from rl_tic_tac_toe.q_learning_agent import QLearningAgent
+from rl_tic_tac_toe.tic_tac_toe import TicTacToe
+from rl_tic_tac_toe.training_episode import TrainingEpisode
+
+
+@pytest.fixture(scope="module")
+def agents() -> tuple[QLearningAgent, QLearningAgent]:
+    agent_x = QLearningAgent(Player.PLAYER_X, rng=Random(0))
+    agent_o = QLearningAgent(Player.PLAYER_O, rng=Random(1))
+    for _ in range(2000):
+        TrainingEpisode.run(agent_x, agent_o)
+    return agent_x, agent_o
+
+
+def test_compiled_policy_plays_like_the_agent(
+    agents: tuple[QLearningAgent, QLearningAgent],
+) -> None:
+    agent_x, agent_o = agents
+    compiled_x = CompiledPolicy.compile(agent_x)
+    compiled_o = CompiledPolicy.compile(agent_o)
+
+    assert compiled_x.player == Player.PLAYER_X
+    assert compiled_x.nbytes == 2 * 3**9
+    assert Evaluator.evaluate_agents_exact(
+        compiled_x, compiled_o
+    ) == Evaluator.evaluate_agents_exact(agent_x, agent_o)
+    assert Evaluator.evaluate_vs_random_exact(
+        compiled_o, Player.PLAYER_O
+    ) == Evaluator.evaluate_vs_random_exact(agent_o, Player.PLAYER_O)
+    assert Evaluator.evaluate_agents_batched(
+        compiled_x, compiled_o, 500, seed=3
+    ) == Evaluator.evaluate_agents_batched(agent_x, agent_o, 500, seed=3)
+
+
+def test_choose_action_picks_a_best_move(
+    agents: tuple[QLearningAgent, QLearningAgent],
+) -> None:
+    agent_x, _ = agents
+    compiled = CompiledPolicy.compile(agent_x)
+    game = TicTacToe()
+    game.make_move(4, Player.PLAYER_X)
+    game.make_move(0, Player.PLAYER_O)
+    best = agent_x.best_actions(game.state_id, game.empty_cells())
+
+    assert compiled.choose_action(game, ActionPolicy.GREEDY) in best
+    with pytest.raises(ValueError, match="only plays greedily"):
+        compiled.choose_action(game, ActionPolicy.EPSILON_GREEDY)
+
+
+def test_unknown_states_allow_every_legal_move() -> None:
+    compiled = CompiledPolicy(Player.PLAYER_X, np.zeros(3**9, dtype=np.uint16))
+    legal = np.array([[True, False] * 4 + [True]])
+
+    assert compiled.best_actions(0, [2, 5]) == [2, 5]
+    np.testing.assert_array_equal(
+        compiled.best_action_masks(np.array([0]), legal), legal
+    )
+
+
+def test_save_and_load(
+    tmp_path: Path, agents: tuple[QLearningAgent, QLearningAgent]
+) -> None:
+    compiled = CompiledPolicy.compile(agents[0])
+    path = tmp_path / "x.npy"
+    compiled.save(path)
+    loaded = CompiledPolicy.load(path, Player.PLAYER_X)
+
+    assert Evaluator.evaluate_vs_random_exact(
+        loaded, Player.PLAYER_X
+    ) == Evaluator.evaluate_vs_random_exact(compiled, Player.PLAYER_X)
+    np.save(path, np.zeros(3, dtype=np.uint16))
+    with pytest.raises(ValueError, match="not a compiled policy"):
+        CompiledPolicy.load(path, Player.PLAYER_X)
+
+
+def test_game_battle_records_compiled_policies(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    agents: tuple[QLearningAgent, QLearningAgent],
+) -> None:
+    monkeypatch.setattr("time.sleep", lambda _: None)  # pyright: ignore[reportUnknownLambdaType, reportUnknownArgumentType]
+    path = tmp_path / "games.ttt"
+    with GameRecordWriter(path, with_metadata=True) as writer:
+        GameBattle.ai_vs_ai(
+            CompiledPolicy.compile(agents[0]), agents[1], record_writer=writer
+        )
+
+    records = GameRecords(path)
+    assert records.records["snapshot_ids"].tolist() == [[COMPILED_POLICY_ID, 0]]
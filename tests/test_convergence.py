@@ -0,0 +1,83 @@
+from rl_tic_tac_toe.convergence import ConvergenceTracker
+from rl_tic_tac_toe.training_metrics import (
+    Evaluation,
+    EvaluationRecord,
+    TrainingStats,
+)
+
+
+def make_record(
+    episode: int, mean_delta_q: float, policy_change: float, draws: float
+) -> EvaluationRecord:
+    return EvaluationRecord(
+        TrainingStats(
+            episode=episode,
+            episodes=1000,
+            alpha_x=0.1,
+            alpha_o=0.1,
+            epsilon_x=0.1,
+            epsilon_o=0.1,
+            q_table_size_x=100,
+            q_table_size_o=100,
+            pool_size_x=1,
+            pool_size_o=1,
+            episodes_per_second=1000.0,
+            max_delta_q=mean_delta_q * 10,
+            mean_delta_q=mean_delta_q,
+            policy_change_x=policy_change,
+            policy_change_o=policy_change / 2,
+        ),
+        Evaluation(
+            {"x_wins": 1000 - draws, "o_wins": 0, "draws": draws},
+            {"wins": 1000, "losses": 0, "draws": 0},
+            {"wins": 1000, "losses": 0, "draws": 0},
+        ),
+    )
+
+
+def test_converges_after_patience_windows() -> None:
+    tracker = ConvergenceTracker(patience=2)
+
+    tracker.write(make_record(100, 0.001, 0.0, 1000))  # 还没有上一次的平局率
+    assert tracker.streak == 0
+    tracker.write(make_record(200, 0.001, 0.0, 1000))
+    assert tracker.streak == 1
+    assert not tracker.converged
+    tracker.write(make_record(300, 0.001, 0.0, 995))
+    assert tracker.converged
+    assert tracker.converged_at == 300  # noqa: PLR2004
+    assert tracker.reason is not None and "平均 |ΔQ| ≤ 0.01" in tracker.reason
+
+    # 判定收敛之后不再改变
+    tracker.write(make_record(400, 0.5, 0.5, 0))
+    assert tracker.converged_at == 300  # noqa: PLR2004
+
+
+def test_any_failed_condition_resets_the_streak() -> None:
+    tracker = ConvergenceTracker(patience=3)
+    tracker.write(make_record(100, 0.001, 0.0, 1000))
+    tracker.write(make_record(200, 0.001, 0.0, 1000))
+    tracker.write(make_record(300, 0.001, 0.0, 1000))
+    assert tracker.streak == 2  # noqa: PLR2004
+
+    tracker.write(make_record(400, 0.001, 0.05, 1000))  # 贪心策略变化过大
+    assert tracker.streak == 0
+    tracker.write(make_record(500, 0.02, 0.0, 1000))  # |ΔQ| 过大
+    assert tracker.streak == 0
+    tracker.write(make_record(600, 0.001, 0.0, 900))  # 平局率变化过大
+    assert tracker.streak == 0
+    assert not tracker.converged
+
+
+def test_unchecked_thresholds() -> None:
+    tracker = ConvergenceTracker(
+        max_delta_q=0.05,
+        mean_delta_q=None,
+        policy_change=None,
+        draw_rate_change=None,
+        patience=1,
+    )
+    tracker.write(make_record(100, 0.01, 1.0, 0))  # 最大 |ΔQ| 为 0.1
+    assert not tracker.converged
+    tracker.write(make_record(200, 0.001, 1.0, 500))
+    assert tracker.converged_at == 200  # noqa: PLR2004
@@ -1,10 +1,16 @@
+from random import Random
 from unittest.mock import MagicMock
 
+import numpy as np
+import numpy.typing as npt
 import pytest
 
+from rl_tic_tac_toe.action_policy import ActionPolicy
+
 from rl_tic_tac_toe.evaluator import Evaluator
 from rl_tic_tac_toe.player import Player
 from rl_tic_tac_toe.q_learning_agent import QLearningAgent
+from rl_tic_tac_toe.tic_tac_toe import TicTacToe
 
 
 @pytest.fixture
@@ -46,3 +52,81 @@ def test_evaluate_vs_random(monkeypatch: pytest.MonkeyPatch) -> None:
     result = Evaluator.evaluate_vs_random(agent_to_test, agent_letter, num_games=2)
 
     assert result == {"wins": 1, "losses": 1, "draws": 0}
+
+
+class LowestSquareAgent(QLearningAgent):
+    """Greedy agent whose unique best move is the lowest empty square."""
+
+    def q_values(self, states: npt.NDArray[np.int64]) -> npt.NDArray[np.float32]:
+        return np.tile(-np.arange(9, dtype=np.float32), (len(states), 1))
+
+    def best_actions(self, state: int, actions: list[int]) -> list[int]:
+        return [min(actions)]
+
+    def choose_action(self, game: TicTacToe, policy: ActionPolicy) -> int:
+        return game.empty_cells()[0]
+
+
+def test_evaluate_agents_batched_matches_scalar_for_deterministic_agents() -> None:
+    agent_x = LowestSquareAgent(Player.PLAYER_X)
+    agent_o = LowestSquareAgent(Player.PLAYER_O)
+    scalar = Evaluator.evaluate_agents(agent_x, agent_o, num_games=10)
+    batched = Evaluator.evaluate_agents_batched(agent_x, agent_o, 10, seed=0)
+    assert batched == scalar == {"x_wins": 10, "o_wins": 0, "draws": 0}
+
+
+def test_evaluate_vs_random_batched_is_reproducible_and_close_to_scalar() -> None:
+    """An untrained agent ties everywhere, so both sides play uniformly at random."""
+    agent = QLearningAgent(Player.PLAYER_X, rng=Random(0))
+    num_games = 4000
+    first = Evaluator.evaluate_vs_random_batched(agent, Player.PLAYER_X, num_games, 7)
+    second = Evaluator.evaluate_vs_random_batched(agent, Player.PLAYER_X, num_games, 7)
+    assert first == second
+    assert sum(first.values()) == num_games
+
+    scalar = Evaluator.evaluate_vs_random(agent, Player.PLAYER_X, num_games)
+    for key in ("wins", "losses", "draws"):
+        assert abs(first[key] - scalar[key]) / num_games < 0.04  # noqa: PLR2004
+
+
+def test_evaluate_agents_batched_counts_all_games() -> None:
+    agent_x = QLearningAgent(Player.PLAYER_X, rng=Random(0))
+    agent_o = QLearningAgent(Player.PLAYER_O, rng=Random(1))
+    results = Evaluator.evaluate_agents_batched(agent_x, agent_o, 500, seed=1)
+    assert sum(results.values()) == 500  # noqa: PLR2004
+    # random self-play: X wins more often than O
+    assert results["x_wins"] > results["o_wins"]
+
+
+def test_exact_evaluation_of_random_play() -> None:
+    """Untrained agents tie everywhere, i.e. play uniformly at random."""
+    agent_x = QLearningAgent(Player.PLAYER_X)
+    agent_o = QLearningAgent(Player.PLAYER_O)
+    results = Evaluator.evaluate_agents_exact(agent_x, agent_o)
+    # 随机对随机的已知结果：X 胜约 58.49%，O 胜约 28.81%，平局约 12.70%
+    assert results["x_wins"] == pytest.approx(0.58492, abs=1e-4)  # pyright: ignore[reportUnknownMemberType]
+    assert results["o_wins"] == pytest.approx(0.28809, abs=1e-4)  # pyright: ignore[reportUnknownMemberType]
+    assert sum(results.values()) == pytest.approx(1.0)  # pyright: ignore[reportUnknownMemberType]
+
+    counts = Evaluator.evaluate_vs_random_exact(agent_o, Player.PLAYER_O, 1000)
+    assert counts["wins"] == pytest.approx(1000 * results["o_wins"])  # pyright: ignore[reportUnknownMemberType]
+    assert counts["losses"] == pytest.approx(1000 * results["x_wins"])  # pyright: ignore[reportUnknownMemberType]
+
+
+def test_exact_evaluation_of_deterministic_agents() -> None:
+    agent_x = LowestSquareAgent(Player.PLAYER_X)
+    agent_o = LowestSquareAgent(Player.PLAYER_O)
+    assert Evaluator.evaluate_agents_exact(agent_x, agent_o, 10) == {
+        "x_wins": 10.0,
+        "o_wins": 0.0,
+        "draws": 0.0,
+    }
+
+
+def test_exact_evaluation_matches_sampling() -> None:
+    agent = QLearningAgent(Player.PLAYER_X, rng=Random(0))
+    agent.update_q_table(0, 4, 1.0, 0, [])  # 先手总是占中心
+    exact = Evaluator.evaluate_vs_random_exact(agent, Player.PLAYER_X, 4000)
+    sampled = Evaluator.evaluate_vs_random_batched(agent, Player.PLAYER_X, 4000, 3)
+    for key in ("wins", "losses", "draws"):
+        assert abs(exact[key] - sampled[key]) < 4000 * 0.03  # noqa: PLR2004
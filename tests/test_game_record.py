@@ -0,0 +1,102 @@
+from pathlib import Path
+from random import Random
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from rl_tic_tac_toe.evaluator import Evaluator
+from rl_tic_tac_toe.game_battle import GameBattle
+from rl_tic_tac_toe.game_record import (
+    HEADER,
+    NO_MOVE,
+    RANDOM_PLAYER_ID,
+    RECORD_DTYPE,
+    GameRecordFormatError,
+    GameRecords,
+    GameRecordWriter,
+)
+from rl_tic_tac_toe.player import Player
+from rl_tic_tac_toe.q_learning_agent import QLearningAgent
+from rl_tic_tac_toe.tic_tac_toe import TicTacToe
+from rl_tic_tac_toe.training_episode import TrainingEpisode
+
+
+def replay(moves: np.ndarray) -> TicTacToe:
+    game = TicTacToe()
+    player = Player.PLAYER_X
+    for move in moves[moves != NO_MOVE].tolist():
+        assert game.make_move(move, player)
+        player = player.opponent()
+    return game
+
+
+def test_write_and_read_back(tmp_path: Path) -> None:
+    path = tmp_path / "games.ttt"
+    with GameRecordWriter(path, with_metadata=True, buffer_games=2) as writer:
+        writer.write([0, 3, 1, 4, 2], 1, (0, 3), (0.5, 0.0))
+        writer.write([4, 0, 8], 0)
+        writer.write_many(
+            np.array([[4] + [NO_MOVE] * 8], dtype=np.uint8),
+            np.array([2], dtype=np.uint8),
+        )
+    records = GameRecords(path)
+
+    assert len(records) == 3  # noqa: PLR2004
+    assert records.has_metadata
+    assert records.moves[0].tolist() == [0, 3, 1, 4, 2] + [NO_MOVE] * 4
+    assert records.results.tolist() == [1, 0, 2]
+    assert records.records["snapshot_ids"][0].tolist() == [0, 3]
+    assert records.records["epsilons"][0].tolist() == [0.5, 0.0]
+    assert [len(chunk) for chunk in records.chunks(2)] == [2, 1]
+    assert isinstance(records.records, np.memmap)
+
+
+def test_append_keeps_existing_games_and_drops_torn_record(tmp_path: Path) -> None:
+    path = tmp_path / "games.ttt"
+    with GameRecordWriter(path) as writer:
+        writer.write([0, 3, 1, 4, 2], 1)
+    with open(path, "ab") as file:
+        file.write(b"\x04\x00")  # a record cut short by a crash
+    assert len(GameRecords(path)) == 1
+    with GameRecordWriter(path) as writer:
+        writer.write([4], 0)
+
+    assert path.stat().st_size == HEADER.size + 2 * RECORD_DTYPE.itemsize
+    assert GameRecords(path).results.tolist() == [1, 0]
+    with pytest.raises(GameRecordFormatError):
+        GameRecordWriter(path, with_metadata=True)
+
+
+def test_reader_rejects_other_files(tmp_path: Path) -> None:
+    path = tmp_path / "not_records.bin"
+    path.write_bytes(b"x" * 64)
+    with pytest.raises(GameRecordFormatError):
+        GameRecords(path)
+
+
+def test_training_episode_and_evaluator_records_replay(tmp_path: Path) -> None:
+    agent_x = QLearningAgent(Player.PLAYER_X, rng=Random(0))
+    agent_o = QLearningAgent(Player.PLAYER_O, rng=Random(1))
+    path = tmp_path / "games.ttt"
+    with GameRecordWriter(path, with_metadata=True) as writer:
+        for _ in range(20):
+            TrainingEpisode.run(agent_x, agent_o.snapshot(), writer)
+        Evaluator.evaluate_vs_random(agent_x, Player.PLAYER_X, 10, writer)
+        Evaluator.evaluate_agents_batched(agent_x, agent_o, 10, 0, writer)
+        with patch("time.sleep"), patch("builtins.print"):
+            GameBattle.ai_vs_ai(agent_x, agent_o, writer)
+    records = GameRecords(path)
+
+    assert len(records) == 41  # noqa: PLR2004
+    for moves, result in zip(records.moves, records.results.tolist()):
+        game = replay(moves)
+        assert game.is_ended()
+        winner = game.current_winner
+        assert result == (
+            0 if winner is None else 1 if winner == Player.PLAYER_X else 2
+        )
+    snapshot_ids = records.records["snapshot_ids"]
+    assert snapshot_ids[0].tolist() == [0, 1]
+    assert snapshot_ids[20].tolist() == [0, RANDOM_PLAYER_ID]
+    assert records.records["epsilons"][0, 0] == 1.0
@@ -1,4 +1,5 @@
 # tests/test_learning_param_scheduler.py
+import numpy as np
 import pytest
 
 from rl_tic_tac_toe.learning_param_scheduler import (
@@ -55,3 +56,93 @@ def test_decay_property_default_calculation() -> None:
 def test_current_property_initial(scheduler: LearningParamScheduler) -> None:
     # Current should equal the start value upon initialization
     assert scheduler.current == scheduler.start
+
+
+def test_compress_reaches_min_sooner(scheduler: LearningParamScheduler) -> None:
+    scheduler.update(0)
+    scheduler.compress(1, 2)
+
+    scheduler.update(1)
+    assert scheduler.current > scheduler.min
+    assert pytest.approx(scheduler.update(2)) == scheduler.min  # pyright: ignore[reportUnknownMemberType]
+    assert scheduler.update(3) == scheduler.min
+
+
+@pytest.mark.parametrize("policy", list(LearningParamSchedulerPolicy))
+def test_policies_decay_from_start_to_min(
+    policy: LearningParamSchedulerPolicy,
+) -> None:
+    sched = LearningParamScheduler(100, 0.9, 0.05, policy=policy)
+    values = [sched.value_at(i) for i in range(-1, 120)]
+
+    assert values[0] == 0.9  # noqa: PLR2004
+    assert values[50] < values[0]
+    assert all(a >= b for a, b in zip(values, values[1:]))
+    assert pytest.approx(sched.value_at(99)) == 0.05  # pyright: ignore[reportUnknownMemberType]
+    assert sched.value_at(119) == 0.05  # noqa: PLR2004
+
+
+@pytest.mark.parametrize("policy", list(LearningParamSchedulerPolicy))
+def test_values_match_value_at(policy: LearningParamSchedulerPolicy) -> None:
+    sched = LearningParamScheduler(50, 1.0, 0.1, policy=policy, step_episodes=7)
+    indices = np.arange(-1, 80)
+
+    expected = [sched.value_at(int(i)) for i in indices]
+    assert np.allclose(sched.values(indices), expected)
+
+
+def test_value_at_jumps_ahead_of_update() -> None:
+    sched = LearningParamScheduler(1000, 1.0, 0.01)
+    for episode_idx in range(600):
+        current = sched.update(episode_idx)
+
+    assert current == sched.value_at(599)
+    assert pytest.approx(sched.value_at(599)) == sched.decay**600  # pyright: ignore[reportUnknownMemberType]
+
+
+def test_step_policy_decays_every_step() -> None:
+    sched = LearningParamScheduler(
+        100, 0.8, 0.1, decay_value=0.5, policy=LearningParamSchedulerPolicy.STEP
+    )
+    assert sched.step_episodes == 10  # noqa: PLR2004
+    assert sched.value_at(8) == 0.8  # 9 局之后  # noqa: PLR2004
+    assert sched.value_at(9) == 0.4  # noqa: PLR2004
+    assert sched.value_at(19) == 0.2  # noqa: PLR2004
+    assert sched.value_at(29) == 0.1  # noqa: PLR2004
+
+
+def test_explicit_decay_rates() -> None:
+    linear = LearningParamScheduler(
+        10, 1.0, 0.0, decay_value=0.25, policy=LearningParamSchedulerPolicy.LINEAR
+    )
+    assert linear.value_at(1) == 0.5  # noqa: PLR2004
+    assert linear.value_at(3) == 0.0
+
+    inverse = LearningParamScheduler(
+        10,
+        1.0,
+        0.0,
+        decay_value=1.0,
+        policy=LearningParamSchedulerPolicy.INVERSE_TIME,
+    )
+    assert inverse.value_at(3) == 0.2  # noqa: PLR2004
+
+    with pytest.raises(AssertionError):
+        LearningParamScheduler(
+            10, 1.0, 0.1, decay_value=0.5, policy=LearningParamSchedulerPolicy.COSINE
+        )
+    with pytest.raises(AssertionError):
+        LearningParamScheduler(
+            10, 1.0, 0.0, policy=LearningParamSchedulerPolicy.INVERSE_TIME
+        )
+
+
+@pytest.mark.parametrize("policy", list(LearningParamSchedulerPolicy))
+def test_compress_each_policy(policy: LearningParamSchedulerPolicy) -> None:
+    sched = LearningParamScheduler(1000, 1.0, 0.01, policy=policy)
+    before = sched.value_at(99)
+    sched.compress(100, 50)
+
+    assert sched.value_at(99) == before
+    assert sched.value_at(110) < before
+    assert pytest.approx(sched.value_at(149)) == 0.01  # pyright: ignore[reportUnknownMemberType]
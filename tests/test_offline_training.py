@@ -0,0 +1,77 @@
+from pathlib import Path
+from random import Random
+
+import numpy as np
+
+from rl_tic_tac_toe.game_record import GameRecordWriter
+from rl_tic_tac_toe.offline_training import (
+    stream_records,
+    train_from_records,
+    transitions_of_records,
+)
+from rl_tic_tac_toe.player import Player
+from rl_tic_tac_toe.q_learning_agent import QLearningAgent
+from rl_tic_tac_toe.q_table import QTableBackend
+from rl_tic_tac_toe.tic_tac_toe import encode_board
+from rl_tic_tac_toe.training_episode import TrainingEpisode
+
+
+def test_transitions_follow_scalar_episode_rules(tmp_path: Path) -> None:
+    """X plays 0, 2, 4, 6 and wins on the 2-4-6 diagonal."""
+    path = tmp_path / "games.ttt"
+    with GameRecordWriter(path) as writer:
+        writer.write([0, 1, 2, 3, 4, 5, 6], 1)
+    (records,) = stream_records([path])
+    result = transitions_of_records(records)
+    x_batch, o_batch = result[Player.PLAYER_X], result[Player.PLAYER_O]
+
+    assert x_batch.actions.tolist() == [0, 2, 4, 6]
+    assert x_batch.rewards.tolist() == [0, 0, 0, 1]
+    assert x_batch.states[1] == encode_board(list("XO       "))
+    assert x_batch.next_states[0] == encode_board(list("XO       "))
+    assert x_batch.next_legal_masks[0].tolist() == [False, False] + [True] * 7
+    assert not x_batch.next_legal_masks[-1].any()
+    assert o_batch.actions.tolist() == [1, 3, 5]
+    assert o_batch.rewards.tolist() == [0, 0, -1]
+    assert o_batch.next_states[-1] == x_batch.next_states[-1]
+
+
+def test_offline_training_matches_online_training(tmp_path: Path) -> None:
+    """With one game per chunk, replaying records reproduces online training."""
+    online_x = QLearningAgent(
+        Player.PLAYER_X, rng=Random(0), backend=QTableBackend.DENSE
+    )
+    online_o = QLearningAgent(
+        Player.PLAYER_O, rng=Random(1), backend=QTableBackend.DENSE
+    )
+    path = tmp_path / "games.ttt"
+    with GameRecordWriter(path) as writer:
+        for _ in range(300):
+            TrainingEpisode.run(online_x, online_o, writer)
+
+    offline_x = QLearningAgent(Player.PLAYER_X, backend=QTableBackend.DENSE)
+    offline_o = QLearningAgent(Player.PLAYER_O, backend=QTableBackend.DENSE)
+    stats = train_from_records([path], offline_x, offline_o, chunk_games=1)
+
+    assert stats.games == 300  # noqa: PLR2004
+    assert stats.games_per_second > 0
+    states = np.arange(3**9)
+    np.testing.assert_allclose(
+        offline_x.q_values(states), online_x.q_values(states), atol=1e-6
+    )
+    np.testing.assert_allclose(
+        offline_o.q_values(states), online_o.q_values(states), atol=1e-6
+    )
+
+
+def test_streams_several_files_in_chunks(tmp_path: Path) -> None:
+    paths = [tmp_path / "a.ttt", tmp_path / "b.ttt"]
+    for path in paths:
+        with GameRecordWriter(path) as writer:
+            for _ in range(5):
+                writer.write([4, 0, 8, 2, 1, 7, 6, 3, 5], 0)
+    assert [len(chunk) for chunk in stream_records(paths, 3)] == [3, 2, 3, 2]
+    agent_o = QLearningAgent(Player.PLAYER_O)
+    stats = train_from_records(paths, agent_o=agent_o, chunk_games=3)
+    assert stats.games == 10  # noqa: PLR2004
+    assert stats.transitions == 40  # noqa: PLR2004
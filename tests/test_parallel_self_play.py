@@ -0,0 +1,62 @@
+import numpy as np
+
+from rl_tic_tac_toe.parallel_self_play import (
+    FrozenPolicy,
+    SelfPlayWorkers,
+    generate_self_play,
+)
+from rl_tic_tac_toe.player import Player
+from rl_tic_tac_toe.q_learning_agent import QLearningAgent
+from rl_tic_tac_toe.q_table import QTableBackend
+
+
+def make_agents() -> tuple[QLearningAgent, QLearningAgent]:
+    return (
+        QLearningAgent(Player.PLAYER_X, backend=QTableBackend.DENSE),
+        QLearningAgent(Player.PLAYER_O, backend=QTableBackend.DENSE),
+    )
+
+
+def test_frozen_policy_keeps_epsilon_and_does_not_follow_agent() -> None:
+    agent_x, _ = make_agents()
+    agent_x.epsilon = 0.3
+    policy = FrozenPolicy.of(agent_x)
+    agent_x.update_q_table(0, 4, 1.0, 4, [])
+
+    assert policy.learns
+    assert policy.epsilon == 0.3  # noqa: PLR2004
+    assert policy.q_values(np.array([0]))[0, 4] == 0.0
+    assert not FrozenPolicy.of(agent_x.snapshot()).learns
+
+
+def test_generate_self_play_returns_learning_sides_only() -> None:
+    agent_x, agent_o = make_agents()
+    result = generate_self_play(
+        FrozenPolicy.of(agent_x),
+        FrozenPolicy.of(agent_o.snapshot()),
+        50,
+        np.random.SeedSequence(0),
+    )
+    assert list(result) == [Player.PLAYER_X]
+    # every X decision is trained on exactly once: 3 to 5 moves per game
+    assert 150 <= len(result[Player.PLAYER_X]) <= 250  # noqa: PLR2004
+
+
+def test_workers_train_live_agents_reproducibly() -> None:
+    tables = []
+    for _ in range(2):
+        agent_x, agent_o = make_agents()
+        with SelfPlayWorkers(2, seed=7) as workers:
+            workers.play(
+                agent_x,
+                agent_o,
+                [(agent_x, agent_o), (agent_x.snapshot(), agent_o)],
+                200,
+            )
+        assert len(agent_x.q_table) > 0
+        assert len(agent_o.q_table) > 0
+        tables.append(
+            (agent_x.q_values(np.arange(100)), agent_o.q_values(np.arange(100)))
+        )
+    np.testing.assert_array_equal(tables[0][0], tables[1][0])
+    np.testing.assert_array_equal(tables[0][1], tables[1][1])
@@ -0,0 +1,57 @@
+import time
+
+from pytest import CaptureFixture
+
+from rl_tic_tac_toe.phase_timer import Phase, PhaseTimer
+
+
+def test_add_and_measure() -> None:
+    timer = PhaseTimer()
+    timer.add(Phase.CHOOSE_ACTION, time.perf_counter())
+    timer.add(Phase.CHOOSE_ACTION, time.perf_counter() - 0.5)
+    with timer.measure(Phase.SNAPSHOT):
+        pass
+
+    assert timer.calls(Phase.CHOOSE_ACTION) == 2  # noqa: PLR2004
+    assert timer.seconds(Phase.CHOOSE_ACTION) >= 0.5  # noqa: PLR2004
+    assert timer.calls(Phase.SNAPSHOT) == 1
+    assert timer.calls(Phase.UPDATE_Q_TABLE) == 0
+    assert timer.seconds(Phase.UPDATE_Q_TABLE) == 0.0
+
+
+def test_measure_charges_time_on_error() -> None:
+    timer = PhaseTimer()
+    try:
+        with timer.measure(Phase.EVALUATION):
+            raise RuntimeError
+    except RuntimeError:
+        pass
+
+    assert timer.calls(Phase.EVALUATION) == 1
+
+
+def test_count_episodes() -> None:
+    timer = PhaseTimer(window=3)
+    assert timer.episodes == 0
+    assert timer.episodes_per_second == 0.0
+
+    for _ in range(5):
+        timer.count_episodes(10)
+        time.sleep(0.001)
+
+    assert timer.episodes == 50  # noqa: PLR2004
+    # 窗口只保留最近 3 条记录，跨 2 次、共 20 局
+    assert 0.0 < timer.episodes_per_second <= 20 / 0.002  # noqa: PLR2004
+
+
+def test_report(capsys: CaptureFixture[str]) -> None:
+    timer = PhaseTimer()
+    timer.add(Phase.UPDATE_Q_TABLE, time.perf_counter())
+    timer.count_episodes()
+    timer.report()
+
+    output = capsys.readouterr().out
+    for phase in Phase:
+        assert phase.name in output
+    assert "OTHER" in output
+    assert "1 局" in output
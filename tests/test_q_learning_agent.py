@@ -1,5 +1,6 @@
 from random import Random
 
+import numpy as np
 import pytest
 
 from rl_tic_tac_toe.action_policy import ActionPolicy
@@ -8,7 +9,9 @@ from rl_tic_tac_toe.q_learning_agent import (
     ImmutableSnapshotError,
     QLearningAgent,
 )
-from rl_tic_tac_toe.tic_tac_toe import TicTacToe
+from rl_tic_tac_toe.q_table import QTableBackend
+from rl_tic_tac_toe.replay_buffer import ReplayBuffer
+from rl_tic_tac_toe.tic_tac_toe import TicTacToe, encode_board
 
 
 @pytest.fixture
@@ -36,22 +39,24 @@ def test_initialization() -> None:
 def test_get_state(agent_x: QLearningAgent, game: TicTacToe) -> None:
     """Test the state representation of the board."""
     game.board = ["X", " ", "O", " ", "X", " ", "O", " ", " "]
-    expected_state = "X O X O  "
+    # base-3 digits, square 0 first: X=1, O=2
+    expected_state = 1 + 2 * 3**2 + 1 * 3**4 + 2 * 3**6
     assert agent_x.get_state(game) == expected_state
 
 
 def test_get_and_update_q_value(agent_x: QLearningAgent, game: TicTacToe) -> None:
     """Test getting and setting Q-values."""
-    state = "         "
+    state = encode_board("         ")
     action = 1
     reward = 1
-    next_state = " X       "
+    next_board = " X       "
 
     # Initially, Q-value should be 0
     assert agent_x.get_q_value(state, action) == 0.0
 
     # Update Q-table
-    game.board = list(next_state)
+    game.board = list(next_board)
+    next_state = game.state_id
     agent_x.update_q_table(state, action, reward, next_state, game.empty_cells())
 
     # Q-value should be updated based on the formula (reward + gamma * next_max_q - old_q)
@@ -65,10 +70,10 @@ def test_choose_action_greedy(agent_x: QLearningAgent, game: TicTacToe) -> None:
     # Set Q-values to make action 3 the clear winner
     board = " X       "
     game.board = list(board)
-    agent_x.update_q_table(state, 1, 0.5, board, game.empty_cells())
+    agent_x.update_q_table(state, 1, 0.5, game.state_id, game.empty_cells())
     board = "   X     "
     game.board = list(board)
-    agent_x.update_q_table(state, 3, 1.0, board, game.empty_cells())
+    agent_x.update_q_table(state, 3, 1.0, game.state_id, game.empty_cells())
 
     # With a greedy policy, it should always choose the best action
     game.board = [" " for _ in range(9)]
@@ -100,10 +105,10 @@ def test_choose_action_epsilon_greedy_exploitation(
     # Set Q-values to make action 5 the clear winner
     board = " X       "
     game.board = list(board)
-    agent_x.update_q_table(state, 1, 0.5, board, game.empty_cells())
+    agent_x.update_q_table(state, 1, 0.5, game.state_id, game.empty_cells())
     board = "     X   "
     game.board = list(board)
-    agent_x.update_q_table(state, 5, 1.0, board, game.empty_cells())
+    agent_x.update_q_table(state, 5, 1.0, game.state_id, game.empty_cells())
 
     # Mock the random generator to ensure exploitation
     mock_rng = Random(0)
@@ -118,27 +123,27 @@ def test_choose_action_epsilon_greedy_exploitation(
 
 def test_update_q_table_logic(agent_x: QLearningAgent, game: TicTacToe) -> None:
     """Verify the Q-learning update formula."""
-    state = "         "
+    state = encode_board("         ")
     action = 0
     reward = 1
-    next_state = "X        "
+    next_state = encode_board("X        ")
     # Let's assume the next state has some Q-values
     board = "XO       "
     game.board = list(board)
     agent_x.update_q_table(
-        next_state, 1, 0.5, board, game.empty_cells()
+        next_state, 1, 0.5, game.state_id, game.empty_cells()
     )  # Q(next, 1) = 0.05
     board = "X O      "
     game.board = list(board)
     agent_x.update_q_table(
-        next_state, 2, 1.0, board, game.empty_cells()
+        next_state, 2, 1.0, game.state_id, game.empty_cells()
     )  # Q(next, 2) = 0.1
 
     # The max Q-value for the next state is 0.1
     # next_max_q = 0.1
 
     # Update the Q-table for the original state-action
-    game.board = list(next_state)
+    game.board = list("X        ")
     agent_x.update_q_table(state, action, reward, next_state, game.empty_cells())
 
     # old_q = 0
@@ -149,6 +154,15 @@ def test_update_q_table_logic(agent_x: QLearningAgent, game: TicTacToe) -> None:
     assert agent_x.get_q_value(state, action) == pytest.approx(expected_q_value)  # pyright: ignore[reportUnknownMemberType]
 
 
+def test_load_legacy_q_table(agent_x: QLearningAgent, game: TicTacToe) -> None:
+    """Q-tables keyed by board strings are converted to integer state ids."""
+    agent_x.load_q_table({"X O      ": {4: 0.25}, 0: {8: -0.5}})
+    game.board = list("X O      ")
+    assert agent_x.get_q_value(game.state_id, 4) == 0.25  # noqa: PLR2004
+    assert agent_x.get_q_value(0, 8) == -0.5  # noqa: PLR2004
+    assert all(isinstance(state, int) for state in agent_x.q_table)
+
+
 def test_snapshot(agent_x: QLearningAgent) -> None:
     """Test creating a snapshot of an agent."""
     snapshot = agent_x.snapshot()
@@ -176,6 +190,24 @@ def test_snapshot_is_immutable(agent_x: QLearningAgent) -> None:
         snapshot.gamma = 0.5
 
 
+@pytest.mark.parametrize("backend", [QTableBackend.DICT, QTableBackend.DENSE])
+def test_snapshot_keeps_values_while_agent_learns(backend: QTableBackend) -> None:
+    agent = QLearningAgent(Player.PLAYER_X, backend=backend)
+    agent.update_q_table(0, 4, 1.0, 4, [])
+    snapshot = agent.snapshot()
+
+    agent.update_q_table(0, 4, 1.0, 4, [])
+    agent.update_q_table(1, 2, -1.0, 4, [])
+
+    assert snapshot.get_q_value(0, 4) == 0.5  # noqa: PLR2004
+    assert snapshot.get_q_value(1, 2) == 0.0
+    assert agent.get_q_value(0, 4) == 0.75  # noqa: PLR2004
+    with pytest.raises(ImmutableSnapshotError):
+        snapshot.update_q_table(0, 4, 1.0, 4, [])
+    with pytest.raises(ValueError):
+        snapshot.q_table.set(0, 4, 1.0)
+
+
 def test_property_validation(agent_x: QLearningAgent) -> None:
     """Test that property setters raise ValueError for invalid values."""
     with pytest.raises(ValueError):
@@ -186,3 +218,125 @@ def test_property_validation(agent_x: QLearningAgent) -> None:
         agent_x.alpha = 1.1
     with pytest.raises(ValueError):
         agent_x.gamma = -0.1
+
+
+def test_dense_backend_matches_dict_backend(game: TicTacToe) -> None:
+    """Both Q-table backends produce the same values and greedy choices."""
+    agents = [
+        QLearningAgent(Player.PLAYER_X, alpha=0.5, rng=Random(1), backend=backend)
+        for backend in (QTableBackend.DICT, QTableBackend.DENSE)
+    ]
+    state = game.state_id
+    game.make_move(4, Player.PLAYER_X)
+    for agent in agents:
+        agent.update_q_table(state, 4, 1.0, game.state_id, game.empty_cells())
+        agent.update_q_table(state, 0, 0.5, game.state_id, game.empty_cells())
+
+    game = TicTacToe()
+    dict_agent, dense_agent = agents
+    assert dense_agent.backend == QTableBackend.DENSE
+    assert dense_agent.get_q_value(state, 4) == dict_agent.get_q_value(state, 4)
+    assert dense_agent.choose_action(game, ActionPolicy.GREEDY) == 4  # noqa: PLR2004
+    assert dict_agent.choose_action(game, ActionPolicy.GREEDY) == 4  # noqa: PLR2004
+
+
+def test_update_q_table_batch_matches_sequential_updates() -> None:
+    """Repeated (state, action) pairs in a batch fold like sequential updates."""
+    sequential = QLearningAgent(Player.PLAYER_X, alpha=0.3, rng=Random(0))
+    batched = QLearningAgent(
+        Player.PLAYER_X, alpha=0.3, rng=Random(0), backend=QTableBackend.DENSE
+    )
+    terminal = encode_board("XXXOO    ")
+    transitions = [(0, 4, 1.0), (0, 4, -1.0), (0, 2, 0.5), (0, 4, 1.0), (9, 1, 1.0)]
+    for state, action, reward in transitions:
+        sequential.update_q_table(state, action, reward, terminal, [])
+    states, actions, rewards = (np.array(column) for column in zip(*transitions))
+    no_moves = np.zeros((len(transitions), 9), dtype=np.bool_)
+    batched.update_q_table_batch(
+        states, actions, rewards, np.full(len(transitions), terminal), no_moves
+    )
+    for state, action, _ in transitions:
+        assert batched.get_q_value(state, action) == pytest.approx(  # pyright: ignore[reportUnknownMemberType]
+            sequential.get_q_value(state, action), rel=1e-6
+        )
+
+
+def test_q_values_follow_symmetry(game: TicTacToe) -> None:
+    agent = QLearningAgent(Player.PLAYER_O, rng=Random(0), use_symmetry=True)
+    game.make_move(0, Player.PLAYER_X)
+    agent.update_q_table(game.state_id, 1, 1.0, 0, [])
+    mirrored = encode_board("  X      ")
+    q_values = agent.q_values(np.array([game.state_id, mirrored]))
+    assert q_values[0, 1] == agent.get_q_value(game.state_id, 1)
+    assert q_values[1].tolist() == [
+        agent.get_q_value(mirrored, action) for action in range(9)
+    ]
+    # the corner's adjacent edges are 1 and 5 on the mirrored board
+    assert q_values[1, [1, 5]].max() > 0
+
+
+def test_replay_updates_from_buffer(game: TicTacToe) -> None:
+    buffer = ReplayBuffer(10)
+    agent = QLearningAgent(Player.PLAYER_X, replay_buffer=buffer, replay_updates=4)
+    state = agent.get_state(game)
+    agent.update_q_table(state, 0, 1.0, state, [])
+
+    assert len(buffer) == 1
+    # 1 次真实更新 + 4 次重放，每次都向目标 1.0 移动一半
+    assert agent.get_q_value(state, 0) == 1.0 - 0.5**5
+    assert agent.snapshot().replay_buffer is None
+
+
+@pytest.mark.parametrize("backend", list(QTableBackend))
+def test_choose_actions_matches_choose_action(backend: QTableBackend) -> None:
+    agent = QLearningAgent(Player.PLAYER_X, backend=backend, use_symmetry=True)
+    game = TicTacToe()
+    game.make_move(0, Player.PLAYER_X)
+    game.make_move(4, Player.PLAYER_O)
+    agent.update_q_table(game.state_id, 8, 1.0, game.state_id, [])
+    agent.update_q_table(game.state_id, 2, 1.0, game.state_id, [])
+    states = np.full(1000, game.state_id)
+    rng = np.random.default_rng(0)
+
+    greedy = agent.choose_actions(states, ActionPolicy.GREEDY, rng)
+    assert set(greedy.tolist()) == set(agent.best_actions(game.state_id, [2, 8]))
+    explored = agent.choose_actions(states, ActionPolicy.FULL_EXPLORATION, rng)
+    assert set(explored.tolist()) == set(game.empty_cells())
+    agent.epsilon = 0.0
+    epsilon_greedy = agent.choose_actions(states, ActionPolicy.EPSILON_GREEDY, rng)
+    assert set(epsilon_greedy.tolist()) <= {2, 8}
+
+    # ε = 0.5：一半的行随机探索，5/7 的探索落在非最优的空格上
+    agent.epsilon = 0.5
+    epsilon_greedy = agent.choose_actions(states, ActionPolicy.EPSILON_GREEDY, rng)
+    assert set(epsilon_greedy.tolist()) == set(game.empty_cells())
+    explored_share = np.isin(epsilon_greedy, [2, 8], invert=True).mean()
+    assert 0.3 < explored_share < 0.42  # noqa: PLR2004
+
+
+def test_take_update_stats(agent_x: QLearningAgent) -> None:
+    terminal = encode_board("XXXOO    ")
+    agent_x.update_q_table(0, 4, 1.0, terminal, [])  # 0 -> 0.1
+    agent_x.update_q_table(0, 4, 1.0, terminal, [])  # 0.1 -> 0.19
+
+    stats = agent_x.take_update_stats()
+    assert stats.num_updates == 2  # noqa: PLR2004
+    assert stats.max_abs_delta == pytest.approx(0.1)  # pyright: ignore[reportUnknownMemberType]
+    assert stats.mean_abs_delta == pytest.approx(0.095)  # pyright: ignore[reportUnknownMemberType]
+    assert agent_x.take_update_stats().num_updates == 0
+
+    # 批量更新中重复的 (状态, 动作) 按一次净变化计
+    agent_x.update_q_table_batch(
+        np.array([0, 0, 9]),
+        np.array([4, 4, 1]),
+        np.array([1.0, 1.0, -1.0], dtype=np.float32),
+        np.full(3, terminal),
+        np.zeros((3, 9), dtype=np.bool_),
+    )
+    stats = agent_x.take_update_stats()
+    assert stats.num_updates == 2  # noqa: PLR2004
+    # 0.19 经两次更新变为 0.3439，另一项 0 -> -0.1
+    assert stats.max_abs_delta == pytest.approx(0.1539, rel=1e-5)  # pyright: ignore[reportUnknownMemberType]
+    assert stats.mean_abs_delta == pytest.approx(0.12695, rel=1e-5)  # pyright: ignore[reportUnknownMemberType]
+    merged = stats.merge(agent_x.take_update_stats())
+    assert merged.num_updates == 2  # noqa: PLR2004
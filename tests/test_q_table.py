@@ -0,0 +1,124 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from rl_tic_tac_toe.q_table import (
+    DenseQTable,
+    DictQTable,
+    QTable,
+    QTableBackend,
+    make_q_table,
+)
+
+
+@pytest.fixture(params=[QTableBackend.DICT, QTableBackend.DENSE])
+def q_table(request: pytest.FixtureRequest) -> QTable:
+    return make_q_table(request.param)
+
+
+def test_make_q_table() -> None:
+    assert isinstance(make_q_table(QTableBackend.DICT), DictQTable)
+    assert isinstance(make_q_table(QTableBackend.DENSE), DenseQTable)
+
+
+def test_get_and_set(q_table: QTable) -> None:
+    assert q_table.get(10, 3) == 0.0
+    assert len(q_table) == 0
+
+    q_table.set(10, 3, 0.5)
+    q_table.set(10, 4, -0.25)
+    q_table.set(20, 0, 1.0)
+
+    assert q_table.get(10, 3) == 0.5  # noqa: PLR2004
+    assert q_table.get(10, 4) == -0.25  # noqa: PLR2004
+    assert len(q_table) == 2  # noqa: PLR2004
+    assert sorted(q_table) == [10, 20]
+    assert q_table.nbytes > 0
+
+
+def test_masked_max_and_best_actions(q_table: QTable) -> None:
+    q_table.set(7, 0, 2.0)
+    q_table.set(7, 1, 1.0)
+    q_table.set(7, 5, 1.0)
+
+    # action 0 is masked out, so the best legal value is the tie on 1 and 5
+    assert q_table.max_value(7, [1, 2, 5]) == 1.0
+    assert q_table.best_actions(7, [1, 2, 5]) == [1, 5]
+    assert q_table.max_value(7, []) == 0.0
+    # unvisited state: every legal action ties at 0.0
+    assert q_table.best_actions(8, [2, 6]) == [2, 6]
+    assert q_table.max_value(8, [2, 6]) == 0.0
+    # visited state: unset actions still count as 0.0
+    q_table.set(9, 4, -1.0)
+    assert q_table.max_value(9, [3, 4]) == 0.0
+    assert q_table.best_actions(9, [3, 4]) == [3]
+
+
+def test_frozen_copy_is_isolated_and_read_only(q_table: QTable) -> None:
+    q_table.set(10, 3, 0.5)
+    frozen = q_table.frozen_copy()
+
+    q_table.set(10, 3, 1.0)
+    q_table.set(20, 0, 1.0)
+
+    assert frozen.get(10, 3) == 0.5  # noqa: PLR2004
+    assert frozen.get(20, 0) == 0.0
+    assert sorted(frozen) == [10]
+    assert q_table.get(10, 3) == 1.0
+    with pytest.raises(ValueError):
+        frozen.set(10, 3, 2.0)
+
+
+def test_dict_frozen_copy_shares_unchanged_rows() -> None:
+    q_table = DictQTable()
+    q_table.set(10, 3, 0.5)
+    q_table.set(20, 0, 1.0)
+    frozen = q_table.frozen_copy()
+
+    q_table.set(10, 3, 1.0)
+
+    # only the written row is copied; the other stays shared
+    assert q_table._rows[20] is frozen._rows[20]
+    assert q_table._rows[10] is not frozen._rows[10]
+    assert q_table._owned == {10}
+    assert frozen._owned == {10, 20}
+
+
+def test_pickled_frozen_copy_stays_read_only(q_table: QTable) -> None:
+    q_table.set(10, 3, 1.5)
+    frozen = pickle.loads(pickle.dumps(q_table.frozen_copy()))
+    live = pickle.loads(pickle.dumps(q_table))
+
+    assert frozen.get(10, 3) == 1.5  # noqa: PLR2004
+    with pytest.raises(ValueError):
+        frozen.set(10, 3, 2.0)
+    live.set(10, 3, 2.0)
+    assert live.get(10, 3) == 2.0  # noqa: PLR2004
+
+
+def test_rows_follow_writes_between_lookups(q_table: QTable) -> None:
+    states = np.array([30, 10, 20, 10], dtype=np.int64)
+    assert not q_table.rows(states).any()
+
+    q_table.set(10, 3, 0.5)
+    q_table.set(30, 8, -1.0)
+    rows = q_table.rows(states)
+    assert rows[1, 3] == rows[3, 3] == 0.5  # noqa: PLR2004
+    assert rows[0, 8] == -1.0
+    assert not rows[2].any()
+
+    frozen = q_table.frozen_copy()
+    q_table.set(10, 3, 2.0)
+    q_table.set(20, 0, 1.0)
+    rows = q_table.rows(states)
+    assert rows[1, 3] == 2.0  # noqa: PLR2004
+    assert rows[2, 0] == 1.0
+    assert rows[0, 8] == -1.0
+    # the frozen copy keeps the values from before the writes
+    frozen_rows = frozen.rows(states)
+    assert frozen_rows[1, 3] == 0.5  # noqa: PLR2004
+    assert not frozen_rows[2].any()
+    assert np.array_equal(
+        rows, [[q_table.get(state, a) for a in range(9)] for state in states]
+    )
@@ -0,0 +1,45 @@
+import numpy as np
+
+from rl_tic_tac_toe.replay_buffer import ReplayBuffer
+
+
+def test_add_overwrites_oldest_transition() -> None:
+    buffer = ReplayBuffer(3)
+    for state in range(5):
+        buffer.add(state, state, 0.0, state + 1, [state])
+
+    assert len(buffer) == 3  # noqa: PLR2004
+    batch = buffer.sample(100)
+    assert set(batch.states.tolist()) == {2, 3, 4}
+    np.testing.assert_array_equal(batch.actions, batch.states)
+    np.testing.assert_array_equal(batch.next_states, batch.states + 1)
+    assert batch.next_legal_masks[np.arange(100), batch.actions].all()
+    assert batch.next_legal_masks.sum(axis=1).tolist() == [1] * 100
+
+
+def test_add_batch_wraps_around() -> None:
+    buffer = ReplayBuffer(4)
+    buffer.add(100, 0, 0.0, 0, [])
+    states = np.arange(5, dtype=np.int64)
+    masks = np.zeros((5, 9), dtype=np.bool_)
+    masks[:, 8] = states % 2 == 0
+    buffer.add_batch(states, states, states.astype(np.float32), states, masks)
+
+    assert len(buffer) == 4  # noqa: PLR2004
+    batch = buffer.sample(200)
+    assert set(batch.states.tolist()) == {1, 2, 3, 4}
+    np.testing.assert_array_equal(batch.rewards, batch.states)
+    np.testing.assert_array_equal(batch.next_legal_masks[:, 8], batch.states % 2 == 0)
+
+
+def test_terminal_transitions_have_no_legal_actions() -> None:
+    buffer = ReplayBuffer(2)
+    buffer.add(1, 4, 1.0, 2, [])
+    batch = buffer.sample(10)
+
+    assert not batch.next_legal_masks.any()
+    assert batch.rewards.tolist() == [1.0] * 10
+
+
+def test_nbytes_per_transition() -> None:
+    assert ReplayBuffer(1000).nbytes == 16 * 1000
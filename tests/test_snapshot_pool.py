@@ -0,0 +1,110 @@
+from random import Random
+
+import numpy as np
+import pytest
+
+from rl_tic_tac_toe.player import Player
+from rl_tic_tac_toe.q_learning_agent import QLearningAgent
+from rl_tic_tac_toe.snapshot_pool import EvictionPolicy, SnapshotPool, greedy_policy
+from rl_tic_tac_toe.training_loop import pick_agent
+
+
+def snapshot_preferring(
+    square: int, player: Player = Player.PLAYER_X
+) -> QLearningAgent:
+    """Snapshot of an agent whose only learned value favours ``square`` at the start."""
+    agent = QLearningAgent(player)
+    agent.update_q_table(0, square, 1.0, 0, [])
+    return agent.snapshot()
+
+
+def test_greedy_policy_breaks_ties_toward_lowest_square() -> None:
+    policy = greedy_policy(QLearningAgent(Player.PLAYER_X))
+    assert policy[0] == 0  # the empty board comes first
+    assert greedy_policy(snapshot_preferring(4))[0] == 4  # noqa: PLR2004
+
+
+def test_pool_is_indexed_by_letter_and_skips_duplicates() -> None:
+    pool = SnapshotPool(
+        [snapshot_preferring(4), snapshot_preferring(0, Player.PLAYER_O)]
+    )
+
+    assert not pool.add(snapshot_preferring(4))
+    assert pool.add(snapshot_preferring(2))
+    assert [greedy_policy(s)[0] for s in pool["X"]] == [4, 2]
+    assert len(pool["O"]) == 1
+    assert len(pool) == 3  # noqa: PLR2004
+    assert pool.nbytes > 0
+    assert pick_agent(QLearningAgent(Player.PLAYER_X), pool["X"], Random(0))
+
+
+def test_fifo_evicts_oldest() -> None:
+    pool = SnapshotPool(capacity=2)
+    for square in (0, 1, 2):
+        assert pool.add(snapshot_preferring(square))
+    assert [greedy_policy(s)[0] for s in pool["X"]] == [1, 2]
+
+
+def test_reservoir_keeps_capacity_and_uniform_sample() -> None:
+    kept = np.zeros(9, dtype=np.int64)
+    for seed in range(300):
+        pool = SnapshotPool(
+            capacity=3, policy=EvictionPolicy.RESERVOIR, rng=Random(seed)
+        )
+        for square in range(9):
+            pool.add(snapshot_preferring(square))
+        assert len(pool["X"]) == 3  # noqa: PLR2004
+        for snapshot in pool["X"]:
+            kept[greedy_policy(snapshot)[0]] += 1
+    # every snapshot survives with probability capacity / offered = 1/3
+    assert np.all(np.abs(kept / 300 - 1 / 3) < 0.1)  # noqa: PLR2004
+
+
+@pytest.mark.parametrize("policy", list(EvictionPolicy))
+def test_pool_never_exceeds_capacity(policy: EvictionPolicy) -> None:
+    pool = SnapshotPool(capacity=2, policy=policy)
+    for square in range(9):
+        pool.add(snapshot_preferring(square))
+    assert len(pool["X"]) <= 2  # noqa: PLR2004
+
+
+def test_keep_diverse_evicts_closest_snapshot() -> None:
+    pool = SnapshotPool(capacity=2, policy=EvictionPolicy.KEEP_DIVERSE)
+    agent = QLearningAgent(Player.PLAYER_X)
+    agent.update_q_table(0, 4, 1.0, 0, [])
+    first = agent.snapshot()
+    # the second and third snapshots each differ from the first in one position
+    # and from each other in two, so the first is the most redundant
+    agent.update_q_table(1, 8, 1.0, 0, [])
+    second = agent.snapshot()
+    third = snapshot_preferring(0)
+    for snapshot in (first, second, third):
+        assert pool.add(snapshot)
+
+    assert pool["X"] == [second, third]
+
+
+def test_policy_change() -> None:
+    agent = QLearningAgent(Player.PLAYER_X)
+    pool = SnapshotPool()
+    assert pool.policy_change(agent) == 1.0
+
+    pool.add(agent.snapshot())
+    assert pool.policy_change(agent) == 0.0
+
+    agent.update_q_table(0, 4, 1.0, 0, [])
+    # 只有空棋盘的贪心动作改变
+    assert pool.policy_change(agent) == pytest.approx(1 / len(greedy_policy(agent)))  # pyright: ignore[reportUnknownMemberType]
+
+
+def test_policy_change_compares_with_last_offered_snapshot() -> None:
+    pool = SnapshotPool(capacity=1, policy=EvictionPolicy.RESERVOIR, rng=Random(0))
+    kept = snapshot_preferring(4)
+    assert pool.add(kept)
+    agent = QLearningAgent(Player.PLAYER_X)
+    agent.update_q_table(0, 0, 1.0, 0, [])
+
+    # the reservoir drops the second snapshot, which is still the reference
+    assert not pool.add(agent.snapshot())
+    assert pool["X"] == [kept]
+    assert pool.policy_change(agent) == 0.0
@@ -0,0 +1,99 @@
+from pathlib import Path
+from random import Random
+
+import numpy as np
+import pytest
+
+from rl_tic_tac_toe.batched_tic_tac_toe import EMPTY, O, X
+from rl_tic_tac_toe.player import Player
+from rl_tic_tac_toe.state_space import (
+    CACHE_DIR_ENV,
+    NO_STATE,
+    NUM_REACHABLE_STATES,
+    STATE_SPACE_DIGEST,
+    StateSpace,
+    default_cache_path,
+)
+from rl_tic_tac_toe.tic_tac_toe import TicTacToe
+
+
+@pytest.fixture(scope="module")
+def state_space() -> StateSpace:
+    return StateSpace.build()
+
+
+def test_counts(state_space: StateSpace) -> None:
+    assert len(state_space) == NUM_REACHABLE_STATES
+    assert state_space.state_ids[0] == 0
+    assert np.count_nonzero(state_space.winners == X) == 626  # noqa: PLR2004
+    assert np.count_nonzero(state_space.winners == O) == 316  # noqa: PLR2004
+    draws = state_space.terminal & (state_space.winners == EMPTY)
+    assert np.count_nonzero(draws) == 16  # noqa: PLR2004
+
+
+def test_tables_agree_with_game(state_space: StateSpace) -> None:
+    """Walk random games and compare every position with TicTacToe."""
+    rng = Random(0)
+    for _ in range(200):
+        game = TicTacToe()
+        index = 0
+        player = Player.PLAYER_X
+        while True:
+            assert state_space.state_ids[index] == game.state_id
+            assert state_space.index_of[game.state_id] == index
+            assert state_space.legal_masks[index] == game.empty_mask
+            assert state_space.terminal[index] == game.is_ended()
+            if game.is_ended():
+                winner = {None: EMPTY, Player.PLAYER_X: X, Player.PLAYER_O: O}
+                assert state_space.winners[index] == winner[game.current_winner]
+                assert (state_space.successors[index] == NO_STATE).all()
+                break
+            side = X if player == Player.PLAYER_X else O
+            assert state_space.to_move[index] == side
+            move = rng.choice(game.empty_cells())
+            game.make_move(move, player)
+            index = int(state_space.successors[index, move])
+            player = player.opponent()
+
+
+def test_load_builds_and_caches(tmp_path: Path, state_space: StateSpace) -> None:
+    path = tmp_path / "cache" / "state_space.npz"
+    first = StateSpace.load(path)
+    assert path.exists()
+    second = StateSpace.load(path)
+    assert np.array_equal(first.successors, state_space.successors)
+    assert np.array_equal(second.successors, state_space.successors)
+    assert np.array_equal(second.index_of, state_space.index_of)
+
+
+def test_load_rebuilds_corrupt_cache(tmp_path: Path) -> None:
+    path = tmp_path / "state_space.npz"
+    path.write_bytes(b"not an npz file")
+    assert len(StateSpace.load(path)) == NUM_REACHABLE_STATES
+
+
+def test_load_rebuilds_stale_cache(tmp_path: Path, state_space: StateSpace) -> None:
+    """A cache with the right length but wrong tables is not trusted."""
+    path = tmp_path / "state_space.npz"
+    stale = StateSpace.build()
+    stale.successors[0, 0] = NO_STATE
+    stale.save(path)
+
+    loaded = StateSpace.load(path)
+    assert np.array_equal(loaded.successors, state_space.successors)
+    # 缓存文件已被正确的表覆盖
+    assert StateSpace.load(path).digest() == STATE_SPACE_DIGEST
+
+
+def test_digest_matches_build(state_space: StateSpace) -> None:
+    assert state_space.digest() == STATE_SPACE_DIGEST
+
+
+def test_cache_dir_from_environment(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv(CACHE_DIR_ENV, str(tmp_path))
+    assert default_cache_path().parent == tmp_path
+    monkeypatch.delenv(CACHE_DIR_ENV)
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "xdg"))
+    assert default_cache_path().parent == tmp_path / "xdg" / "rl_tic_tac_toe"
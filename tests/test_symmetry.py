@@ -0,0 +1,60 @@
+from random import Random
+
+from rl_tic_tac_toe.action_policy import ActionPolicy
+from rl_tic_tac_toe.player import Player
+from rl_tic_tac_toe.q_learning_agent import QLearningAgent
+from rl_tic_tac_toe.symmetry import (
+    ACTION_FROM_CANONICAL,
+    ACTION_TO_CANONICAL,
+    SYMMETRY_PERMUTATIONS,
+    canonicalize,
+    transform_state,
+)
+from rl_tic_tac_toe.tic_tac_toe import TicTacToe, decode_state, encode_board
+
+
+def test_symmetries_are_distinct_permutations() -> None:
+    assert len(set(SYMMETRY_PERMUTATIONS)) == 8  # noqa: PLR2004
+    for perm in SYMMETRY_PERMUTATIONS:
+        assert sorted(perm) == list(range(9))
+        # the centre square is fixed by every symmetry
+        assert perm[4] == 4  # noqa: PLR2004
+
+
+def test_action_maps_are_inverse() -> None:
+    for to_canonical, from_canonical in zip(ACTION_TO_CANONICAL, ACTION_FROM_CANONICAL):
+        assert [from_canonical[to_canonical[a]] for a in range(9)] == list(range(9))
+
+
+def test_transform_moves_pieces_with_actions() -> None:
+    board = list("XO   O  X")
+    state = encode_board(board)
+    for symmetry, to_canonical in enumerate(ACTION_TO_CANONICAL):
+        transformed = decode_state(transform_state(state, symmetry))
+        for square in range(9):
+            assert transformed[to_canonical[square]] == board[square]
+
+
+def test_symmetric_positions_share_canonical_state() -> None:
+    corners = [encode_board(list(b)) for b in ("X        ", "  X      ", "      X  ")]
+    canonical_ids = {canonicalize(state)[0] for state in corners}
+    assert len(canonical_ids) == 1
+    assert canonicalize(encode_board(list("    X    ")))[0] not in canonical_ids
+
+
+def test_agent_shares_updates_across_symmetries() -> None:
+    """An update on one corner opening is seen from every other corner."""
+    agent = QLearningAgent(Player.PLAYER_O, alpha=0.5, rng=Random(0), use_symmetry=True)
+    top_left = TicTacToe()
+    top_left.make_move(0, Player.PLAYER_X)
+    agent.update_q_table(top_left.state_id, 4, 1.0, 0, [])
+
+    bottom_right = TicTacToe()
+    bottom_right.make_move(8, Player.PLAYER_X)
+    assert agent.get_q_value(bottom_right.state_id, 4) == 0.5  # noqa: PLR2004
+    assert agent.choose_action(bottom_right, ActionPolicy.GREEDY) == 4  # noqa: PLR2004
+
+    agent.update_q_table(top_left.state_id, 1, 2.0, 0, [])
+    # the edge next to the corner maps to an edge next to the other corner
+    assert agent.choose_action(bottom_right, ActionPolicy.GREEDY) in (5, 7)
+    assert len(agent.q_table) == 1
@@ -2,7 +2,7 @@
 import pytest
 
 from rl_tic_tac_toe.player import Player
-from rl_tic_tac_toe.tic_tac_toe import TicTacToe
+from rl_tic_tac_toe.tic_tac_toe import TicTacToe, decode_state, encode_board
 
 
 @pytest.fixture
@@ -135,3 +135,50 @@ def test_winner_and_no_false_winner(
     game_3.make_move(0, Player.PLAYER_X)
     game_3.make_move(4, Player.PLAYER_X)
     assert game_3.winner(4, Player.PLAYER_X) is False
+
+
+def test_bitboard_masks(game: TicTacToe) -> None:
+    """Occupied squares are tracked as one bitmask per player."""
+    game.make_move(0, Player.PLAYER_X)
+    game.make_move(4, Player.PLAYER_O)
+    game.make_move(8, Player.PLAYER_X)
+    assert game.x_mask == 0b100000001
+    assert game.o_mask == 0b000010000
+    assert game.empty_mask == 0b011101110
+    assert game.move_count == 3  # noqa: PLR2004
+    assert game.board == ["X", " ", " ", " ", "O", " ", " ", " ", "X"]
+
+
+def test_board_assignment_rebuilds_state(game: TicTacToe) -> None:
+    """Assigning a board recomputes the masks and the winner."""
+    game.board = list("XXXOO    ")
+    assert game.current_winner == Player.PLAYER_X
+    assert game.empty_cells() == [5, 6, 7, 8]
+    assert game.is_ended()
+    assert not game.is_draw()
+
+    game.board = list("XOXXOOOXX")
+    assert game.current_winner is None
+    assert game.is_draw()
+
+
+def test_state_id_tracks_moves(game: TicTacToe) -> None:
+    """The base-3 state id is updated incrementally and round-trips."""
+    assert game.state_id == 0
+    moves = [(4, Player.PLAYER_X), (0, Player.PLAYER_O), (8, Player.PLAYER_X)]
+    for square, player in moves:
+        game.make_move(square, player)
+        assert game.state_id == encode_board(game.board)
+    assert decode_state(game.state_id) == game.board
+    assert not game.make_move(4, Player.PLAYER_O)
+    assert game.state_id == encode_board(game.board)
+
+
+def test_board_is_read_only(game: TicTacToe) -> None:
+    """Writing a square of the board raises instead of changing a copy."""
+    game.make_move(4, Player.PLAYER_X)
+    board = game.board
+    with pytest.raises(TypeError, match="read-only"):
+        board[0] = Player.PLAYER_O
+    assert game.board == board == list("    X    ")
+    assert game.board[3:6] == (" ", "X", " ")
@@ -1,11 +1,21 @@
+import io
+import json
+from pathlib import Path
 from random import Random
 from unittest.mock import MagicMock, patch
 
+import numpy as np
+import pytest
 from pytest import fixture
 
+from rl_tic_tac_toe.checkpoint import checkpoint_path, load_checkpoint
+from rl_tic_tac_toe.convergence import ConvergenceTracker
+from rl_tic_tac_toe.phase_timer import Phase
 from rl_tic_tac_toe.player import Player
 from rl_tic_tac_toe.q_learning_agent import QLearningAgent
-from rl_tic_tac_toe.snapshot_pool import SnapshotPool
+from rl_tic_tac_toe.q_table import QTableBackend
+from rl_tic_tac_toe.snapshot_pool import EvictionPolicy, SnapshotPool
+from rl_tic_tac_toe.training_metrics import JsonlMetricsWriter
 from rl_tic_tac_toe.training_loop import TrainingLoop, TrainingLoopParams
 
 
@@ -26,7 +36,7 @@ def params(agent_x: QLearningAgent, agent_o: QLearningAgent) -> TrainingLoopPara
 
 @fixture
 def snapshot_pool(agent_x: QLearningAgent, agent_o: QLearningAgent) -> SnapshotPool:
-    return {"X": [agent_x.snapshot()], "O": [agent_o.snapshot()]}
+    return SnapshotPool([agent_x.snapshot(), agent_o.snapshot()])
 
 
 @fixture
@@ -106,7 +116,7 @@ def test_adjust_learning_params(params: TrainingLoopParams) -> None:
 def test_init_with_custom_args(
     agent_x: QLearningAgent, agent_o: QLearningAgent
 ) -> None:
-    snapshot_pool: SnapshotPool = {"X": [agent_x.snapshot()], "O": [agent_o.snapshot()]}
+    snapshot_pool = SnapshotPool([agent_x.snapshot(), agent_o.snapshot()])
     params = TrainingLoopParams(
         episodes=10000,
         agent_x=agent_x,
@@ -116,3 +126,298 @@ def test_init_with_custom_args(
         epsilon_scheduler=None,
     )
     assert TrainingLoop(params=params, rng=Random(0))
+
+
+def test_init_with_empty_snapshot_pool(
+    agent_x: QLearningAgent, agent_o: QLearningAgent
+) -> None:
+    """An empty pool is used as given, with its capacity and eviction policy."""
+    snapshot_pool = SnapshotPool(capacity=3, policy=EvictionPolicy.RESERVOIR)
+    params = TrainingLoopParams(
+        episodes=200,
+        agent_x=agent_x,
+        agent_o=agent_o,
+        snapshot_pool=snapshot_pool,
+        console_report=False,
+    )
+    loop = TrainingLoop(params, rng=Random(0))
+    assert loop.snapshot_pool is snapshot_pool
+
+    with patch("builtins.print"):
+        loop.run()
+
+    assert loop.snapshot_pool.policy == EvictionPolicy.RESERVOIR
+    assert len(loop.snapshot_pool[Player.PLAYER_X.value]) == 3  # noqa: PLR2004
+
+
+@patch("rl_tic_tac_toe.training_loop.TrainingReporter")
+@patch("rl_tic_tac_toe.training_loop.BatchedTrainingEpisode")
+def test_training_loop_run_batched(
+    mock_batched_episode: MagicMock,
+    mock_training_reporter: MagicMock,
+    agent_x: QLearningAgent,
+    agent_o: QLearningAgent,
+) -> None:
+    """With batch_size > 1 the episodes are played in parallel batches."""
+    params = TrainingLoopParams(
+        episodes=100, agent_x=agent_x, agent_o=agent_o, batch_size=32
+    )
+    loop = TrainingLoop(params, rng=Random(42))
+
+    with patch("builtins.print"):
+        loop.run()
+
+    batch_sizes = [c.args[2] for c in mock_batched_episode.run.call_args_list]
+    assert batch_sizes == [32, 32, 32, 4]
+    assert (
+        mock_training_reporter.return_value.evaluate_and_snapshot_if_needed.call_count
+        == 100
+    )
+    assert agent_x.epsilon < 1.0
+
+
+@patch("rl_tic_tac_toe.training_loop.TrainingReporter")
+def test_training_loop_run_parallel(
+    mock_training_reporter: MagicMock,
+    agent_x: QLearningAgent,
+    agent_o: QLearningAgent,
+) -> None:
+    """With num_workers > 1 the games are generated in worker processes."""
+    params = TrainingLoopParams(
+        episodes=300,
+        agent_x=agent_x,
+        agent_o=agent_o,
+        num_workers=2,
+        policy_refresh_episodes=100,
+    )
+    TrainingLoop(params).run()
+
+    assert (
+        mock_training_reporter.return_value.evaluate_and_snapshot_if_needed.call_count
+        == 300
+    )
+    assert len(agent_x.q_table) > 0
+    assert len(agent_o.q_table) > 0
+    assert agent_x.epsilon < 1.0
+
+
+@patch("rl_tic_tac_toe.training_loop.TrainingReporter")
+def test_training_loop_run_actor_learner(
+    mock_training_reporter: MagicMock,
+) -> None:
+    """With num_actors > 0 actor processes generate the games."""
+    agent_x = QLearningAgent(Player.PLAYER_X, backend=QTableBackend.DENSE)
+    agent_o = QLearningAgent(Player.PLAYER_O, backend=QTableBackend.DENSE)
+    params = TrainingLoopParams(
+        episodes=600, agent_x=agent_x, agent_o=agent_o, num_actors=1
+    )
+    with patch("builtins.print"):
+        TrainingLoop(params).run()
+
+    assert (
+        mock_training_reporter.return_value.evaluate_and_snapshot_if_needed.call_count
+        == 600
+    )
+    assert len(agent_x.q_table) > 0
+    assert agent_x.epsilon < 1.0
+
+
+def test_training_loop_run_profile(
+    agent_x: QLearningAgent, agent_o: QLearningAgent
+) -> None:
+    """With profile=True the loop times each phase and prints the breakdown."""
+    params = TrainingLoopParams(
+        episodes=200, agent_x=agent_x, agent_o=agent_o, profile=True
+    )
+    training_loop = TrainingLoop(params)
+    with patch("builtins.print"):
+        training_loop.run()
+
+    timer = training_loop.timer
+    assert timer is not None
+    assert timer.episodes == 200  # noqa: PLR2004
+    assert timer.calls(Phase.CHOOSE_ACTION) > 0
+    assert timer.calls(Phase.UPDATE_Q_TABLE) > 0
+    assert timer.calls(Phase.SCHEDULER) == 200  # noqa: PLR2004
+
+
+def test_training_loop_no_timer_by_default(training_loop: TrainingLoop) -> None:
+    assert training_loop.timer is None
+
+
+def test_training_loop_run_metrics_sink(
+    agent_x: QLearningAgent, agent_o: QLearningAgent
+) -> None:
+    stream = io.StringIO()
+    params = TrainingLoopParams(
+        episodes=100,
+        agent_x=agent_x,
+        agent_o=agent_o,
+        metrics_sink=JsonlMetricsWriter(stream),
+        console_report=False,
+    )
+    with patch("builtins.print"):
+        TrainingLoop(params).run()
+
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 20  # noqa: PLR2004
+    assert json.loads(lines[-1])["episode"] == 100  # noqa: PLR2004
+
+
+@pytest.mark.parametrize("batch_size", [1, 16])
+def test_resume_from_checkpoint_is_exact(tmp_path: Path, batch_size: int) -> None:
+    """A resumed run ends with the same agents as an uninterrupted one."""
+    agent_x = QLearningAgent(Player.PLAYER_X, rng=Random(1))
+    agent_o = QLearningAgent(Player.PLAYER_O, rng=Random(2))
+    params = TrainingLoopParams(
+        episodes=400,
+        agent_x=agent_x,
+        agent_o=agent_o,
+        batch_size=batch_size,
+        checkpoint_dir=tmp_path,
+        checkpoint_interval=150,
+        console_report=False,
+    )
+    with patch("builtins.print"):
+        TrainingLoop(params, Random(3)).run()
+        first = sorted(tmp_path.iterdir())[0]
+        assert first == checkpoint_path(tmp_path, 160 if batch_size > 1 else 150)
+        resumed_x, resumed_o = TrainingLoop.resume(first).run()
+
+    assert_same_agents((agent_x, agent_o), (resumed_x, resumed_o))
+
+
+@pytest.mark.parametrize("batch_size", [1, 16])
+def test_resume_during_compressed_tail_is_exact(
+    tmp_path: Path, batch_size: int
+) -> None:
+    """Resuming between convergence and the early stop keeps the stop and the
+    compressed schedules instead of deciding them again."""
+    agent_x = QLearningAgent(Player.PLAYER_X, rng=Random(1))
+    agent_o = QLearningAgent(Player.PLAYER_O, rng=Random(2))
+    tracker = ConvergenceTracker(
+        None, None, None, None, patience=2, compress_schedules=True
+    )
+    params = TrainingLoopParams(
+        episodes=400,
+        agent_x=agent_x,
+        agent_o=agent_o,
+        batch_size=batch_size,
+        checkpoint_dir=tmp_path,
+        checkpoint_interval=10,
+        console_report=False,
+        convergence=tracker,
+    )
+    with patch("builtins.print"):
+        TrainingLoop(params, Random(3)).run()
+        # 第 2 次评估 (回合 40) 后收敛，再训练一个评估间隔 (20 局)
+        assert tracker.converged_at == 40  # noqa: PLR2004
+        assert tracker.stop_episode == (68 if batch_size > 1 else 60)
+        # 只保留最新的两个检查点：较早的一个在压缩后的尾段中
+        tail, last = sorted(tmp_path.iterdir())
+        assert tail == checkpoint_path(tmp_path, 64 if batch_size > 1 else 50)
+        loop = TrainingLoop.resume(tail)
+        resumed = loop.run()
+        # 从结束处的检查点恢复时没有剩余的回合
+        finished = TrainingLoop.resume(last).run()
+
+    resumed_tracker = loop.checkpoint(0).params.convergence
+    assert resumed_tracker is not None
+    assert resumed_tracker.stop_episode == tracker.stop_episode
+    assert loop.stop_reason == tracker.stop_reason
+    assert_same_agents((agent_x, agent_o), resumed)
+    assert_same_agents((agent_x, agent_o), finished)
+
+
+def assert_same_agents(
+    agents: tuple[QLearningAgent, QLearningAgent],
+    resumed_agents: tuple[QLearningAgent, QLearningAgent],
+) -> None:
+    for agent, resumed in zip(agents, resumed_agents):
+        states = np.array(sorted(agent.q_table))
+        assert sorted(resumed.q_table) == states.tolist()
+        assert np.array_equal(agent.q_table.rows(states), resumed.q_table.rows(states))
+        assert resumed.epsilon == agent.epsilon
+        assert resumed.alpha == agent.alpha
+
+
+def test_checkpoint_waits_for_async_evaluations(tmp_path: Path) -> None:
+    """A checkpoint holds every evaluation up to it, even asynchronous ones."""
+    agent_x = QLearningAgent(Player.PLAYER_X, rng=Random(1))
+    agent_o = QLearningAgent(Player.PLAYER_O, rng=Random(2))
+    # 没有阈值时每个评估窗口都满足条件，streak 即已处理的评估数
+    tracker = ConvergenceTracker(None, None, None, None, patience=100)
+    params = TrainingLoopParams(
+        episodes=400,
+        agent_x=agent_x,
+        agent_o=agent_o,
+        max_pending_evaluations=2,
+        checkpoint_dir=tmp_path,
+        checkpoint_interval=150,
+        console_report=False,
+        convergence=tracker,
+    )
+    stream = io.StringIO()
+    with patch("builtins.print"):
+        TrainingLoop(params, Random(3)).run()
+        first = checkpoint_path(tmp_path, 150)
+        saved_tracker = load_checkpoint(first).params.convergence
+        assert saved_tracker is not None
+        assert saved_tracker.streak == 7  # noqa: PLR2004
+        loop = TrainingLoop.resume(first, metrics_sink=JsonlMetricsWriter(stream))
+        loop.run()
+
+    episodes = [json.loads(line)["episode"] for line in stream.getvalue().splitlines()]
+    assert episodes == list(range(160, 401, 20))
+    resumed_tracker = loop.checkpoint(0).params.convergence
+    assert resumed_tracker is not None
+    assert resumed_tracker.streak == tracker.streak == 20  # noqa: PLR2004
+
+
+def test_resume_without_checkpoint(tmp_path: Path) -> None:
+    with pytest.raises(FileNotFoundError):
+        TrainingLoop.resume(tmp_path)
+
+
+@pytest.mark.parametrize("batch_size", [1, 8])
+def test_training_loop_stops_when_converged(
+    agent_x: QLearningAgent, agent_o: QLearningAgent, batch_size: int
+) -> None:
+    tracker = ConvergenceTracker(None, None, None, None, patience=2)
+    params = TrainingLoopParams(
+        episodes=100,
+        agent_x=agent_x,
+        agent_o=agent_o,
+        batch_size=batch_size,
+        convergence=tracker,
+    )
+    training_loop = TrainingLoop(params)
+    with patch("builtins.print") as mock_print:
+        training_loop.run()
+
+    # 每 5 局评估一次，第 2 次评估后收敛
+    assert tracker.converged_at == 10  # noqa: PLR2004
+    assert training_loop.stop_reason == tracker.reason
+    lines = [str(c.args[0]) for c in mock_print.call_args_list if c.args]
+    assert any("提前结束训练" in line for line in lines)
+    assert agent_x.epsilon > training_loop.epsilon_scheduler.min
+
+
+def test_training_loop_compresses_schedules_when_converged(
+    agent_x: QLearningAgent, agent_o: QLearningAgent
+) -> None:
+    tracker = ConvergenceTracker(
+        None, None, None, None, patience=2, compress_schedules=True
+    )
+    params = TrainingLoopParams(
+        episodes=100, agent_x=agent_x, agent_o=agent_o, convergence=tracker
+    )
+    training_loop = TrainingLoop(params)
+    with patch("builtins.print") as mock_print:
+        training_loop.run()
+
+    lines = [str(c.args[0]) for c in mock_print.call_args_list if c.args]
+    # 收敛后再训练一个评估间隔，其间 alpha 与 epsilon 衰减到最小值
+    assert any("在回合 15 提前结束训练" in line for line in lines)
+    assert agent_x.epsilon == pytest.approx(training_loop.epsilon_scheduler.min)  # pyright: ignore[reportUnknownMemberType]
+    assert agent_o.alpha == pytest.approx(training_loop.alpha_scheduler.min)  # pyright: ignore[reportUnknownMemberType]
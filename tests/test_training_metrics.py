@@ -0,0 +1,124 @@
+import io
+import json
+from pathlib import Path
+from unittest.mock import patch
+
+from pytest import fixture
+
+from rl_tic_tac_toe.training_metrics import (
+    ConsoleRenderer,
+    Evaluation,
+    EvaluationRecord,
+    JsonlMetricsWriter,
+    TrainingStats,
+    as_rates,
+    rate_keyed,
+    read_metrics,
+)
+
+
+def make_record(episode: int) -> EvaluationRecord:
+    return EvaluationRecord(
+        TrainingStats(
+            episode=episode,
+            episodes=100,
+            alpha_x=0.5,
+            alpha_o=0.4,
+            epsilon_x=0.9,
+            epsilon_o=0.8,
+            q_table_size_x=10,
+            q_table_size_o=12,
+            pool_size_x=2,
+            pool_size_o=3,
+            episodes_per_second=1000.0,
+            max_delta_q=0.25,
+            mean_delta_q=0.01,
+            policy_change_x=0.1,
+            policy_change_o=0.0,
+        ),
+        Evaluation(
+            {"x_wins": 600, "o_wins": 300, "draws": 100},
+            {"wins": 800, "losses": 100, "draws": 100},
+            {"wins": 500, "losses": 400, "draws": 100},
+        ),
+    )
+
+
+@fixture
+def record() -> EvaluationRecord:
+    return make_record(50)
+
+
+def test_to_json(record: EvaluationRecord) -> None:
+    data = json.loads(record.to_json())
+
+    assert data["episode"] == 50  # noqa: PLR2004
+    assert data["alpha_o"] == 0.4  # noqa: PLR2004
+    assert data["q_table_size_x"] == 10  # noqa: PLR2004
+    assert data["ai_vs_ai"] == {"x_wins": 600, "o_wins": 300, "draws": 100}
+    assert data["o_vs_random"]["losses"] == 400  # noqa: PLR2004
+    assert "\n" not in record.to_json()
+
+
+def test_jsonl_writer_buffers_records() -> None:
+    stream = io.StringIO()
+    writer = JsonlMetricsWriter(stream, buffer_records=3)
+
+    writer.write(make_record(1))
+    writer.write(make_record(2))
+    assert stream.getvalue() == ""
+
+    writer.write(make_record(3))
+    writer.write(make_record(4))
+    assert len(stream.getvalue().splitlines()) == 3  # noqa: PLR2004
+
+    writer.close()
+    lines = stream.getvalue().splitlines()
+    assert [json.loads(line)["episode"] for line in lines] == [1, 2, 3, 4]
+    assert writer.records_written == 4  # noqa: PLR2004
+    # 不关闭调用方传入的流
+    assert not stream.closed
+
+
+def test_jsonl_writer_appends_to_file(tmp_path: Path) -> None:
+    path = tmp_path / "metrics" / "run.jsonl"
+    with JsonlMetricsWriter(path) as writer:
+        writer.write(make_record(1))
+    with JsonlMetricsWriter(path) as writer:
+        writer.write(make_record(2))
+
+    records = read_metrics(path)
+    assert [record["episode"] for record in records] == [1, 2]
+
+
+def test_console_renderer(record: EvaluationRecord) -> None:
+    with patch("builtins.print") as mock_print:
+        ConsoleRenderer().write(record)
+
+    lines = [str(c.args[0]) for c in mock_print.call_args_list if c.args]
+    assert any("训练进度: 50% (回合 50/100)" in line for line in lines)
+    assert "X 胜率: 600 (60.00%)" in lines
+    assert "AI 败率: 400 / 1000 (40.00%)" in lines
+
+
+def test_console_renderer_with_exact_rates(record: EvaluationRecord) -> None:
+    record.evaluation.ai_vs_ai = rate_keyed(
+        {"x_wins": 0.5, "o_wins": 0.25, "draws": 0.25}
+    )
+
+    with patch("builtins.print") as mock_print:
+        ConsoleRenderer().write(record)
+
+    lines = [str(c.args[0]) for c in mock_print.call_args_list if c.args]
+    assert "X 胜率: 50.00%" in lines
+    assert "平局率: 25.00%" in lines
+
+
+def test_as_rates() -> None:
+    assert as_rates({"wins": 3, "losses": 1, "draws": 0}) == {
+        "win_rate": 0.75,
+        "loss_rate": 0.25,
+        "draw_rate": 0.0,
+    }
+    rates = {"win_rate": 0.5, "loss_rate": 0.5, "draw_rate": 0.0}
+    assert as_rates(rates) == rates
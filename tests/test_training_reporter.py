@@ -1,10 +1,16 @@
+import io
+import json
+from concurrent.futures import Future
 from unittest.mock import MagicMock, patch
 
+import pytest
 from pytest import fixture
 
+from rl_tic_tac_toe.evaluator import EvaluationMode
 from rl_tic_tac_toe.player import Player
 from rl_tic_tac_toe.q_learning_agent import QLearningAgent
 from rl_tic_tac_toe.snapshot_pool import SnapshotPool
+from rl_tic_tac_toe.training_metrics import Evaluation, JsonlMetricsWriter
 from rl_tic_tac_toe.training_reporter import TrainingReporter
 
 
@@ -20,7 +26,7 @@ def agent_o() -> QLearningAgent:
 
 @fixture
 def snapshot_pool(agent_x: QLearningAgent, agent_o: QLearningAgent) -> SnapshotPool:
-    return {"X": [agent_x.snapshot()], "O": [agent_o.snapshot()]}
+    return SnapshotPool([agent_x.snapshot(), agent_o.snapshot()])
 
 
 @fixture
@@ -34,6 +40,8 @@ def test_run_snapshot(training_reporter: TrainingReporter) -> None:
     """Test the run_snapshot method."""
     reporter = training_reporter
     initial_snapshot_count = len(reporter._snapshot_pool[Player.PLAYER_X.value])
+    # an unchanged greedy policy would be skipped as a duplicate
+    reporter._agent_x.update_q_table(0, 4, 1.0, 4, [])
 
     with patch("builtins.print"):
         reporter._run_snapshot(0, Player.PLAYER_X)
@@ -43,6 +51,14 @@ def test_run_snapshot(training_reporter: TrainingReporter) -> None:
         == initial_snapshot_count + 1
     )
 
+    with patch("builtins.print"):
+        reporter._run_snapshot(1, Player.PLAYER_X)
+
+    assert (
+        len(reporter._snapshot_pool[Player.PLAYER_X.value])
+        == initial_snapshot_count + 1
+    )
+
 
 @patch("rl_tic_tac_toe.training_reporter.Evaluator")
 def test_evaluate_and_snapshot_if_needed(
@@ -52,7 +68,9 @@ def test_evaluate_and_snapshot_if_needed(
     snapshot_pool: SnapshotPool,
 ) -> None:
     """Test the evaluate_and_snapshot_if_needed method of the TrainingLoop."""
-    reporter = TrainingReporter(agent_x, agent_o, 100, snapshot_pool)
+    reporter = TrainingReporter(
+        agent_x, agent_o, 100, snapshot_pool, EvaluationMode.SCALAR
+    )
 
     # Mock the evaluator to avoid external dependencies
     mock_evaluator.evaluate_agents.return_value = {
@@ -82,3 +100,118 @@ def test_evaluate_and_snapshot_if_needed(
         assert mock_evaluator.evaluate_agents.call_count == 0
         assert mock_evaluator.evaluate_vs_random.call_count == 0
         assert mock_print.call_count == 0
+
+
+@patch("rl_tic_tac_toe.training_reporter.Evaluator")
+def test_batched_evaluation_is_seeded(
+    mock_evaluator: MagicMock,
+    agent_x: QLearningAgent,
+    agent_o: QLearningAgent,
+    snapshot_pool: SnapshotPool,
+) -> None:
+    """Batched evaluations are seeded with the episode index."""
+    reporter = TrainingReporter(
+        agent_x, agent_o, 100, snapshot_pool, EvaluationMode.BATCHED
+    )
+    mock_evaluator.evaluate_agents_batched.return_value = {
+        "x_wins": 0,
+        "o_wins": 0,
+        "draws": 1,
+    }
+    mock_evaluator.evaluate_vs_random_batched.return_value = {
+        "wins": 1,
+        "losses": 0,
+        "draws": 0,
+    }
+
+    with patch("builtins.print"):
+        reporter.evaluate_and_snapshot_if_needed(99)
+
+    mock_evaluator.evaluate_agents_batched.assert_called_once_with(
+        agent_x, agent_o, 1000, seed=99
+    )
+    assert mock_evaluator.evaluate_vs_random_batched.call_count == 2
+    assert mock_evaluator.evaluate_agents.call_count == 0
+
+
+def test_exact_evaluation_is_default(
+    agent_x: QLearningAgent, agent_o: QLearningAgent, snapshot_pool: SnapshotPool
+) -> None:
+    """By default the reporter prints exact rates, not game counts."""
+    reporter = TrainingReporter(agent_x, agent_o, 100, snapshot_pool)
+
+    with patch("builtins.print") as mock_print:
+        reporter.evaluate_and_snapshot_if_needed(99)
+
+    lines = [str(c.args[0]) for c in mock_print.call_args_list if c.args]
+    # 未训练的代理等同于随机玩家：X 先手的精确胜率为 58.49%
+    assert "X 胜率: 58.49%" in lines
+
+
+def test_async_evaluations_are_reported_in_episode_order(
+    agent_x: QLearningAgent, agent_o: QLearningAgent, snapshot_pool: SnapshotPool
+) -> None:
+    reporter = TrainingReporter(
+        agent_x, agent_o, 100, snapshot_pool, max_pending_evaluations=2
+    )
+
+    with patch("builtins.print") as mock_print:
+        for episode_idx in range(100):
+            if episode_idx == 50:
+                # 训练继续进行，评估使用的是当时的快照
+                agent_x.update_q_table(0, 4, 1.0, 4, [])
+            reporter.evaluate_and_snapshot_if_needed(episode_idx)
+        reporter.close()
+
+    lines = [str(c.args[0]) for c in mock_print.call_args_list if c.args]
+    progress = [line for line in lines if "训练进度" in line]
+    episodes = [int(line.split("回合 ")[1].split("/")[0]) for line in progress]
+    assert episodes == list(range(5, 101, 5))
+    x_rates = [line for line in lines if line.startswith("X 胜率")]
+    assert x_rates[:10] == ["X 胜率: 58.49%"] * 10
+    assert x_rates[10] != x_rates[0]
+
+
+def test_records_are_written_to_sinks(
+    agent_x: QLearningAgent, agent_o: QLearningAgent, snapshot_pool: SnapshotPool
+) -> None:
+    stream = io.StringIO()
+    writer = JsonlMetricsWriter(stream)
+    reporter = TrainingReporter(agent_x, agent_o, 100, snapshot_pool, sinks=[writer])
+
+    with patch("builtins.print") as mock_print:
+        for episode_idx in range(100):
+            reporter.evaluate_and_snapshot_if_needed(episode_idx)
+        reporter.close()
+
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [record["episode"] for record in records] == list(range(5, 101, 5))
+    assert round(records[0]["ai_vs_ai"]["x_win_rate"], 4) == 0.5849  # noqa: PLR2004
+    assert "x_wins" not in records[0]["ai_vs_ai"]
+    assert records[0]["epsilon_x"] == agent_x.epsilon
+    assert records[0]["pool_size_x"] == 1
+    assert records[0]["episodes_per_second"] > 0
+    # 没有控制台输出器时不输出评估报告
+    lines = [str(c.args[0]) for c in mock_print.call_args_list if c.args]
+    assert not any("训练进度" in line for line in lines)
+
+
+def test_close_cleans_up_after_failed_evaluation(
+    agent_x: QLearningAgent, agent_o: QLearningAgent, snapshot_pool: SnapshotPool
+) -> None:
+    sink = MagicMock()
+    reporter = TrainingReporter(
+        agent_x, agent_o, 100, snapshot_pool, max_pending_evaluations=2, sinks=[sink]
+    )
+    executor = reporter._executor = MagicMock()
+    failed: Future[Evaluation] = Future()
+    failed.set_exception(RuntimeError("worker failed"))
+    reporter._pending.append((reporter._training_stats(4), failed))
+    reporter._pending.append((reporter._training_stats(9), Future()))
+
+    with pytest.raises(RuntimeError, match="worker failed"):
+        reporter.close()
+
+    executor.shutdown.assert_called_once_with(cancel_futures=True)
+    sink.flush.assert_called_once_with()
+    assert not reporter._pending